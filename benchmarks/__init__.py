@@ -0,0 +1 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
\ No newline at end of file
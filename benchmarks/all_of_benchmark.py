@@ -0,0 +1,45 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of checking records that pass their contracts, with a function created by all_of versus a sequence
+of individual contracts.
+
+Run with: python -m benchmarks.all_of_benchmark
+"""
+
+import timeit
+from contracts import contract
+
+_ITERATIONS = 100000
+
+_check_record = contract.all_of([contract.is_not_none, (contract.is_instance, str)], (contract.is_greater_than, 0),
+                                (contract.is_greater_than_or_equal, 0), contract.is_true)
+
+
+def _check_with_contracts(records):
+    for name, quantity, price in records:
+        contract.is_not_none(name)
+        contract.is_instance(name, str)
+        contract.is_greater_than(quantity, 0)
+        contract.is_greater_than_or_equal(price, 0)
+        contract.is_true(price < 1000)
+
+
+def _check_with_all_of(records):
+    for name, quantity, price in records:
+        _check_record(name, quantity, price, price < 1000)
+
+
+def main():
+    records = [("Falcon", 9, 62.5)] * _ITERATIONS
+    individual = min(timeit.repeat(lambda: _check_with_contracts(records), number=1, repeat=5))
+    batched = min(timeit.repeat(lambda: _check_with_all_of(records), number=1, repeat=5))
+
+    print("Checking 5 contracts on each of {0} valid records:".format(_ITERATIONS))
+    print("  individual contracts: {0:8.1f} ns/record".format(individual / _ITERATIONS * 1e9))
+    print("  all_of():             {0:8.1f} ns/record".format(batched / _ITERATIONS * 1e9))
+    print("  speedup:              {0:8.2f}x".format(individual / batched))
+
+
+if __name__ == "__main__":
+    main()
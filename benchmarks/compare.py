@@ -0,0 +1,104 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Compares the results of :mod:`benchmarks.suite` to a baseline, and flags the benchmarks that got slower than a
+threshold, as well as the benchmarks of the baseline that are missing (e.g. deleted or renamed ones). The exit status is
+1 if any benchmark regressed or is missing, so that the comparison can gate changes in a CI job.
+
+Timings from different machines can't be compared directly. In relative mode, the ratios of the contracts to their
+hand-written equivalents are compared instead, which cancels out most of the speed of the machine.
+
+Run with: python -m benchmarks.compare baseline.json results.json [--threshold 0.1] [--relative]
+"""
+
+import argparse
+import json
+import sys
+
+_DEFAULT_THRESHOLD = 0.1
+
+_TABLE_HEADER = "{0:32} {1:5} {2:6} {3:>14} {4:>14} {5:>8}".format("Function", "Path", "Size", "Baseline",
+                                                                    "Current", "Change")
+_TABLE_ROW = "{function:32} {path:5} {size:6} {baseline:>14.2f} {current:>14.2f} {change:>+8.1%}{flag}"
+_MISSING_ROW = "{function:32} {path:5} {size:6} {baseline:>14} {current:>14} {change:>8}  MISSING"
+
+
+def compare(baseline_results, current_results, threshold=_DEFAULT_THRESHOLD, relative=False):
+    """
+    Compares the results of two runs of the benchmark suite, benchmark by benchmark.
+
+    :param baseline_results: the results of the baseline run, as saved by :mod:`benchmarks.suite`.
+    :param current_results: the results of the current run.
+    :param threshold: (optional) the relative slowdown (e.g. 0.1 for 10%) beyond which a benchmark regressed.
+    :param relative: (optional) True to compare the ratios of the contracts to the manual checks, rather than the time
+                     of the contracts.
+    :return: a list of dictionaries, one per benchmark of both runs, with the following keys: 'function', 'path',
+             'size', 'baseline' and 'current' (the compared values), 'change' (the relative change from the baseline)
+             and 'regressed'. A baseline value of 0 can't be compared relatively: the change is 0 if the current value
+             is 0 as well, and infinite (i.e. a regression) otherwise.
+    """
+    key = "ratio" if relative else "contract_ns"
+    baseline = {(result["function"], result["path"], result["size"]): result[key] for result in baseline_results}
+    comparisons = []
+    for result in current_results:
+        baseline_value = baseline.get((result["function"], result["path"], result["size"]))
+        if baseline_value is None:
+            continue
+        if baseline_value:
+            change = result[key] / baseline_value - 1
+        else:
+            change = float("inf") if result[key] else 0.0
+        comparisons.append({"function": result["function"], "path": result["path"], "size": result["size"],
+                            "baseline": baseline_value, "current": result[key], "change": change,
+                            "regressed": change > threshold})
+    return comparisons
+
+
+def find_missing(baseline_results, current_results):
+    """
+    Finds the benchmarks of the baseline run that are missing from the current run.
+
+    :param baseline_results: the results of the baseline run, as saved by :mod:`benchmarks.suite`.
+    :param current_results: the results of the current run.
+    :return: a list of dictionaries with the 'function', 'path' and 'size' keys of the missing benchmarks, in the order
+             of the baseline run.
+    """
+    current = {(result["function"], result["path"], result["size"]) for result in current_results}
+    return [{"function": result["function"], "path": result["path"], "size": result["size"]}
+            for result in baseline_results if (result["function"], result["path"], result["size"]) not in current]
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare",
+                                     description="Flags the benchmarks that regressed from a baseline.")
+    parser.add_argument("baseline", help="the JSON file of the baseline results")
+    parser.add_argument("current", help="the JSON file of the current results")
+    parser.add_argument("--threshold", type=float, default=_DEFAULT_THRESHOLD,
+                        help="relative slowdown beyond which a benchmark regressed (default: {0})".format(
+                            _DEFAULT_THRESHOLD))
+    parser.add_argument("--relative", action="store_true",
+                        help="compares the ratios of the contracts to the manual checks rather than their times")
+    options = parser.parse_args(arguments)
+
+    with open(options.baseline, encoding="utf-8") as file:
+        baseline_results = json.load(file)["results"]
+    with open(options.current, encoding="utf-8") as file:
+        current_results = json.load(file)["results"]
+    comparisons = compare(baseline_results, current_results, options.threshold, options.relative)
+    missing = find_missing(baseline_results, current_results)
+
+    print(_TABLE_HEADER)
+    for comparison in comparisons:
+        print(_TABLE_ROW.format(flag="  REGRESSION" if comparison["regressed"] else "", **comparison))
+    for benchmark in missing:
+        print(_MISSING_ROW.format(baseline="-", current="-", change="-", **benchmark))
+    regressions = sum(comparison["regressed"] for comparison in comparisons)
+    print("{0} of {1} benchmarks regressed by more than {2:.0%}.".format(regressions, len(comparisons),
+                                                                          options.threshold))
+    if missing:
+        print("{0} benchmarks of the baseline are missing.".format(len(missing)))
+    return 1 if regressions or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
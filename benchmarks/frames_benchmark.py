@@ -0,0 +1,51 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of checking the columns of a pandas DataFrame, with the vectorized contracts versus one contract call
+per row.
+
+Run with: python -m benchmarks.frames_benchmark
+"""
+
+import timeit
+import pandas
+from contracts import contract
+
+_ROWS = 100000
+
+_STATUSES = ("new", "paid", "shipped")
+
+
+def _check_with_vectorized_contracts(orders):
+    contract.all_not_null(orders)
+    contract.all_greater_than(orders["quantity"], 0)
+    contract.all_equal_to_any(orders["status"], _STATUSES)
+    contract.all_unique(orders["id"])
+
+
+def _check_with_contracts_per_row(orders):
+    ids = set()
+    for order_id, quantity, status in zip(orders["id"].tolist(), orders["quantity"].tolist(),
+                                          orders["status"].tolist()):
+        contract.is_not_none(order_id)
+        contract.is_not_none(status)
+        contract.is_greater_than(quantity, 0)
+        contract.is_equal_to_any(status, _STATUSES)
+        contract.is_false(order_id in ids)
+        ids.add(order_id)
+
+
+def main():
+    orders = pandas.DataFrame({"id": range(_ROWS), "quantity": [1 + index % 9 for index in range(_ROWS)],
+                               "status": [_STATUSES[index % 3] for index in range(_ROWS)]})
+    vectorized = min(timeit.repeat(lambda: _check_with_vectorized_contracts(orders), number=1, repeat=5))
+    per_row = min(timeit.repeat(lambda: _check_with_contracts_per_row(orders), number=1, repeat=5))
+
+    print("Checking a DataFrame of {0} valid rows:".format(_ROWS))
+    print("  vectorized contracts:  {0:8.1f} ns/row".format(vectorized / _ROWS * 1e9))
+    print("  contracts per row:     {0:8.1f} ns/row".format(per_row / _ROWS * 1e9))
+    print("  speedup:               {0:8.2f}x".format(per_row / vectorized))
+
+
+if __name__ == "__main__":
+    main()
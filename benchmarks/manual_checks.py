@@ -0,0 +1,302 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Hand-written equivalents of the contracts and assertions, as they'd be written without the library (see
+samples/contracts_vs_manual_checks_example.py). Each function is named after the function it stands for, takes the same
+arguments and fails the same way: contracts and assertions raise an exception, and predicates return False.
+"""
+
+import itertools
+from unittest import mock
+
+# Values accepted by the function standing for the contract created by one_of.
+VALID_STATUSES = ("new", "paid", "shipped")
+
+
+def is_not_none(value):
+    if value is None:
+        raise TypeError("value should not be None")
+
+
+def check_not_none(value):
+    return value is not None
+
+
+def is_not_empty(value):
+    if value is None or not len(value):
+        raise ValueError("value should not be empty")
+
+
+def check_not_empty(value):
+    return value is not None and len(value) > 0
+
+
+def is_equal_to_any(value, expected_values):
+    if value not in expected_values:
+        raise ValueError("value should be one of the expected values")
+
+
+def check_equal_to_any(value, expected_values):
+    return value in expected_values
+
+
+def one_of(value):
+    if value not in VALID_STATUSES:
+        raise ValueError("value should be one of the valid statuses")
+
+
+def is_true(value):
+    if value is not True:
+        raise ValueError("value should be True")
+
+
+def check_true(value):
+    return value is True
+
+
+def is_false(value):
+    if value is not False:
+        raise ValueError("value should be False")
+
+
+def check_false(value):
+    return value is False
+
+
+def is_equal(value, expected_value):
+    if value != expected_value:
+        raise ValueError("value should be equal to the expected value")
+
+
+def check_equal(value, expected_value):
+    return value == expected_value
+
+
+def is_greater_than(value, expected_value):
+    if value <= expected_value:
+        raise ValueError("value should be greater than the expected value")
+
+
+def check_greater_than(value, expected_value):
+    return value > expected_value
+
+
+def is_greater_than_or_equal(value, expected_value):
+    if value < expected_value:
+        raise ValueError("value should be greater than or equal to the expected value")
+
+
+def check_greater_than_or_equal(value, expected_value):
+    return value >= expected_value
+
+
+def all_have_attribute(value, attribute_name):
+    for item in value:
+        if not hasattr(item, attribute_name):
+            raise AttributeError("all items should have the attribute")
+
+
+def check_all_have_attribute(value, attribute_name):
+    return all(hasattr(item, attribute_name) for item in value)
+
+
+def all_have_method(value, method_name):
+    for item in value:
+        if not callable(getattr(item, method_name, None)):
+            raise AttributeError("all items should have the method")
+
+
+def check_all_have_method(value, method_name):
+    return all(callable(getattr(item, method_name, None)) for item in value)
+
+
+def is_callable(value):
+    if not callable(value):
+        raise TypeError("value should be callable")
+
+
+def check_callable(value):
+    return callable(value)
+
+
+def is_instance(value, cls):
+    if not isinstance(value, cls):
+        raise TypeError("value should be an instance of the class")
+
+
+def check_instance(value, cls):
+    return isinstance(value, cls)
+
+
+def all_in_range(value, minimum, maximum):
+    if len(value) and (min(value) < minimum or max(value) > maximum):
+        raise ValueError("all items should be in range")
+
+
+def check_all_in_range(value, minimum, maximum):
+    return not len(value) or minimum <= min(value) and max(value) <= maximum
+
+
+def all_non_negative(value):
+    if len(value) and min(value) < 0:
+        raise ValueError("all items should be non-negative")
+
+
+def check_all_non_negative(value):
+    return not len(value) or min(value) >= 0
+
+
+def is_sorted(value):
+    if any(previous > item for previous, item in zip(value, value[1:])):
+        raise ValueError("value should be sorted")
+
+
+def check_sorted(value):
+    return all(previous <= item for previous, item in zip(value, value[1:]))
+
+
+def all_equal(value, expected_value):
+    if value != expected_value:
+        raise ValueError("value should be equal to the expected buffer")
+
+
+def check_all_equal(value, expected_value):
+    return value == expected_value
+
+
+def all_not_null(value):
+    if value.isna().any():
+        raise ValueError("value should not contain nulls")
+
+
+def check_all_not_null(value):
+    return not value.isna().any()
+
+
+def all_greater_than(value, expected_value):
+    if not (value > expected_value).all():
+        raise ValueError("all items should be greater than the expected value")
+
+
+def check_all_greater_than(value, expected_value):
+    return bool((value > expected_value).all())
+
+
+def all_equal_to_any(value, expected_values):
+    if not value.isin(list(expected_values)).all():
+        raise ValueError("all items should be one of the expected values")
+
+
+def check_all_equal_to_any(value, expected_values):
+    return bool(value.isin(list(expected_values)).all())
+
+
+def all_unique(value):
+    if value.duplicated().any():
+        raise ValueError("all items should be unique")
+
+
+def check_all_unique(value):
+    return not value.duplicated().any()
+
+
+def has_dtype(value, expected_dtype):
+    if value.dtype != expected_dtype:
+        raise TypeError("value should have the expected dtype")
+
+
+def check_has_dtype(value, expected_dtype):
+    return value.dtype == expected_dtype
+
+
+def iter_not_empty(value):
+    iterator = iter(value)
+    for item in iterator:
+        return itertools.chain((item,), iterator)
+    raise ValueError("value should not be empty")
+
+
+def iter_all_have_attribute(value, attribute_name):
+    for item in value:
+        if not hasattr(item, attribute_name):
+            raise AttributeError("all items should have the attribute")
+        yield item
+
+
+def iter_all_have_method(value, method_name):
+    for item in value:
+        if not callable(getattr(item, method_name, None)):
+            raise AttributeError("all items should have the method")
+        yield item
+
+
+async def aiter_checked(value, cls):
+    async for item in value:
+        if item is None or not isinstance(item, cls):
+            raise TypeError("all items should be instances of the class")
+        yield item
+
+
+def all_of(name, quantity):
+    if name is None or not isinstance(name, str):
+        raise TypeError("name should be a string")
+    if quantity <= 0:
+        raise ValueError("quantity should be greater than 0")
+
+
+def requires(name, quantity):
+    if not name:
+        raise ValueError("name should not be empty")
+    if quantity <= 0:
+        raise ValueError("quantity should be greater than 0")
+    return name
+
+
+def ensures(name, quantity):
+    result = name if quantity > 0 else None
+    if result is None:
+        raise TypeError("result should not be None")
+    return result
+
+
+def typechecked(name, quantities):
+    if not isinstance(name, str):
+        raise TypeError("name should be a string")
+    if not isinstance(quantities, list) or quantities and not isinstance(quantities[0], int):
+        raise TypeError("quantities should be a list of integers")
+    return name
+
+
+def does_not_raise(exception_cls, callable_obj, *args, **kwargs):
+    try:
+        callable_obj(*args, **kwargs)
+    except exception_cls:
+        raise AssertionError("callable_obj should not raise")
+
+
+def raises(exception_cls, callable_obj, *args, **kwargs):
+    try:
+        callable_obj(*args, **kwargs)
+    except exception_cls:
+        return
+    raise AssertionError("callable_obj should raise")
+
+
+def raises_with_msg(exception_cls, callable_obj, expected_exception_msg, *args, **kwargs):
+    try:
+        callable_obj(*args, **kwargs)
+    except exception_cls as exception:
+        if str(exception) != expected_exception_msg:
+            raise AssertionError("callable_obj should raise with the expected message")
+        return
+    raise AssertionError("callable_obj should raise")
+
+
+def not_called_with(mock_obj, *args, **kwargs):
+    if mock.call(*args, **kwargs) in mock_obj.call_args_list:
+        raise AssertionError("mock_obj should not have been called with the arguments")
+
+
+def contains_one_element_of_class(obj_cls, iterable_obj):
+    if len(iterable_obj) != 1 or type(iterable_obj[0]) is not obj_cls:
+        raise AssertionError("iterable_obj should only contain one element of the class")
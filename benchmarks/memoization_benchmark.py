@@ -0,0 +1,40 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of checking the same immutable arguments over and over, with and without memoization.
+
+Run with: python -m benchmarks.memoization_benchmark
+"""
+
+import timeit
+from contracts import contract
+
+_ITERATIONS = 20000
+
+_REGIONS = tuple("region-{0}".format(index) for index in range(50))
+
+_PAYLOAD = bytes(sorted(bytes(range(256)) * 16))
+
+_CASES = [
+    ("is_equal_to_any(region, REGIONS)", lambda: contract.is_equal_to_any("region-42", _REGIONS)),
+    ("all_have_method(REGIONS, 'upper')", lambda: contract.all_have_method(_REGIONS, "upper")),
+    ("is_sorted(4 KB of bytes)", lambda: contract.is_sorted(_PAYLOAD)),
+]
+
+
+def main():
+    print("Checking the same arguments {0} times:".format(_ITERATIONS))
+    print("  {0:36} {1:>12} {2:>12}".format("", "plain", "memoized"))
+    for name, check in _CASES:
+        contract.set_memoization(0)
+        plain = min(timeit.repeat(check, number=_ITERATIONS, repeat=5))
+        contract.set_memoization(1024, checks=[contract.is_equal_to_any, contract.all_have_method, contract.is_sorted])
+        memoized = min(timeit.repeat(check, number=_ITERATIONS, repeat=5))
+        print("  {0:36} {1:9.1f} ns {2:9.1f} ns".format(name, plain / _ITERATIONS * 1e9,
+                                                        memoized / _ITERATIONS * 1e9))
+    print("  {0}".format(contract.get_memoization_info()))
+    contract.set_memoization(0)
+
+
+if __name__ == "__main__":
+    main()
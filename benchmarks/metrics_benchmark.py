@@ -0,0 +1,34 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of collecting metrics per call site, compared to checks whose metrics are disabled.
+
+Run with: python -m benchmarks.metrics_benchmark
+"""
+
+import timeit
+from contracts import contract
+
+_ITERATIONS = 100000
+
+_CASES = [
+    ("is_not_none(1)", lambda: contract.is_not_none(1)),
+    ("is_greater_than(2, 1)", lambda: contract.is_greater_than(2, 1)),
+]
+
+
+def main():
+    print("Checking passing arguments {0} times:".format(_ITERATIONS))
+    print("  {0:28} {1:>12} {2:>12}".format("", "disabled", "enabled"))
+    for name, check in _CASES:
+        contract.set_metrics(False)
+        disabled = min(timeit.repeat(check, number=_ITERATIONS, repeat=5))
+        contract.set_metrics(True)
+        enabled = min(timeit.repeat(check, number=_ITERATIONS, repeat=5))
+        print("  {0:28} {1:9.1f} ns {2:9.1f} ns".format(name, disabled / _ITERATIONS * 1e9,
+                                                        enabled / _ITERATIONS * 1e9))
+    contract.set_metrics(False)
+
+
+if __name__ == "__main__":
+    main()
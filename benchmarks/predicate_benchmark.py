@@ -0,0 +1,57 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of branching on the verdict of a contract, with check_* predicates versus bare comparisons and
+caught exceptions. Half of the records fail.
+
+Run with: python -m benchmarks.predicate_benchmark
+"""
+
+import timeit
+from contracts import contract
+
+_ITERATIONS = 100000
+
+
+def _count_with_comparisons(records):
+    valid = 0
+    for record in records:
+        if record > 0:
+            valid += 1
+    return valid
+
+
+def _count_with_predicates(records):
+    valid = 0
+    for record in records:
+        if contract.check_greater_than(record, 0):
+            valid += 1
+    return valid
+
+
+def _count_with_exceptions(records):
+    valid = 0
+    for record in records:
+        try:
+            contract.is_greater_than(record, 0)
+        except ValueError:
+            continue
+        valid += 1
+    return valid
+
+
+def main():
+    records = [-1, 1] * (_ITERATIONS // 2)
+    comparisons = min(timeit.repeat(lambda: _count_with_comparisons(records), number=1, repeat=5))
+    predicates = min(timeit.repeat(lambda: _count_with_predicates(records), number=1, repeat=5))
+    exceptions = min(timeit.repeat(lambda: _count_with_exceptions(records), number=1, repeat=5))
+
+    print("Branching loop over {0} records, half of them failing:".format(_ITERATIONS))
+    print("  bare comparison:          {0:8.1f} ns/record".format(comparisons / _ITERATIONS * 1e9))
+    print("  check_greater_than():     {0:8.1f} ns/record".format(predicates / _ITERATIONS * 1e9))
+    print("  is_greater_than() caught: {0:8.1f} ns/record".format(exceptions / _ITERATIONS * 1e9))
+    print("  speedup over exceptions:  {0:8.2f}x".format(exceptions / predicates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of validating valid records, with a compiled validator (in the current process, or in a pool of
+worker processes) versus one contract call per field.
+
+Run with: python -m benchmarks.records_benchmark
+"""
+
+import timeit
+from contracts import contract
+from contracts import records
+
+_ITERATIONS = 100000
+
+_STATUSES = ("new", "paid", "shipped")
+
+_validate_order = records.compile_validator({
+    "id": contract.is_not_none,
+    "name": [(contract.is_instance, str), contract.is_not_empty],
+    "quantity": [(contract.is_instance, int), (contract.is_greater_than, 0)],
+    "status": (contract.is_equal_to_any, _STATUSES),
+})
+
+
+def _validate_with_contracts(orders):
+    invalid = 0
+    for order in orders:
+        try:
+            contract.is_not_none(order.get("id"))
+            contract.is_instance(order.get("name"), str)
+            contract.is_not_empty(order.get("name"))
+            contract.is_instance(order.get("quantity"), int)
+            contract.is_greater_than(order.get("quantity"), 0)
+            contract.is_equal_to_any(order.get("status"), _STATUSES)
+        except contract.ContractViolation:
+            invalid += 1
+    return invalid
+
+
+def _validate_with_validator(orders):
+    return sum(1 for _ in records.iter_violations(orders, _validate_order))
+
+
+def _validate_in_parallel(orders):
+    return sum(1 for _ in records.iter_violations_in_parallel(orders, _validate_order, chunk_size=10000))
+
+
+def main():
+    orders = [{"id": index, "name": "Falcon", "quantity": 9, "status": "paid"} for index in range(_ITERATIONS)]
+    calls = min(timeit.repeat(lambda: _validate_with_contracts(orders), number=1, repeat=5))
+    compiled = min(timeit.repeat(lambda: _validate_with_validator(orders), number=1, repeat=5))
+    parallel = min(timeit.repeat(lambda: _validate_in_parallel(orders), number=1, repeat=5))
+
+    print("Validating {0} valid records with 6 contracts each:".format(_ITERATIONS))
+    print("  contract calls:       {0:8.1f} ns/record".format(calls / _ITERATIONS * 1e9))
+    print("  compiled validator:   {0:8.1f} ns/record".format(compiled / _ITERATIONS * 1e9))
+    print("  speedup:              {0:8.2f}x".format(calls / compiled))
+    print("  process pool:         {0:8.1f} ns/record".format(parallel / _ITERATIONS * 1e9))
+
+
+if __name__ == "__main__":
+    main()
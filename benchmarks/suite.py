@@ -0,0 +1,328 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Times every public function of :mod:`contracts.contract` and :mod:`contracts.assertion` that checks values, on the pass
+path and on the fail path, with small inputs and, when their cost depends on it, large ones. Each function is compared
+to its hand-written equivalent (see :mod:`benchmarks.manual_checks`).
+
+The results can be saved as JSON, and compared to a baseline with :mod:`benchmarks.compare` to catch regressions.
+Contracts are timed at the FULL enforcement level, without sampling, memoization, shadow mode or metrics.
+
+Run with: python -m benchmarks.suite [-o results.json] [-k is_sorted]
+"""
+
+import argparse
+import array
+import collections
+import datetime
+import inspect
+import json
+import platform
+import timeit
+from unittest import mock
+from benchmarks import manual_checks
+from contracts import assertion, contract
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+_SMALL_SIZE = 10
+_LARGE_SIZE = 10000
+
+# Expected values of is_equal_to_any copied into a new list on every call, like a list literal. There are enough of them
+# to be indexed if they were checked twice.
+_LITERAL_VALUES = tuple(range(20))
+
+# Minimum duration of a timed run, in seconds, and number of timed runs, of which the fastest is kept.
+_MIN_RUN_TIME = 0.01
+_DEFAULT_REPEAT = 3
+
+# Public functions of contracts.contract that configure the contracts or report on them, rather than checking values.
+_CONFIGURATION_FUNCTIONS = frozenset((
+    "get_enforcement_level", "set_enforcement_level", "enforcement_level", "set_sampling", "set_memoization",
+    "get_memoization_info", "set_shadow_mode", "drain_shadow_violations", "drain_shadow_violations_as_json",
+    "set_metrics", "get_metrics", "get_metrics_as_json", "get_metrics_as_prometheus", "set_max_reported_items",
+))
+
+_TABLE_HEADER = "{0:32} {1:5} {2:6} {3:>14} {4:>14} {5:>8}".format("Function", "Path", "Size", "Contract (ns)",
+                                                                    "Manual (ns)", "Ratio")
+_TABLE_ROW = "{function:32} {path:5} {size:6} {contract_ns:>14.1f} {manual_ns:>14.1f} {ratio:>8.2f}"
+
+# A timed function: its contract and manual implementations are both called with the same arguments.
+_Benchmark = collections.namedtuple("_Benchmark", "function path size contract manual arguments")
+
+
+class _Rocket:
+    def launch(self):
+        pass
+
+
+class _LaunchError(Exception):
+    pass
+
+
+def _do_nothing():
+    pass
+
+
+def _fail_to_launch():
+    raise _LaunchError("The rocket exploded.")
+
+
+def _consume(iterator):
+    collections.deque(iterator, maxlen=0)
+
+
+_is_valid_status = contract.one_of(manual_checks.VALID_STATUSES)
+
+_check_order = contract.all_of([contract.is_not_none, (contract.is_instance, str)], (contract.is_greater_than, 0))
+
+
+@contract.requires(name=contract.is_not_empty, quantity=(contract.is_greater_than, 0))
+def _order_with_requires(name, quantity):
+    return name
+
+
+@contract.ensures(contract.is_not_none)
+def _order_with_ensures(name, quantity):
+    return name if quantity > 0 else None
+
+
+@contract.typechecked
+def _order_with_typechecked(name: str, quantities: list[int]) -> str:
+    return name
+
+
+def _consume_async(async_iterator):
+    # The items are produced without suspending, so the coroutine consuming them completes on its first step, without
+    # an event loop.
+    async def consume():
+        async for _ in async_iterator:
+            pass
+
+    try:
+        consume().send(None)
+    except StopIteration:
+        pass
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def _get_benchmarks():
+    benchmarks = []
+
+    def add(function, contract_function, passing, failing, size="small"):
+        manual = getattr(manual_checks, function)
+        benchmarks.append(_Benchmark(function, "pass", size, contract_function, manual, passing))
+        benchmarks.append(_Benchmark(function, "fail", size, contract_function, manual, failing))
+
+    def add_check(function, passing, failing, large_passing=None, large_failing=None):
+        # Adds a contract along with its predicate, named after it with the 'check_' prefix.
+        predicate = "check_" + (function[3:] if function.startswith("is_") else function)
+        for name in (function, predicate):
+            add(name, getattr(contract, name), passing, failing)
+            if large_passing is not None:
+                add(name, getattr(contract, name), large_passing, large_failing, "large")
+
+    def add_iterator_check(function, passing, failing, large_passing, large_failing):
+        # The iterators are consumed, since their items are checked lazily.
+        contract_function = getattr(contract, function)
+        manual_function = getattr(manual_checks, function)
+        for size, size_passing, size_failing in (("small", passing, failing), ("large", large_passing, large_failing)):
+            for path, arguments in (("pass", size_passing), ("fail", size_failing)):
+                benchmarks.append(_Benchmark(
+                    function, path, size, lambda *args, check=contract_function: _consume(check(*args)),
+                    lambda *args, check=manual_function: _consume(check(*args)), arguments))
+
+    small_rockets = [_Rocket() for _ in range(_SMALL_SIZE)]
+    large_rockets = [_Rocket() for _ in range(_LARGE_SIZE)]
+    large_values = tuple(range(_LARGE_SIZE))
+
+    add_check("is_not_none", ("Falcon",), (None,))
+    add_check("is_not_empty", ("Falcon",), ("",))
+    add_check("is_equal_to_any", ("paid", manual_checks.VALID_STATUSES), ("lost", manual_checks.VALID_STATUSES),
+              (_LARGE_SIZE - 1, large_values), (-1, large_values))
+    # Lists of expected values built anew on every call, like list literals, are never indexed.
+    for path, value in (("pass", 19), ("fail", -1)):
+        benchmarks.append(_Benchmark(
+            "is_equal_to_any", path, "fresh", lambda value: contract.is_equal_to_any(value, [*_LITERAL_VALUES]),
+            lambda value: manual_checks.is_equal_to_any(value, [*_LITERAL_VALUES]), (value,)))
+    add("one_of", _is_valid_status, ("paid",), ("lost",))
+    add_check("is_true", (True,), (False,))
+    add_check("is_false", (False,), (True,))
+    add_check("is_equal", (9, 9), (9, 10))
+    add_check("is_greater_than", (9, 0), (0, 0))
+    add_check("is_greater_than_or_equal", (9, 0), (-1, 0))
+    add_check("is_callable", (_do_nothing,), (None,))
+    add_check("is_instance", ("Falcon", str), (9, str))
+    for function in ("all_have_attribute", "all_have_method"):
+        add_check(function, (small_rockets, "launch"), (small_rockets + [None], "launch"),
+                  (large_rockets, "launch"), (large_rockets + [None], "launch"))
+
+    add_check("all_in_range", (bytes(range(_SMALL_SIZE)), 0, 200), (bytes(range(_SMALL_SIZE)) + b"\xff", 0, 200),
+              (bytes(index % 200 for index in range(_LARGE_SIZE)), 0, 200),
+              (bytes(index % 200 for index in range(_LARGE_SIZE)) + b"\xff", 0, 200))
+    add_check("all_non_negative", (array.array("i", range(_SMALL_SIZE)),),
+              (array.array("i", range(_SMALL_SIZE)) + array.array("i", [-1]),),
+              (array.array("i", range(_LARGE_SIZE)),),
+              (array.array("i", range(_LARGE_SIZE)) + array.array("i", [-1]),))
+    add_check("is_sorted", (bytes(range(_SMALL_SIZE)),), (bytes(range(_SMALL_SIZE)) + b"\x00",),
+              (bytes(sorted(index % 256 for index in range(_LARGE_SIZE))),),
+              (bytes(sorted(index % 256 for index in range(_LARGE_SIZE))) + b"\x00",))
+    add_check("all_equal", (bytes(range(_SMALL_SIZE)), bytes(range(_SMALL_SIZE))),
+              (bytes(range(_SMALL_SIZE)), bytes(range(1, _SMALL_SIZE + 1))),
+              (bytes(_LARGE_SIZE), bytearray(_LARGE_SIZE)), (bytes(_LARGE_SIZE), bytearray(_LARGE_SIZE - 1) + b"\x01"))
+
+    if pandas is not None:
+        def series(size, last_item):
+            return pandas.Series(list(range(size - 1)) + [last_item])
+
+        for size_name, size in (("small", _SMALL_SIZE), ("large", _LARGE_SIZE)):
+            statuses = pandas.Series([manual_checks.VALID_STATUSES[index % 3] for index in range(size)])
+            cases = [
+                ("all_not_null", (series(size, size),), (series(size, None),)),
+                ("all_greater_than", (series(size, size), -1), (series(size, -5), -1)),
+                ("all_equal_to_any", (statuses, manual_checks.VALID_STATUSES),
+                 (pandas.concat([statuses, pandas.Series(["lost"])], ignore_index=True),
+                  manual_checks.VALID_STATUSES)),
+                ("all_unique", (series(size, size),), (series(size, 0),)),
+            ]
+            for function, passing, failing in cases:
+                for name in (function, "check_" + function):
+                    add(name, getattr(contract, name), passing, failing, size_name)
+        add_check("has_dtype", (series(_SMALL_SIZE, 0), "int64"), (series(_SMALL_SIZE, 0.5), "int64"))
+
+    add_iterator_check("iter_not_empty", (small_rockets,), ([],), (large_rockets,), ([],))
+    for function in ("iter_all_have_attribute", "iter_all_have_method"):
+        add_iterator_check(function, (small_rockets, "launch"), (small_rockets + [None], "launch"),
+                           (large_rockets, "launch"), (large_rockets + [None], "launch"))
+
+    for size_name, rockets in (("small", small_rockets), ("large", large_rockets)):
+        for path, items in (("pass", rockets), ("fail", rockets + [None])):
+            benchmarks.append(_Benchmark(
+                "aiter_checked", path, size_name,
+                lambda items: _consume_async(contract.aiter_checked(_aiter(items), contract.is_not_none,
+                                                                    (contract.is_instance, _Rocket))),
+                lambda items: _consume_async(manual_checks.aiter_checked(_aiter(items), _Rocket)), (items,)))
+
+    add("all_of", _check_order, ("Falcon", 9), (None, 0))
+    add("requires", _order_with_requires, ("Falcon", 9), ("", 9))
+    add("ensures", _order_with_ensures, ("Falcon", 9), ("Falcon", 0))
+    add("typechecked", _order_with_typechecked, ("Falcon", [9] * _SMALL_SIZE), (9, [9] * _SMALL_SIZE))
+    add("typechecked", _order_with_typechecked, ("Falcon", [9] * _LARGE_SIZE), ("Falcon", ["9"] * _LARGE_SIZE),
+        "large")
+
+    add("does_not_raise", assertion.does_not_raise, (_LaunchError, _do_nothing), (_LaunchError, _fail_to_launch))
+    add("raises", assertion.raises, (_LaunchError, _fail_to_launch), (_LaunchError, _do_nothing))
+    add("raises_with_msg", assertion.raises_with_msg, (_LaunchError, _fail_to_launch, "The rocket exploded."),
+        (_LaunchError, _fail_to_launch, "The rocket landed."))
+    for size_name, size in (("small", _SMALL_SIZE), ("large", _LARGE_SIZE)):
+        launcher = mock.Mock()
+        for _ in range(size):
+            launcher("Falcon")
+        add("not_called_with", assertion.not_called_with, (launcher, "Atlas"), (launcher, "Falcon"), size_name)
+    add("contains_one_element_of_class", assertion.contains_one_element_of_class, (_Rocket, [_Rocket()]),
+        (_Rocket, [_Rocket(), None]))
+    return benchmarks
+
+
+def _fails(function, arguments, is_predicate):
+    try:
+        result = function(*arguments)
+    except Exception:
+        return True
+    return is_predicate and not result
+
+
+def _time(function, arguments, path, repeat):
+    # Returns the best time of a call, in nanoseconds. Calls on the fail path catch the exception, if any.
+    if path == "pass":
+        def call():
+            function(*arguments)
+    else:
+        def call():
+            try:
+                function(*arguments)
+            except Exception:
+                pass
+
+    timer = timeit.Timer(call)
+    number = 1
+    while timer.timeit(number) < _MIN_RUN_TIME:
+        number *= 10
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+
+def run(benchmarks, repeat=_DEFAULT_REPEAT):
+    """
+    Times benchmarks, after checking that they pass or fail as expected.
+
+    :param benchmarks: the benchmarks to run.
+    :param repeat: (optional) the number of timed runs of each benchmark, of which the fastest is kept.
+    :return: a list of dictionaries with the following keys: 'function', 'path' ('pass' or 'fail'), 'size' ('small',
+             'large' or 'fresh'), 'contract_ns' and 'manual_ns' (the time of a call, in nanoseconds) and 'ratio' (of
+             the time of the contract to the time of the manual check).
+    :raises RuntimeError: if a benchmark doesn't pass or fail as expected.
+    """
+    results = []
+    for benchmark in benchmarks:
+        is_predicate = benchmark.function.startswith("check_")
+        for implementation in (benchmark.contract, benchmark.manual):
+            if _fails(implementation, benchmark.arguments, is_predicate) != (benchmark.path == "fail"):
+                raise RuntimeError("The {0} implementation of {1} didn't {2} on {3} inputs.".format(
+                    "contract" if implementation is benchmark.contract else "manual", benchmark.function,
+                    benchmark.path, benchmark.size))
+
+        contract_ns = _time(benchmark.contract, benchmark.arguments, benchmark.path, repeat)
+        manual_ns = _time(benchmark.manual, benchmark.arguments, benchmark.path, repeat)
+        results.append({"function": benchmark.function, "path": benchmark.path, "size": benchmark.size,
+                        "contract_ns": contract_ns, "manual_ns": manual_ns, "ratio": contract_ns / manual_ns})
+    return results
+
+
+def _get_unbenchmarked_functions(benchmarks):
+    benchmarked = {benchmark.function for benchmark in benchmarks}
+    return sorted(name for module in (contract, assertion) for name, value in vars(module).items()
+                  if inspect.isfunction(value) and value.__module__ == module.__name__ and not name.startswith("_")
+                  and name not in _CONFIGURATION_FUNCTIONS and name not in benchmarked)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite",
+                                     description="Times the contracts and assertions against hand-written checks.")
+    parser.add_argument("-o", "--output", help="saves the results to this JSON file")
+    parser.add_argument("-k", "--filter", default="", help="only runs the functions whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=_DEFAULT_REPEAT,
+                        help="number of timed runs of each benchmark (default: {0})".format(_DEFAULT_REPEAT))
+    options = parser.parse_args(arguments)
+
+    contract.set_enforcement_level(contract.FULL)
+    benchmarks = _get_benchmarks()
+    unbenchmarked_functions = _get_unbenchmarked_functions(benchmarks)
+    benchmarks = [benchmark for benchmark in benchmarks if options.filter in benchmark.function]
+
+    print(_TABLE_HEADER)
+    results = []
+    for benchmark in benchmarks:
+        result = run([benchmark], options.repeat)[0]
+        print(_TABLE_ROW.format(**result))
+        results.append(result)
+    if unbenchmarked_functions:
+        print("Not benchmarked (pandas isn't installed?): {0}".format(", ".join(unbenchmarked_functions)))
+
+    if options.output:
+        document = {"created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                    "python": platform.python_version(), "implementation": platform.python_implementation(),
+                    "platform": platform.platform(), "results": results}
+        with open(options.output, "w", encoding="utf-8") as file:
+            json.dump(document, file, indent=2)
+            file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of checking the arguments of a function against its annotations, with typechecked (in each inspection
+mode) versus is_instance calls in its body. The list passed to the function has 100000 items.
+
+Run with: python -m benchmarks.typechecked_benchmark
+"""
+
+import timeit
+from typing import Optional
+from contracts import contract
+
+_ITERATIONS = 10000
+
+_STAGES = list(range(100000))
+
+
+def _launch_with_contracts(name, stages, payload=None):
+    contract.is_instance(name, str)
+    contract.is_instance(stages, list)
+    for stage in stages:
+        contract.is_instance(stage, int)
+    if payload is not None:
+        contract.is_instance(payload, int)
+
+
+def _launch(name: str, stages: list[int], payload: Optional[int] = None):
+    pass
+
+
+def main():
+    print("Checking the arguments of a function taking a list of {0} items:".format(len(_STAGES)))
+    # Checking all items takes milliseconds, so fewer calls are measured.
+    for inspection, iterations in ((contract.FIRST_ITEM, _ITERATIONS), (contract.SAMPLED_ITEMS, _ITERATIONS),
+                                   (contract.ALL_ITEMS, 10)):
+        launch = contract.typechecked(_launch, inspection=inspection)
+        elapsed = min(timeit.repeat(lambda: launch("Falcon", _STAGES), number=iterations, repeat=3))
+        print("  typechecked ({0}):{1}{2:12.1f} ns/call".format(inspection, " " * (8 - len(inspection)),
+                                                                 elapsed / iterations * 1e9))
+    elapsed = min(timeit.repeat(lambda: _launch_with_contracts("Falcon", _STAGES), number=10, repeat=3))
+    print("  is_instance() calls:    {0:12.1f} ns/call".format(elapsed / 10 * 1e9))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Measures the cost of failing contracts whose exceptions are caught and counted, without reading their message.
+
+Run with: python -m benchmarks.violation_benchmark
+"""
+
+import sys
+import timeit
+from contracts import contract
+
+_ITERATIONS = 100000
+
+
+def _eager_is_greater_than(value, expected_value):
+    # Equivalent of contract.is_greater_than() formatting its error message before raising, as it used to.
+    if value <= expected_value:
+        frame = sys._getframe(1)
+        name = contract._get_parameter_name((frame.f_code, frame.f_lasti, frame.f_globals))
+        raise ValueError("{0} with value {1} was not greater than {2}.".format(name, value, expected_value))
+
+
+def _count_eager_violations(records):
+    violations = 0
+    for record in records:
+        try:
+            _eager_is_greater_than(record, 0)
+        except ValueError:
+            violations += 1
+    return violations
+
+
+def _count_lazy_violations(records):
+    violations = 0
+    for record in records:
+        try:
+            contract.is_greater_than(record, 0)
+        except ValueError:
+            violations += 1
+    return violations
+
+
+def main():
+    records = [-1] * _ITERATIONS
+    eager = min(timeit.repeat(lambda: _count_eager_violations(records), number=1, repeat=5))
+    lazy = min(timeit.repeat(lambda: _count_lazy_violations(records), number=1, repeat=5))
+
+    print("Fail-and-catch loop over {0} violations:".format(_ITERATIONS))
+    print("  eager message formatting: {0:8.1f} ns/violation".format(eager / _ITERATIONS * 1e9))
+    print("  lazy ContractViolation:   {0:8.1f} ns/violation".format(lazy / _ITERATIONS * 1e9))
+    print("  speedup:                  {0:8.2f}x".format(eager / lazy))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,23 @@
 code-contracts library
 """
 
+import importlib
+
 # Make sure that submodules are directly accessible via the top-level 'contracts' module, without having to import
 # them explicitly.
 from . import contract, assertion
 
+# Submodules only imported when they're first accessed (e.g. 'contracts.records'), since they load many modules of the
+# standard library that most programs don't need.
+_LAZY_SUBMODULES = frozenset(("compiler", "records"))
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module '{0}' has no attribute '{1}'".format(__name__, name))
+
+
 # We use Semantic Versioning. See: http://semver.org/
 __title__ = 'code-contracts'
 __version__ = '0.1.1'
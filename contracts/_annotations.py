@@ -0,0 +1,169 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Module translating type annotations into Python expressions that check whether a value matches them, which code
+generators compile into their checkers.
+"""
+
+import collections.abc
+import itertools
+import types
+import typing
+
+#: Inspection mode checking the first item of containers only.
+FIRST_ITEM = "first"
+#: Inspection mode checking a sample of the items of containers.
+SAMPLED_ITEMS = "sampled"
+#: Inspection mode checking all items of containers.
+ALL_ITEMS = "all"
+
+INSPECTION_MODES = (FIRST_ITEM, SAMPLED_ITEMS, ALL_ITEMS)
+
+# Classes accepted in place of the numeric classes they're annotated with (e.g. an int where a float is expected).
+_NUMERIC_CLASSES = {float: (int, float), complex: (int, float, complex)}
+
+# Containers whose items can be sampled with a slice, evenly spread over their length.
+_SLICEABLE_CLASSES = (list, tuple)
+
+# Prefix of the names of the variables holding the items of containers, by nesting depth.
+_ITEM_PREFIX = "__contracts_item_"
+
+
+class ConditionBuilder:
+    """
+    Builds the expressions checking values against type annotations.
+
+    Whether an expression iterates over all items of a container, whose cost depends on the size of the checked value,
+    is recorded in the 'iterates' attribute.
+    """
+
+    def __init__(self, add_global, inspection, sample_size):
+        """
+        :param add_global: a function storing a value in the globals of the generated code, and returning its name.
+        :param inspection: the inspection mode of the items of containers (:data:`FIRST_ITEM`, :data:`SAMPLED_ITEMS`
+                           or :data:`ALL_ITEMS`).
+        :param sample_size: the maximum number of items checked in :data:`SAMPLED_ITEMS` mode.
+        """
+        self._add_global = add_global
+        self._sample_size = 1 if inspection == FIRST_ITEM else sample_size
+        self._inspects_all = inspection == ALL_ITEMS
+        self.iterates = False
+
+    def build(self, annotation, value, depth=0):
+        """
+        Builds the expression checking a value against an annotation.
+
+        :param annotation: the annotation, resolved (i.e. not a string).
+        :param value: the expression of the value.
+        :param depth: (optional) the nesting depth of the value in the checked containers.
+        :return: the expression, which is True if the value matches the annotation, or None if any value does (e.g.
+                 for :data:`typing.Any` or unsupported annotations).
+        """
+        if annotation is None or annotation is type(None):
+            return "{0} is None".format(value)
+        classes = _get_classes(annotation)
+        if classes is not None:
+            return "isinstance({0}, {1})".format(value, self._add_global(classes)) if classes else None
+
+        origin = typing.get_origin(annotation)
+        arguments = typing.get_args(annotation)
+        if origin is typing.Annotated:
+            return self.build(arguments[0], value, depth)
+        if origin is typing.Union or origin is types.UnionType:
+            return self._build_union(arguments, value, depth)
+        if origin is typing.Literal:
+            # Literals are checked like is_equal_to_any, with a set lookup.
+            return "(type({0}).__hash__ is not None and {0} in {1})".format(value,
+                                                                             self._add_global(frozenset(arguments)))
+        if origin is type:
+            subclasses = _get_classes(arguments[0]) if arguments else None
+            if not subclasses:
+                return "isinstance({0}, type)".format(value)
+            return "(isinstance({0}, type) and issubclass({0}, {1}))".format(value, self._add_global(subclasses))
+        if origin is collections.abc.Callable:
+            return "callable({0})".format(value)
+        if isinstance(annotation, typing.TypeVar):
+            if annotation.__bound__ is not None:
+                return self.build(annotation.__bound__, value, depth)
+            return self._build_union(annotation.__constraints__, value, depth) if annotation.__constraints__ else None
+        if hasattr(annotation, "__supertype__"):
+            # typing.NewType.
+            return self.build(annotation.__supertype__, value, depth)
+        if isinstance(origin, type):
+            condition = "isinstance({0}, {1})".format(value, self._add_global(origin))
+            items_condition = self._build_items(origin, arguments, value, depth)
+            return "({0} and {1})".format(condition, items_condition) if items_condition else condition
+        return None
+
+    def _build_union(self, annotations, value, depth):
+        # Plain classes are merged into a single isinstance() call.
+        merged_classes = []
+        conditions = []
+        for annotation in annotations:
+            classes = _get_classes(annotation)
+            if classes is not None:
+                if not classes:
+                    return None
+                merged_classes.extend(cls for cls in classes if cls not in merged_classes)
+                continue
+            condition = self.build(annotation, value, depth)
+            if condition is None:
+                return None
+            conditions.append(condition)
+        if merged_classes:
+            conditions.insert(0, "isinstance({0}, {1})".format(value, self._add_global(tuple(merged_classes))))
+        return "({0})".format(" or ".join(conditions))
+
+    def _build_items(self, origin, arguments, value, depth):
+        # Builds the expression checking the items of a container, or returns None if they aren't checked.
+        item = "{0}{1}".format(_ITEM_PREFIX, depth)
+        if origin is tuple and arguments and not (len(arguments) == 2 and arguments[1] is Ellipsis):
+            # Tuples of fixed length are always checked entirely.
+            conditions = ["len({0}) == {1}".format(value, len(arguments))]
+            for index, annotation in enumerate(arguments):
+                condition = self.build(annotation, "{0}[{1}]".format(value, index), depth + 1)
+                if condition is not None:
+                    conditions.append(condition)
+            return "({0})".format(" and ".join(conditions))
+
+        if issubclass(origin, collections.abc.Mapping) and len(arguments) == 2:
+            key = item + "_key"
+            conditions = [self.build(arguments[0], key, depth + 1), self.build(arguments[1], item, depth + 1)]
+            conditions = [condition for condition in conditions if condition is not None]
+            if not conditions:
+                return None
+            return "all({0} for {1}, {2} in {3})".format(" and ".join(conditions), key, item,
+                                                         self._sample(value + ".items()", False))
+
+        if arguments and (origin is tuple or issubclass(origin, collections.abc.Collection) and len(arguments) == 1):
+            condition = self.build(arguments[0], item, depth + 1)
+            if condition is None:
+                return None
+            return "all({0} for {1} in {2})".format(condition, item,
+                                                    self._sample(value, issubclass(origin, _SLICEABLE_CLASSES)))
+        return None
+
+    def _sample(self, items, sliceable):
+        # Returns the expression of the items to check.
+        if self._inspects_all:
+            self.iterates = True
+            return items
+        if sliceable and self._sample_size > 1:
+            # The step is rounded up, so that no more than the sample size is checked.
+            return "{0}[::(len({0}) + {1}) // {2} or 1]".format(items, self._sample_size - 1, self._sample_size)
+        return "{0}({1}, {2})".format(self._add_global(itertools.islice), items, self._sample_size)
+
+
+def _get_classes(annotation):
+    # Returns the classes an annotation stands for if it's a plain class, an empty tuple if any value matches it, or
+    # None if it's not a plain class.
+    if annotation is typing.Any or annotation is object:
+        return ()
+    if not isinstance(annotation, type) or isinstance(annotation, types.GenericAlias):
+        return None
+    if typing.is_typeddict(annotation):
+        return dict,
+    if getattr(annotation, "_is_protocol", False) and not getattr(annotation, "_is_runtime_protocol", False):
+        # isinstance() can't be called on protocols that aren't runtime-checkable.
+        return ()
+    return _NUMERIC_CLASSES.get(annotation, (annotation,))
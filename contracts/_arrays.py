@@ -0,0 +1,107 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Module checking the comparison contracts on NumPy arrays, item by item.
+
+It's only imported once an array has been passed to a contract, so NumPy is never loaded by the contracts themselves.
+"""
+
+import numpy
+
+# Maximum number of items compared at once, which bounds the size of the intermediate boolean masks.
+_CHUNK_SIZE = 65536
+
+
+def has_violations(value, expected_value, violation_name):
+    """
+    Returns whether some items of an array fail the comparison to an expected value (be it a scalar or an array
+    broadcastable to the same shape), stopping at the first chunk containing one.
+
+    :param value: the checked array.
+    :param expected_value: the expected value.
+    :param violation_name: the name of the NumPy comparison that is True for the offending items (e.g. 'less_equal').
+    :return: True if an item fails the comparison, or if the shapes can't be broadcast together.
+    """
+    arrays = _broadcast(value, expected_value)
+    if arrays is None:
+        return True
+    for _ in _iter_violation_masks(arrays[0], arrays[1], getattr(numpy, violation_name)):
+        return True
+    return False
+
+
+def get_violation_template(value, expected_value, violation_name, message_template, shape_message_template, max_items):
+    """
+    Compares an array to an expected value (be it a scalar or an array broadcastable to the same shape), chunk by chunk.
+
+    :param value: the checked array.
+    :param expected_value: the expected value.
+    :param violation_name: the name of the NumPy comparison that is True for the offending items (e.g. 'less_equal').
+    :param message_template: the template of the error message, with the '{name}', '{expected}', '{count}', '{size}'
+                             and '{items}' fields.
+    :param shape_message_template: the template of the error message if the shapes can't be broadcast together, with
+                                   the '{name}', '{expected}', '{shape}' and '{expected_shape}' fields.
+    :param max_items: the maximum number of offending items described in the error message.
+    :return: None if all items pass, otherwise the template of the error message, where only the '{name}' and
+             '{expected}' fields remain to be formatted.
+    """
+    arrays = _broadcast(value, expected_value)
+    if arrays is None:
+        return shape_message_template.format(name="{name}", expected="{expected}", shape=value.shape,
+                                             expected_shape=numpy.shape(expected_value))
+
+    value, expected_array = arrays
+    count = 0
+    items = []
+    for start, mask in _iter_violation_masks(value, expected_array, getattr(numpy, violation_name)):
+        if not value.shape:
+            return _format(message_template, 1, 1, [(value.item(), ())])
+
+        count += numpy.count_nonzero(mask)
+        if len(items) < max_items:
+            offsets = numpy.flatnonzero(mask)[:max_items - len(items)]
+            for index in zip(*numpy.unravel_index(offsets, mask.shape)):
+                index = (start + int(index[0]),) + tuple(int(i) for i in index[1:])
+                items.append((value.item(index), index))
+
+    if not count:
+        return None
+    return _format(message_template, count, value.size, items)
+
+
+def _broadcast(value, expected_value):
+    # Returns views of the array and of the expected value with the same shape, or None if that's impossible.
+    expected_array = numpy.asarray(expected_value)
+    try:
+        shape = numpy.broadcast_shapes(value.shape, expected_array.shape)
+    except ValueError:
+        return None
+    return numpy.broadcast_to(value, shape), numpy.broadcast_to(expected_array, shape)
+
+
+def _iter_violation_masks(value, expected_array, violates):
+    # Yields the offset and the boolean mask of the offending items of each chunk containing some. Chunks are taken
+    # along the first axis, so that they're views of the arrays, whatever their memory layout.
+    if not value.size:
+        return
+    if not value.shape:
+        if violates(value, expected_array):
+            yield 0, None
+        return
+
+    rows = max(1, _CHUNK_SIZE * value.shape[0] // value.size)
+    for start in range(0, value.shape[0], rows):
+        mask = violates(value[start:start + rows], expected_array[start:start + rows])
+        if mask.any():
+            yield start, mask
+
+
+def _format(message_template, count, size, items):
+    descriptions = [repr(item) if not index else
+                    "{0!r} at index {1}".format(item, index[0] if len(index) == 1 else index) for item, index in items]
+    if count > len(items):
+        descriptions.append("...")
+
+    # The descriptions are escaped, since the message is formatted a second time with the name of the parameter.
+    return message_template.format(name="{name}", expected="{expected}", count=count, size=size,
+                                   items=", ".join(descriptions).replace("{", "{{").replace("}", "}}"))
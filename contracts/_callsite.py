@@ -0,0 +1,312 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Module resolving the expressions passed as arguments to a contract function, given its call site.
+
+A call site is identified by the code object of the caller and the offset of the call instruction in its bytecode. The
+expressions are first reconstructed from the compiled bytecode, which doesn't require the source code to be available
+(e.g. zipapps or frozen applications). Expressions that can't be reconstructed this way (e.g. short-circuiting boolean
+operators or comprehensions) are extracted from the source code, if available.
+"""
+
+import ast
+import dis
+import linecache
+
+# Argument expressions already resolved, keyed by call site (code object identifier, instruction offset), along with
+# the code object itself. A call site always passes the same expressions, so they only have to be resolved once. Code
+# objects are hashed by value, which is slow, so they're looked up by identifier, and checked by identity in case the
+# identifier was reused.
+_argument_expressions = {}
+
+# Operator precedence, from lowest to highest, used to parenthesize reconstructed expressions only when needed.
+_NOT_PRECEDENCE = 4
+_COMPARISON_PRECEDENCE = 5
+_UNARY_PRECEDENCE = 12
+_ATOM_PRECEDENCE = 16
+
+_BINARY_OPERATOR_PRECEDENCES = {
+    "|": 6, "^": 7, "&": 8, "<<": 9, ">>": 9, "+": 10, "-": 10, "*": 11, "@": 11, "/": 11, "//": 11, "%": 11, "**": 13
+}
+
+# Binary operators of Python < 3.11, which had one opcode per operator.
+_BINARY_OPCODES = {
+    "BINARY_POWER": "**", "BINARY_MULTIPLY": "*", "BINARY_MATRIX_MULTIPLY": "@", "BINARY_FLOOR_DIVIDE": "//",
+    "BINARY_TRUE_DIVIDE": "/", "BINARY_MODULO": "%", "BINARY_ADD": "+", "BINARY_SUBTRACT": "-", "BINARY_LSHIFT": "<<",
+    "BINARY_RSHIFT": ">>", "BINARY_AND": "&", "BINARY_XOR": "^", "BINARY_OR": "|"
+}
+
+_UNARY_OPCODES = {"UNARY_NOT": "not ", "UNARY_NEGATIVE": "-", "UNARY_INVERT": "~", "UNARY_POSITIVE": "+"}
+
+_NAME_OPCODES = {
+    "LOAD_FAST", "LOAD_FAST_CHECK", "LOAD_FAST_BORROW", "LOAD_FAST_AND_CLEAR", "LOAD_NAME", "LOAD_GLOBAL", "LOAD_DEREF",
+    "LOAD_CLASSDEREF", "LOAD_CLOSURE", "LOAD_FROM_DICT_OR_DEREF", "LOAD_FROM_DICT_OR_GLOBALS"
+}
+
+# Instructions that don't have any effect on the reconstructed expressions.
+_IGNORED_OPCODES = {"CACHE", "PRECALL", "NOP", "EXTENDED_ARG", "TO_BOOL", "NOT_TAKEN", "KW_NAMES"}
+
+_COLLECTION_FORMATS = {"BUILD_TUPLE": "({0})", "BUILD_LIST": "[{0}]", "BUILD_SET": "{{{0}}}"}
+
+
+def argument_expressions(code, offset, module_globals=None):
+    """
+    Returns the expressions passed as positional arguments to the call performed at the specified call site.
+
+    :param code: the code object containing the call.
+    :param offset: the offset of the call instruction in the bytecode of the code object.
+    :param module_globals: (optional) the globals of the module containing the code, used to retrieve the source code
+                           of modules loaded from an archive.
+    :return: a tuple of strings, or None if the expressions couldn't be resolved.
+    """
+    call_site = (id(code), offset)
+    resolved = _argument_expressions.get(call_site)
+    if resolved is None or resolved[0] is not code:
+        resolved = _argument_expressions[call_site] = (
+            code, _from_bytecode(code, offset) or _from_source(code, offset, module_globals))
+    return resolved[1]
+
+
+def line_number(code, offset):
+    """
+    Returns the line number of an instruction.
+
+    :param code: the code object containing the instruction.
+    :param offset: the offset of the instruction in the bytecode of the code object.
+    :return: the line number, or the first line number of the code object if the instruction has none.
+    """
+    for start, end, line in code.co_lines():
+        if start <= offset < end and line is not None:
+            return line
+    return code.co_firstlineno
+
+
+def _from_bytecode(code, offset):
+    instructions = []
+    for instruction in dis.get_instructions(code):
+        if instruction.offset > offset:
+            break
+        if instruction.opname == "KW_NAMES":
+            # The names of the keyword arguments of the following call are stored in the constants.
+            instruction = instruction._replace(argval=code.co_consts[instruction.arg])
+        instructions.extend(_expand(instruction))
+
+    try:
+        return _BytecodeReader(instructions).read_call_arguments()
+    except _UnsupportedBytecode:
+        return None
+
+
+def _expand(instruction):
+    # Super-instructions loading two variables at once are split so that each instruction produces a single value.
+    if instruction.opname.startswith("LOAD_FAST") and isinstance(instruction.argval, tuple):
+        return [instruction._replace(opname="LOAD_FAST", argval=name) for name in instruction.argval]
+    return [instruction]
+
+
+class _UnsupportedBytecode(Exception):
+    pass
+
+
+class _BytecodeReader:
+    """
+    Reconstructs expressions by reading the instructions that produced them backward, starting from the call.
+    """
+
+    def __init__(self, instructions):
+        self._instructions = instructions
+        self._index = len(instructions) - 1
+
+    def read_call_arguments(self):
+        instruction = self._pop()
+        if not instruction.opname.startswith("CALL"):
+            raise _UnsupportedBytecode()
+        arguments, positional_count = self._read_arguments(instruction)
+
+        # Reading backward is only valid for straight-line code: if a jump lands after the first instruction that was
+        # read, the arguments contain a conditional expression (e.g. 'a or b') whose values can't be told apart.
+        if any(instruction.is_jump_target for instruction in self._instructions[self._index + 2:]):
+            raise _UnsupportedBytecode()
+        return tuple(text for text, _ in arguments[:positional_count])
+
+    def _pop(self):
+        while self._index >= 0:
+            instruction = self._instructions[self._index]
+            self._index -= 1
+            if instruction.opname not in _IGNORED_OPCODES:
+                return instruction
+        raise _UnsupportedBytecode()
+
+    def _peek_keyword_names(self):
+        # On Python 3.11 and 3.12, the names of keyword arguments are set by a KW_NAMES instruction preceding the call.
+        index = self._index
+        while index >= 0 and self._instructions[index].opname in _IGNORED_OPCODES:
+            if self._instructions[index].opname == "KW_NAMES":
+                return self._instructions[index].argval
+            index -= 1
+        return ()
+
+    def _read_arguments(self, instruction):
+        keyword_names = self._peek_keyword_names()
+        if instruction.opname in ("CALL_KW", "CALL_FUNCTION_KW"):
+            names = self._pop()
+            if names.opname != "LOAD_CONST":
+                raise _UnsupportedBytecode()
+            keyword_names = names.argval
+        elif instruction.opname not in ("CALL", "CALL_FUNCTION", "CALL_METHOD"):
+            raise _UnsupportedBytecode()
+
+        arguments = [self._read_value() for _ in range(instruction.arg)]
+        arguments.reverse()
+        positional_count = len(arguments) - len(keyword_names)
+        for i, name in enumerate(keyword_names):
+            text, _ = arguments[positional_count + i]
+            arguments[positional_count + i] = ("{0}={1}".format(name, text), _ATOM_PRECEDENCE)
+        return arguments, positional_count
+
+    def _read_value(self):
+        text, precedence, slots = self._read()
+        if slots != 1:
+            raise _UnsupportedBytecode()
+        return text, precedence
+
+    def _read(self):
+        # Returns the text and the precedence of the expression produced by the instruction, along with the number of
+        # stack slots that it occupies (a callable and its 'self' argument, or NULL, occupy two slots).
+        instruction = self._pop()
+        opname = instruction.opname
+
+        if opname in _NAME_OPCODES:
+            # LOAD_GLOBAL pushes NULL along with the global when the lowest bit of its argument is set (Python 3.11+).
+            pushes_null = opname == "LOAD_GLOBAL" and "NULL" in instruction.argrepr
+            return instruction.argval, _ATOM_PRECEDENCE, 2 if pushes_null else 1
+        if opname in ("LOAD_CONST", "LOAD_SMALL_INT"):
+            return repr(instruction.argval), _ATOM_PRECEDENCE, 1
+        if opname == "PUSH_NULL":
+            return None, _ATOM_PRECEDENCE, 1
+        if opname in ("LOAD_ATTR", "LOAD_METHOD"):
+            text, precedence = self._read_value()
+            # LOAD_ATTR loads a method along with 'self' when the lowest bit of its argument is set (Python 3.12+).
+            is_method = opname == "LOAD_METHOD" or "NULL|self" in instruction.argrepr
+            return "{0}.{1}".format(_parenthesize(text, precedence, _ATOM_PRECEDENCE), instruction.argval), \
+                _ATOM_PRECEDENCE, 2 if is_method else 1
+        if opname == "BINARY_SUBSCR" or (opname == "BINARY_OP" and instruction.argrepr == "[]"):
+            return self._read_subscript()
+        if opname == "BINARY_SLICE":
+            stop = self._read_value()[0]
+            start = self._read_value()[0]
+            return self._read_subscript(_format_slice(start, stop))
+        if opname == "BINARY_OP" or opname in _BINARY_OPCODES:
+            operator = _BINARY_OPCODES.get(opname, instruction.argrepr)
+            return self._read_binary(operator, _BINARY_OPERATOR_PRECEDENCES.get(operator))
+        if opname == "COMPARE_OP":
+            operator = str(instruction.argval)
+            if operator.startswith("bool("):
+                operator = operator[5:-1]
+            return self._read_binary(operator, _COMPARISON_PRECEDENCE)
+        if opname == "IS_OP":
+            return self._read_binary("is not" if instruction.arg else "is", _COMPARISON_PRECEDENCE)
+        if opname == "CONTAINS_OP":
+            return self._read_binary("not in" if instruction.arg else "in", _COMPARISON_PRECEDENCE)
+        if opname in _UNARY_OPCODES:
+            precedence = _NOT_PRECEDENCE if opname == "UNARY_NOT" else _UNARY_PRECEDENCE
+            text, operand_precedence = self._read_value()
+            return _UNARY_OPCODES[opname] + _parenthesize(text, operand_precedence, precedence), precedence, 1
+        if opname in _COLLECTION_FORMATS:
+            items = [self._read_value()[0] for _ in range(instruction.arg)]
+            items.reverse()
+            joined = ", ".join(items)
+            if opname == "BUILD_TUPLE" and len(items) == 1:
+                joined += ","
+            return _COLLECTION_FORMATS[opname].format(joined), _ATOM_PRECEDENCE, 1
+        if opname == "BUILD_SLICE" and instruction.arg == 2:
+            stop = self._read_value()[0]
+            start = self._read_value()[0]
+            return _format_slice(start, stop), _ATOM_PRECEDENCE, 1
+        if opname.startswith("CALL"):
+            return self._read_call(instruction)
+        raise _UnsupportedBytecode()
+
+    def _read_subscript(self, index=None):
+        if index is None:
+            index = self._read_value()[0]
+        text, precedence = self._read_value()
+        return "{0}[{1}]".format(_parenthesize(text, precedence, _ATOM_PRECEDENCE), index), _ATOM_PRECEDENCE, 1
+
+    def _read_binary(self, operator, precedence):
+        if precedence is None:
+            raise _UnsupportedBytecode()
+        right, right_precedence = self._read_value()
+        left, left_precedence = self._read_value()
+        if operator == "**":
+            # The power operator is right-associative.
+            left = _parenthesize(left, left_precedence, precedence + 1)
+            right = _parenthesize(right, right_precedence, precedence)
+        else:
+            left = _parenthesize(left, left_precedence, precedence)
+            right = _parenthesize(right, right_precedence, precedence + 1)
+        return "{0} {1} {2}".format(left, operator, right), precedence, 1
+
+    def _read_call(self, instruction):
+        arguments, _ = self._read_arguments(instruction)
+
+        # Since Python 3.11, the callable is preceded or followed by either NULL or 'self'. Before that, it occupies
+        # two slots only for method calls.
+        expected_slots = 1 if instruction.opname.startswith("CALL_FUNCTION") else 2
+        callable_text = None
+        slots = 0
+        while slots < expected_slots:
+            text, precedence, read_slots = self._read()
+            if text is not None:
+                if callable_text is not None:
+                    raise _UnsupportedBytecode()
+                callable_text = _parenthesize(text, precedence, _ATOM_PRECEDENCE)
+            slots += read_slots
+        if callable_text is None:
+            raise _UnsupportedBytecode()
+
+        return "{0}({1})".format(callable_text, ", ".join(text for text, _ in arguments)), _ATOM_PRECEDENCE, 1
+
+
+def _parenthesize(text, precedence, minimum_precedence):
+    return text if precedence >= minimum_precedence else "({0})".format(text)
+
+
+def _format_slice(start, stop):
+    return "{0}:{1}".format("" if start == "None" else start, "" if stop == "None" else stop)
+
+
+def _from_source(code, offset, module_globals):
+    # The exact position of each instruction in the source code is only available since Python 3.11 (PEP 657).
+    if not hasattr(code, "co_positions"):
+        return None
+    positions = list(code.co_positions())
+    if offset // 2 >= len(positions):
+        return None
+    start_line, end_line, start_column, end_column = positions[offset // 2]
+    if None in (start_line, end_line, start_column, end_column):
+        return None
+
+    lines = linecache.getlines(code.co_filename, module_globals)
+    if end_line > len(lines):
+        return None
+
+    # Columns are offsets in the UTF-8 encoded lines.
+    encoded_lines = [line.encode("utf-8") for line in lines[start_line - 1:end_line]]
+    encoded_lines[-1] = encoded_lines[-1][:end_column]
+    encoded_lines[0] = encoded_lines[0][start_column:]
+    segment = b"".join(encoded_lines).decode("utf-8")
+
+    try:
+        call = ast.parse(segment, mode="eval").body
+    except SyntaxError:
+        return None
+    if not isinstance(call, ast.Call):
+        return None
+
+    expressions = []
+    for argument in call.args:
+        if isinstance(argument, ast.Starred):
+            break
+        expressions.append(ast.get_source_segment(segment, argument))
+    return tuple(expressions)
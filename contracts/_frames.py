@@ -0,0 +1,106 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Module checking the contracts on pandas Series and DataFrames, column by column, with vectorized operations.
+
+It's only imported once a Series or a DataFrame has been passed to a contract, so pandas is never loaded by the
+contracts themselves.
+"""
+
+import numpy
+import pandas
+
+# Functions returning the boolean mask of the offending items of a Series or a DataFrame, keyed by violation name. The
+# mask of the 'duplicated' violation is a Series over the rows of a DataFrame, since rows are compared as a whole.
+_MASKS = {
+    "null": lambda value, expected_value: value.isna(),
+    "not_greater_than": lambda value, expected_value: ~(value > expected_value),
+    "not_equal_to_any": lambda value, expected_value: ~value.isin(list(expected_value)),
+    "duplicated": lambda value, expected_value: value.duplicated(keep=False),
+}
+
+
+def has_violations(value, expected_value, violation_name):
+    """
+    Returns whether some items of a Series or a DataFrame are offending.
+
+    :param value: the checked Series or DataFrame.
+    :param expected_value: the expected value, if the violation needs one.
+    :param violation_name: the name of the violation (e.g. 'null').
+    :return: True if an item is offending, False otherwise.
+    """
+    return bool(_MASKS[violation_name](value, expected_value).to_numpy().any())
+
+
+def get_violation_template(value, expected_value, violation_name, message_template, max_items):
+    """
+    Finds the offending items of a Series or a DataFrame, and describes them with their row labels (and column labels,
+    for DataFrames).
+
+    :param value: the checked Series or DataFrame.
+    :param expected_value: the expected value, if the violation needs one.
+    :param violation_name: the name of the violation (e.g. 'null').
+    :param message_template: the template of the error message, with the '{name}', '{expected}', '{count}', '{size}'
+                             and '{items}' fields.
+    :param max_items: the maximum number of offending items described in the error message.
+    :return: None if no item is offending, otherwise the template of the error message, where only the '{name}' and
+             '{expected}' fields remain to be formatted.
+    """
+    mask = _MASKS[violation_name](value, expected_value)
+    masks = [mask.to_numpy()] if isinstance(mask, pandas.Series) else [mask.iloc[:, i].to_numpy()
+                                                                       for i in range(mask.shape[1])]
+    count = 0
+    items = []
+    for column, column_mask in enumerate(masks):
+        positions = numpy.flatnonzero(column_mask)
+        count += len(positions)
+        positions = positions[:max_items - len(items)]
+        if not len(positions):
+            continue
+
+        labels = value.index[positions].tolist()
+        if isinstance(value, pandas.Series):
+            items.extend("{0!r} at row {1!r}".format(item, label)
+                         for item, label in zip(value.iloc[positions].tolist(), labels))
+        elif mask.ndim == 1:
+            items.extend("row {0!r}".format(label) for label in labels)
+        else:
+            column_label = value.columns[column]
+            items.extend("{0!r} at row {1!r} in column {2!r}".format(item, label, column_label)
+                         for item, label in zip(value.iloc[positions, column].tolist(), labels))
+
+    if not count:
+        return None
+    if count > len(items):
+        items.append("...")
+
+    # The descriptions are escaped, since the message is formatted a second time with the name of the parameter.
+    return message_template.format(name="{name}", expected="{expected}", count=count, size=mask.size,
+                                   items=", ".join(items).replace("{", "{{").replace("}", "}}"))
+
+
+def get_dtype_mismatches(value, expected_dtype):
+    """
+    Compares the dtype of a Series, or the dtypes of the columns of a DataFrame, to the expected ones.
+
+    :param value: the checked Series or DataFrame.
+    :param expected_dtype: the expected dtype (e.g. 'int64'), or a mapping of column labels to expected dtypes.
+    :return: a list of (column label, dtype, expected dtype) tuples, where the column label is None for a Series and the
+             dtype is None for a missing column.
+    """
+    if isinstance(value, pandas.Series):
+        expected_dtype = pandas.api.types.pandas_dtype(expected_dtype)
+        return [] if value.dtype == expected_dtype else [(None, value.dtype, expected_dtype)]
+
+    if isinstance(expected_dtype, dict):
+        expected_dtypes = expected_dtype.items()
+    else:
+        expected_dtypes = [(column, expected_dtype) for column in value.columns]
+    dtypes = value.dtypes
+    mismatches = []
+    for column, expected_dtype in expected_dtypes:
+        expected_dtype = pandas.api.types.pandas_dtype(expected_dtype)
+        dtype = dtypes[column] if column in dtypes.index else None
+        if dtype is None or dtype != expected_dtype:
+            mismatches.append((column, dtype, expected_dtype))
+    return mismatches
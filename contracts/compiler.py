@@ -0,0 +1,442 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Module rewriting contracts at compile time.
+
+In inline mode, calls to the simplest contracts (e.g. 'contract.is_greater_than(model, 0)') are replaced by the
+equivalent 'if model <= 0: raise ...' statement, with the parameter name and the error message baked in as constants.
+The rewritten code runs as fast as hand-written checks, while the source code keeps the contract syntax.
+
+In strip mode, all the statements calling a contract or an assertion are removed, the same way 'python -O' removes
+assert statements: neither the call, nor the lookup of the function, nor the evaluation of its arguments remain. The
+decorators checking the arguments and the result of functions (e.g. '@contract.requires(...)') are removed as well.
+
+Modules can be rewritten when they're imported, with an import hook restricted to specific packages:
+
+.. code-block:: python
+
+   >>> from contracts import compiler
+   >>> compiler.install("my_service.ingestion")
+   >>> compiler.install("my_service.rendering", mode=compiler.STRIP)
+   >>> import my_service.ingestion.parser  # Contracts are inlined.
+
+The rewritten bytecode is cached in __pycache__, next to the regular bytecode but under a distinct name, so that the AST
+transformation doesn't have to be performed every time the process starts.
+
+Inlined contracts are always checked, regardless of the enforcement level set in :mod:`contracts.contract`.
+"""
+
+import ast
+import copy
+import hashlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import marshal
+import sys
+from . import assertion, contract
+
+#: Mode replacing the calls to the simplest contracts by if/raise statements.
+INLINE = "inline"
+#: Mode removing the calls to contracts and assertions entirely.
+STRIP = "strip"
+
+# Name under which the rewritten modules import contracts.contract, to access the exceptions raised by the inlined
+# contracts. Since it ends with two underscores, it isn't mangled inside class bodies.
+_CONTRACT_MODULE_ALIAS = "__contracts_contract__"
+
+_CONTRACTS_PACKAGE = "contracts"
+_CONTRACT_MODULE = "contracts.contract"
+_ASSERTION_MODULE = "contracts.assertion"
+
+_MODES = (INLINE, STRIP)
+
+# Version of the rewriting, stored in the cached bytecode. It must be incremented whenever the rewriting of this module
+# changes, so that stale caches are discarded. Changes to the inlined checks and new versions of the library are
+# detected by themselves.
+_CACHE_VERSION = 2
+
+
+def compile_source(source, filename="<unknown>", mode=INLINE):
+    """
+    Compiles the source code of a module, rewriting its contracts.
+
+    :param source: a string containing the source code of the module.
+    :param filename: (optional) the name of the file containing the source code.
+    :param mode: (optional) the rewriting mode: :data:`INLINE` or :data:`STRIP`.
+    :return: the code object of the module.
+    :raises: :class:`ValueError` if the mode is unknown.
+    """
+    tree = rewrite(ast.parse(source, filename), source, mode)
+    return compile(tree, filename, "exec", dont_inherit=True)
+
+
+def rewrite(tree, source=None, mode=INLINE):
+    """
+    Rewrites the contracts contained in the abstract syntax tree of a module.
+
+    :param tree: the :class:`ast.Module` to rewrite. It's modified in place.
+    :param source: (optional) a string containing the source code of the module, used to bake the exact expressions
+                   passed to contracts into error messages.
+    :param mode: (optional) the rewriting mode: :data:`INLINE` or :data:`STRIP`.
+    :return: the rewritten tree.
+    :raises: :class:`ValueError` if the mode is unknown.
+    """
+    if mode not in _MODES:
+        raise ValueError("Unknown rewriting mode '{0}'.".format(mode))
+
+    if mode == STRIP:
+        return ast.fix_missing_locations(_StrippingTransformer(_ContractNames(tree)).visit(tree))
+
+    transformer = _InliningTransformer(_ContractNames(tree), source)
+    tree = transformer.visit(tree)
+    if transformer.has_inlined:
+        _insert_import(tree, ast.Import(names=[ast.alias(name=_CONTRACT_MODULE, asname=_CONTRACT_MODULE_ALIAS)]))
+    return ast.fix_missing_locations(tree)
+
+
+def install(*packages, mode=INLINE):
+    """
+    Installs an import hook rewriting the contracts of the specified packages (and their subpackages) when they're
+    imported. Modules that are already imported aren't affected.
+
+    :param packages: the names of the packages or modules to rewrite (e.g. 'my_service.ingestion'). If a package is
+                     configured with several modes, the most specific package wins.
+    :param mode: (optional) the rewriting mode: :data:`INLINE` or :data:`STRIP`.
+    :raises: :class:`ValueError` if the mode is unknown.
+    """
+    if mode not in _MODES:
+        raise ValueError("Unknown rewriting mode '{0}'.".format(mode))
+    for package in packages:
+        _finder.modes[package] = mode
+    if _finder not in sys.meta_path:
+        sys.meta_path.insert(0, _finder)
+
+
+def uninstall(*packages):
+    """
+    Stops rewriting the contracts of the specified packages. Modules that are already imported aren't affected.
+
+    :param packages: the names of the packages or modules passed to :func:`install`. If none is specified, the import
+                     hook is removed entirely.
+    """
+    for package in packages or list(_finder.modes):
+        _finder.modes.pop(package, None)
+    if not _finder.modes and _finder in sys.meta_path:
+        sys.meta_path.remove(_finder)
+
+
+class _ContractNames:
+    """
+    Finds the names under which a module imports contracts.contract, contracts.assertion and their functions.
+    """
+
+    def __init__(self, tree):
+        # Names bound to the contracts package, to its modules and to their functions, mapped to the full name of the
+        # module and to the (module, function) pair respectively.
+        self._package_names = set()
+        self._module_names = {}
+        self._function_names = {}
+
+        modules = (_CONTRACT_MODULE, _ASSERTION_MODULE)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.name in modules and alias.asname:
+                        self._module_names[alias.asname] = alias.name
+                    elif alias.name.split(".")[0] == _CONTRACTS_PACKAGE and not alias.asname:
+                        self._package_names.add(_CONTRACTS_PACKAGE)
+            elif isinstance(node, ast.ImportFrom) and not node.level:
+                for alias in node.names:
+                    if node.module == _CONTRACTS_PACKAGE and "{0}.{1}".format(node.module, alias.name) in modules:
+                        self._module_names[alias.asname or alias.name] = "{0}.{1}".format(node.module, alias.name)
+                    elif node.module in modules:
+                        self._function_names[alias.asname or alias.name] = (node.module, alias.name)
+
+    def get_function(self, call):
+        """
+        Returns the full name of the module and the name of the function called, or (None, None) if the function doesn't
+        belong to contracts.contract or contracts.assertion.
+        """
+        return self.get_name(call.func)
+
+    def get_name(self, function):
+        """
+        Returns the full name of the module and the name of the function referred to by an expression (e.g.
+        'contract.typechecked'), or (None, None) if the function doesn't belong to contracts.contract or
+        contracts.assertion.
+        """
+        if isinstance(function, ast.Name):
+            return self._function_names.get(function.id, (None, None))
+        if not isinstance(function, ast.Attribute):
+            return None, None
+
+        module = function.value
+        if isinstance(module, ast.Name) and module.id in self._module_names:
+            return self._module_names[module.id], function.attr
+        if isinstance(module, ast.Attribute) and isinstance(module.value, ast.Name) and \
+                module.value.id in self._package_names:
+            module_name = "{0}.{1}".format(_CONTRACTS_PACKAGE, module.attr)
+            if module_name in (_CONTRACT_MODULE, _ASSERTION_MODULE):
+                return module_name, function.attr
+        return None, None
+
+
+class _InliningTransformer(ast.NodeTransformer):
+    """
+    Replaces the statements calling an inlinable contract by the equivalent if/raise statement.
+    """
+
+    def __init__(self, contract_names, source):
+        self._contract_names = contract_names
+        self._source = source
+        self.has_inlined = False
+
+    def visit_Expr(self, node):
+        if not isinstance(node.value, ast.Call):
+            return node
+        module_name, check_name = self._contract_names.get_function(node.value)
+        if module_name != _CONTRACT_MODULE or check_name not in contract._INLINE_CHECKS:
+            return node
+
+        arguments = _get_inlinable_arguments(node.value)
+        if arguments is None:
+            return node
+        value, expected, expression_str = arguments
+        condition, exception_name, message_template = contract._INLINE_CHECKS[check_name]
+        if "{expected}" in condition and expected is None:
+            return node
+        if expected is None:
+            expected = ast.Constant(value={"is_true": True, "is_false": False}.get(check_name))
+
+        statement = ast.If(
+            test=_substitute(condition, value, expected),
+            body=[ast.Raise(
+                exc=ast.Call(
+                    func=ast.Attribute(value=ast.Name(id=_CONTRACT_MODULE_ALIAS, ctx=ast.Load()), attr=exception_name,
+                                       ctx=ast.Load()),
+                    args=[ast.Constant(value=message_template), copy.deepcopy(value), copy.deepcopy(expected),
+                          ast.Constant(value=None), ast.Constant(value=expression_str or self._get_text(value))],
+                    keywords=[]),
+                cause=None)],
+            orelse=[])
+        if check_name in contract._ARRAY_CHECKS:
+            # The contract itself is called when the condition can't be evaluated (e.g. on a NumPy array).
+            statement = ast.Try(
+                body=[statement],
+                handlers=[
+                    ast.ExceptHandler(type=ast.Attribute(value=ast.Name(id=_CONTRACT_MODULE_ALIAS, ctx=ast.Load()),
+                                                         attr="ContractViolation", ctx=ast.Load()),
+                                      name=None, body=[ast.Raise(exc=None, cause=None)]),
+                    ast.ExceptHandler(type=ast.Tuple(elts=[ast.Name(id="TypeError", ctx=ast.Load()),
+                                                           ast.Name(id="ValueError", ctx=ast.Load())], ctx=ast.Load()),
+                                      name=None, body=[node])],
+                orelse=[], finalbody=[])
+        self.has_inlined = True
+        return ast.fix_missing_locations(ast.copy_location(statement, node))
+
+    def _get_text(self, node):
+        text = ast.get_source_segment(self._source, node) if self._source else None
+        return text if text else ast.unparse(node)
+
+
+class _StrippingTransformer(ast.NodeTransformer):
+    """
+    Removes the statements calling a contract or an assertion, the contracts wrapping iterables, and the decorators of
+    contracts.
+    """
+
+    def __init__(self, contract_names):
+        self._contract_names = contract_names
+
+    def visit_FunctionDef(self, node):
+        node.decorator_list = [decorator for decorator in node.decorator_list if not self._is_contract(decorator)]
+        return self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _is_contract(self, decorator):
+        # Decorators are either called with their contracts (e.g. '@contract.requires(...)'), or applied as is (e.g.
+        # '@contract.typechecked').
+        if isinstance(decorator, ast.Call):
+            module_name, function_name = self._contract_names.get_function(decorator)
+        else:
+            module_name, function_name = self._contract_names.get_name(decorator)
+        return module_name == _CONTRACT_MODULE and function_name in _DECORATORS
+
+    def visit_Expr(self, node):
+        if not isinstance(node.value, ast.Call):
+            return self.generic_visit(node)
+        module_name, function_name = self._contract_names.get_function(node.value)
+        if module_name == _CONTRACT_MODULE and function_name in contract._checks:
+            return None
+        if module_name == _ASSERTION_MODULE and function_name in _ASSERTIONS:
+            return None
+        return self.generic_visit(node)
+
+    def visit_Call(self, node):
+        # Functions wrapping an iterable with a check are replaced by the iterable itself.
+        module_name, function_name = self._contract_names.get_function(node)
+        if module_name == _CONTRACT_MODULE and function_name in contract._iterator_checks and node.args and \
+                not isinstance(node.args[0], ast.Starred):
+            return self.visit(node.args[0])
+        return self.generic_visit(node)
+
+    def generic_visit(self, node):
+        # A block whose statements were all removed must still contain one.
+        blocks = [name for name in ("body", "orelse", "finalbody") if getattr(node, name, None)]
+        node = super().generic_visit(node)
+        for name in blocks:
+            if not getattr(node, name):
+                setattr(node, name, [ast.copy_location(ast.Pass(), node)])
+        return node
+
+
+# Public functions of contracts.assertion.
+_ASSERTIONS = {name for name, value in vars(assertion).items() if callable(value) and not name.startswith("_")}
+
+# Public decorators of contracts.contract.
+_DECORATORS = frozenset(("requires", "ensures", "typechecked"))
+
+
+def _get_inlinable_arguments(call):
+    # Returns the value, the expected value and the expression string passed to the contract, or None if the call can't
+    # be inlined. Arguments are evaluated once more when the contract fails, so only side-effect free ones are inlined.
+    if any(isinstance(argument, ast.Starred) for argument in call.args) or len(call.args) > 3:
+        return None
+    arguments = list(call.args) + [None] * (3 - len(call.args))
+    for keyword in call.keywords:
+        if keyword.arg != "expression_str" or arguments[2] is not None:
+            return None
+        arguments[2] = keyword.value
+
+    value, expected, expression_str = arguments
+    if value is None or not _is_simple(value) or (expected is not None and not _is_simple(expected)):
+        return None
+    if expression_str is not None:
+        if not (isinstance(expression_str, ast.Constant) and isinstance(expression_str.value, (str, type(None)))):
+            return None
+        expression_str = expression_str.value
+    return value, expected, expression_str
+
+
+def _is_simple(node):
+    # Names, constants (including negative numbers), attributes of names, and comparisons between them.
+    if isinstance(node, ast.Compare):
+        return all(_is_simple(operand) for operand in [node.left] + node.comparators)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        node = node.operand
+    while isinstance(node, ast.Attribute):
+        node = node.value
+    return isinstance(node, (ast.Name, ast.Constant))
+
+
+def _substitute(condition, value, expected):
+    # Parses the condition, replacing the '{value}' and '{expected}' placeholders by copies of the arguments.
+    placeholders = {"__value__": value, "__expected__": expected}
+    tree = ast.parse(condition.format(value="__value__", expected="__expected__"), mode="eval").body
+
+    class Substitution(ast.NodeTransformer):
+        def visit_Name(self, node):
+            return copy.deepcopy(placeholders[node.id]) if node.id in placeholders else node
+
+    return Substitution().visit(tree)
+
+
+def _insert_import(tree, statement):
+    # The import must follow the docstring and the __future__ imports of the module.
+    index = 0
+    if tree.body and isinstance(tree.body[0], ast.Expr) and isinstance(tree.body[0].value, ast.Constant) and \
+            isinstance(tree.body[0].value.value, str):
+        index = 1
+    while index < len(tree.body) and isinstance(tree.body[index], ast.ImportFrom) and \
+            tree.body[index].module == "__future__":
+        index += 1
+    tree.body.insert(index, ast.copy_location(statement, tree.body[index]) if index < len(tree.body) else statement)
+
+
+class _ContractsLoader(importlib.machinery.SourceFileLoader):
+    """
+    Loader compiling the source file of a module with its contracts rewritten.
+    """
+
+    def __init__(self, fullname, path, mode):
+        super().__init__(fullname, path)
+        self.mode = mode
+
+    def get_code(self, fullname):
+        path = self.get_filename(fullname)
+        stats = self.path_stats(path)
+        header = _get_cache_header(stats["mtime"], stats["size"])
+
+        # The cache is named after the rewriting mode, so that it's never confused with the regular bytecode cache
+        # (e.g. __pycache__/module.cpython-311.opt-contractsinline.pyc).
+        try:
+            cache_path = importlib.util.cache_from_source(path, optimization=self._get_cache_tag())
+        except NotImplementedError:
+            cache_path = None
+
+        if cache_path:
+            try:
+                data = self.get_data(cache_path)
+            except OSError:
+                pass
+            else:
+                if data[:len(header)] == header:
+                    return marshal.loads(data[len(header):])
+
+        source = importlib.util.decode_source(self.get_data(path))
+        code = compile_source(source, path, self.mode)
+        if cache_path and not sys.dont_write_bytecode:
+            self.set_data(cache_path, header + marshal.dumps(code))
+        return code
+
+    def _get_cache_tag(self):
+        # The optimization level of the interpreter (e.g. -O) also affects the compiled code.
+        return "contracts{0}{1}".format(self.mode, sys.flags.optimize or "")
+
+
+def _get_cache_header(source_mtime, source_size):
+    # Besides the source file, the header identifies what the rewritten code was generated from: the version of the
+    # library, the conditions, exceptions and messages of the inlined checks, and the names of the contracts, decorators
+    # and assertions that are removed in strip mode, which can change without the version in a development checkout.
+    from . import __version__
+    generated_from = (__version__, sorted(contract._INLINE_CHECKS.items()), sorted(contract._ARRAY_CHECKS),
+                      sorted(contract._checks), sorted(contract._iterator_checks), sorted(_DECORATORS),
+                      sorted(_ASSERTIONS))
+    digest = hashlib.sha256(repr(generated_from).encode("utf-8")).digest()
+    return importlib.util.MAGIC_NUMBER + digest[:8] + b"".join(
+        (int(value) & 0xFFFFFFFF).to_bytes(4, "little") for value in (_CACHE_VERSION, source_mtime, source_size))
+
+
+class _ContractsFinder(importlib.abc.MetaPathFinder):
+    """
+    Finder delegating to the standard path-based finder, but loading the modules of the configured packages with
+    :class:`_ContractsLoader`.
+    """
+
+    def __init__(self):
+        # Rewriting modes, keyed by package name.
+        self.modes = {}
+
+    def find_spec(self, fullname, path, target=None):
+        mode = self._get_mode(fullname)
+        if mode is None:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is None or not isinstance(spec.loader, importlib.machinery.SourceFileLoader):
+            return None
+        spec.loader = _ContractsLoader(fullname, spec.origin, mode)
+        return spec
+
+    def _get_mode(self, fullname):
+        # The most specific package wins.
+        name = fullname
+        while name:
+            if name in self.modes:
+                return self.modes[name]
+            name = name.rpartition(".")[0]
+        return None
+
+
+_finder = _ContractsFinder()
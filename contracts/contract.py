@@ -4,198 +4,2510 @@
 Module containing code contracts.
 """
 
-import re
-import traceback
-from collections import Iterable
+import array
+import collections
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import inspect
+import itertools
+import json
+import linecache
+import logging
+import math
+import operator
+import os
+import sys
+import time
+import types
+import typing
+import weakref
+from collections.abc import Iterable, Sized
+from . import _annotations, _callsite
 
-# Regex used to extract the name of the variable passed as the first parameter to the
-# contract function.
-_MATCH_FIRST_PARAMETER_REGEX = re.compile(r"\(([\w.]+)[,)]")
+#: Enforcement level under which no contract is checked.
+OFF = 0
+#: Enforcement level under which only the contracts running in constant time are checked. The comparison contracts
+#: (e.g. :func:`is_greater_than`) are checked as well, even though they compare NumPy arrays item by item.
+CHEAP = 1
+#: Enforcement level under which all contracts are checked.
+FULL = 2
 
+#: Inspection mode of :func:`typechecked` checking the first item of containers only.
+FIRST_ITEM = _annotations.FIRST_ITEM
+#: Inspection mode of :func:`typechecked` checking a sample of the items of containers.
+SAMPLED_ITEMS = _annotations.SAMPLED_ITEMS
+#: Inspection mode of :func:`typechecked` checking all items of containers.
+ALL_ITEMS = _annotations.ALL_ITEMS
 
+# Environment variable setting the initial enforcement level ('off', 'cheap' or 'full').
+_ENFORCEMENT_LEVEL_VARIABLE = "CONTRACTS_ENFORCEMENT_LEVEL"
+_ENFORCEMENT_LEVELS = {"off": OFF, "cheap": CHEAP, "full": FULL}
+
+# Name used in error messages when the expression passed as first parameter can't be resolved.
+_UNKNOWN_PARAMETER_NAME = "value"
+
+# Templates of the error messages. They're only formatted when the message of an exception is actually needed.
+_NOT_NONE_MESSAGE = "{name} was equal to None."
+_NOT_EMPTY_MESSAGE = "{name} was empty."
+_EQUAL_TO_ANY_MESSAGE = "{name} with value {value} and type {type} was not equal to any of the expected values."
+_TRUE_MESSAGE = "{name} was not True."
+_FALSE_MESSAGE = "{name} was not False."
+_EQUAL_MESSAGE = "{name} with value {value} was not equal to {expected}."
+_GREATER_THAN_MESSAGE = "{name} with value {value} was not greater than {expected}."
+_GREATER_THAN_OR_EQUAL_MESSAGE = "{name} with value {value} was not greater than or equal to {expected}."
+_ITEM_ATTRIBUTE_MESSAGE = "{name} contains an item of type {type} not having the expected attribute '{expected}'."
+_ATTRIBUTE_MESSAGE = "{name} with type {type} does not have the expected attribute '{expected}'."
+_ITEM_METHOD_MESSAGE = "{name} contains an item of type {type} not having the expected method '{expected}'."
+_INDEXED_ITEM_ATTRIBUTE_MESSAGE = ("{name} contains an item of type {type} at index {index} not having the expected "
+                                   "attribute '{expected}'.")
+_INDEXED_ITEM_METHOD_MESSAGE = ("{name} contains an item of type {type} at index {index} not having the expected "
+                                "method '{expected}'.")
+_METHOD_MESSAGE = "{name} with type {type} does not have the expected method '{expected}'."
+_CALLABLE_MESSAGE = "{name} with type {type} was not callable."
+_INSTANCE_MESSAGE = "{name} was not an instance of {classes}."
+_ANNOTATION_MESSAGE = "{name} with type {type} did not match the annotation {expected}."
+_ITEMS_EQUAL_MESSAGE = "{name} has {count} of {size} items not equal to {expected}: {items}."
+_ITEMS_GREATER_THAN_MESSAGE = "{name} has {count} of {size} items not greater than {expected}: {items}."
+_ITEMS_GREATER_THAN_OR_EQUAL_MESSAGE = ("{name} has {count} of {size} items not greater than or equal to {expected}: "
+                                        "{items}.")
+_ITEM_IN_RANGE_MESSAGE = ("{name} has an item with value {value} at index {index}, which is not between {expected[0]} "
+                          "and {expected[1]}.")
+_ITEM_NON_NEGATIVE_MESSAGE = "{name} has an item with value {value} at index {index}, which is negative."
+_SORTED_MESSAGE = "{name} was not sorted: its item with value {value} at index {index} is lower than {expected}."
+_ITEM_EQUAL_MESSAGE = "{name} has an item with value {value} at index {index}, which is not equal to {expected}."
+_ITEM_COUNT_MESSAGE = "{name} has {value} items instead of {expected}."
+_BUFFER_MESSAGE = "{name} with type {type} was not a one-dimensional or contiguous buffer."
+_BUFFER_FORMAT_MESSAGE = "{name} with type {type} was not a buffer of items in a native format."
+_BUFFER_NUMBER_MESSAGE = "{name} with type {type} was not a buffer of numbers."
+_SHAPE_MESSAGE = "{name} with shape {shape} can't be compared to {expected} with shape {expected_shape}."
+_FRAME_MESSAGE = "{name} with type {type} was not a pandas Series or DataFrame."
+_ITEMS_NOT_NULL_MESSAGE = "{name} has {count} of {size} null items: {items}."
+_ITEMS_EQUAL_TO_ANY_MESSAGE = ("{name} has {count} of {size} items not equal to any of the expected values: "
+                               "{items}.")
+_ITEMS_UNIQUE_MESSAGE = "{name} has {count} of {size} duplicated items: {items}."
+_ROWS_UNIQUE_MESSAGE = "{name} has {count} of {size} duplicated rows: {items}."
+_DTYPE_MESSAGE = "{name} with dtype {value} was not of dtype {expected}."
+_DTYPES_MESSAGE = "{name} has columns with unexpected dtypes: {items}."
+
+# Types of the class attributes that are always retrieved successfully from instances, and whose values are callable.
+_SAFE_DESCRIPTOR_TYPES = frozenset((types.FunctionType, types.BuiltinFunctionType, types.MethodDescriptorType,
+                                    types.WrapperDescriptorType, types.ClassMethodDescriptorType, classmethod,
+                                    staticmethod))
+
+# Implementations of __getattribute__ known to look attributes up in the class of an instance, then in its dictionary.
+# Other ones (e.g. the one of weakref proxies) may find attributes anywhere.
+_GENERIC_TYPES = (object, int, bool, float, complex, str, bytes, bytearray, tuple, list, dict, set, frozenset)
+_GENERIC_GETATTRIBUTES = frozenset(cls.__getattribute__ for cls in _GENERIC_TYPES)
+
+# Marker of a missing value, or of a result that hasn't been computed yet.
+_UNDECIDED = object()
+
+# Sequences of expected values checked by is_equal_to_any, along with their index (a dictionary of the position of each
+# hashable value), keyed by identifier. A sequence is only indexed the second time it's seen, and its index is None
+# until then. Lists and tuples can't be referenced weakly, so the sequences are kept alive by this cache, which is
+# cleared when full: at most _MAX_SEQUENCE_INDEXES sequences, and their indexes, are kept in memory.
+_sequence_indexes = {}
+_MAX_SEQUENCE_INDEXES = 256
+_INDEXED_SEQUENCE_TYPES = frozenset((list, tuple))
+_MIN_INDEXED_SEQUENCE_LENGTH = 16
+
+# Functions generated by aiter_checked to check items, keyed by contracts. They're generated again whenever the
+# enforcement configuration changes.
+_item_checkers = {}
+_MAX_ITEM_CHECKERS = 256
+
+# Maximum number of items of a buffer checked at once.
+_BUFFER_CHUNK_SIZE = 65536
+
+# Formats of the buffer items that memoryview can read: the native struct codes, optionally prefixed with '@'. Other
+# formats (e.g. '>i' for big-endian integers, or '<i' for ctypes arrays) can't be read item by item.
+_NATIVE_BUFFER_FORMATS = frozenset(prefix + code for prefix in ("", "@") for code in "cbB?hHiIlLqQnNfdP")
+
+# Native formats of the buffer items that are numbers (i.e. all but 'c', whose items are bytes), and of those that are
+# floats, which may be NaN.
+_NUMBER_BUFFER_FORMATS = frozenset(buffer_format for buffer_format in _NATIVE_BUFFER_FORMATS
+                                   if not buffer_format.endswith("c"))
+_FLOAT_BUFFER_FORMATS = frozenset(prefix + code for prefix in ("", "@") for code in "fd")
+
+# Types of the values compared directly, without checking whether they're NumPy arrays first.
+_PLAIN_TYPES = frozenset((int, float, bool, str, bytes))
+
+# Types known to be sized, which spares the slower check against the Sized abstract base class.
+_SIZED_TYPES = frozenset((str, bytes, bytearray, list, tuple, dict, set, frozenset))
+
+
+# Failure conditions of the checks that code generators (e.g. :mod:`contracts.compiler`) inline as plain if/raise
+# statements, keyed by check name. Each condition is a Python expression of the checked value and the expected value,
+# followed by the name of the exception to raise and the template of its message.
+_INLINE_CHECKS = {
+    "is_not_none": ("{value} is None", "ContractTypeError", _NOT_NONE_MESSAGE),
+    "is_true": ("{value} is not True", "ContractValueError", _TRUE_MESSAGE),
+    "is_false": ("{value} is not False", "ContractValueError", _FALSE_MESSAGE),
+    "is_equal": ("{value} != {expected}", "ContractValueError", _EQUAL_MESSAGE),
+    "is_greater_than": ("{value} <= {expected}", "ContractValueError", _GREATER_THAN_MESSAGE),
+    "is_greater_than_or_equal": ("{value} < {expected}", "ContractValueError", _GREATER_THAN_OR_EQUAL_MESSAGE),
+    "is_instance": ("not isinstance({value}, {expected})", "ContractTypeError", _INSTANCE_MESSAGE),
+}
+
+# Inlined checks whose condition can't be evaluated on NumPy arrays, since comparing an array returns another array.
+# The check is called instead when evaluating its condition fails.
+_ARRAY_CHECKS = frozenset(("is_equal", "is_greater_than", "is_greater_than_or_equal"))
+
+
+class ContractViolation(Exception):
+    """
+    Base class of the exceptions raised when a contract is violated.
+
+    To keep failing contracts cheap when violations are caught and never displayed, the exception only captures the
+    checked value, the expected value and the call site of the contract. The parameter name and the error message are
+    resolved the first time the exception is converted to a string.
+
+    Each concrete exception also derives from the built-in exception documented for the contract (:class:`TypeError`,
+    :class:`ValueError` or :class:`AttributeError`).
+    """
+    __slots__ = ()
+
+    def __init__(self, message_template, value, expected_value, call_site, parameter_name=None):
+        """
+        :param message_template: the template of the error message, with the '{name}', '{value}', '{type}' (the name
+                                 of the value's type), '{expected}' and '{classes}' (the names of the expected classes,
+                                 if the expected value is a class, a tuple of classes or a union) fields.
+        :param value: the checked value.
+        :param expected_value: the expected value.
+        :param call_site: a (code, offset, globals) tuple identifying the call to the contract, used to resolve the
+                          parameter name.
+        :param parameter_name: (optional) the name of the parameter, if already known.
+        """
+        self._message_template = message_template
+        self.value = value
+        self.expected_value = expected_value
+        self._call_site = call_site
+        self._parameter_name = parameter_name
+        self._message = None
+
+    @property
+    def parameter_name(self):
+        """
+        The name of the checked parameter, or the expression passed to the contract.
+        """
+        if self._parameter_name is None:
+            self._parameter_name = _get_parameter_name(self._call_site)
+        return self._parameter_name
+
+    @property
+    def args(self):
+        return str(self),
+
+    def __str__(self):
+        if self._message is None:
+            classes = _format_classes(self.expected_value) if "{classes}" in self._message_template else None
+            self._message = self._message_template.format(name=self.parameter_name, value=self.value,
+                                                          type=type(self.value).__name__, expected=self.expected_value,
+                                                          classes=classes)
+        return self._message
+
+    def __repr__(self):
+        return "{0}({1!r})".format(type(self).__name__, str(self))
+
+    def __reduce__(self):
+        # The call site holds a code object and the globals of a module, which can't be pickled (e.g. to be sent back
+        # from another process): the parameter name and the message are resolved beforehand instead.
+        return type(self), (self._message_template, self.value, self.expected_value, None, self.parameter_name), \
+            {"_message": str(self)}
+
+
+# Attributes of the concrete exceptions. They can't be declared in the base class, since the layout of
+# AttributeError differs from the one of the other built-in exceptions.
+_VIOLATION_SLOTS = ("_message_template", "value", "expected_value", "_call_site", "_parameter_name", "_message")
+
+
+class ContractTypeError(ContractViolation, TypeError):
+    """
+    Raised when a contract checking the type or the identity of a value is violated.
+    """
+    __slots__ = _VIOLATION_SLOTS
+
+
+class ContractValueError(ContractViolation, ValueError):
+    """
+    Raised when a contract checking the value itself is violated.
+    """
+    __slots__ = _VIOLATION_SLOTS
+
+
+class ContractAttributeError(ContractViolation, AttributeError):
+    """
+    Raised when a contract checking the attributes or methods of a value is violated.
+    """
+    __slots__ = _VIOLATION_SLOTS
+
+
+class ContractViolations(ContractViolation):
+    """
+    Raised by the functions created with :func:`all_of` when some of their contracts are violated, so that all of them
+    are reported at once.
+
+    The individual exceptions are available in the 'violations' attribute, in the order of their contracts. The error
+    message lists all of their messages.
+    """
+    __slots__ = ("violations", "_message")
+
+    def __init__(self, violations):
+        """
+        :param violations: a list of :class:`ContractViolation` exceptions.
+        """
+        self.violations = violations
+        self._message = None
+
+    @property
+    def parameter_name(self):
+        """
+        The names of the checked parameters, or the expressions passed to the contracts, separated by commas.
+        """
+        return ", ".join(violation.parameter_name for violation in self.violations)
+
+    def __str__(self):
+        if self._message is None:
+            self._message = "{0} contract{1} violated:{2}".format(
+                len(self.violations), " was" if len(self.violations) == 1 else "s were",
+                "".join("\n- " + str(violation) for violation in self.violations))
+        return self._message
+
+    def __reduce__(self):
+        return type(self), (self.violations,)
+
+
+# Implementations of the public check functions, along with the minimum enforcement level under which they're checked,
+# keyed by name. The public names are rebound whenever the enforcement configuration changes.
+_checks = {}
+
+# Minimum enforcement levels of the public functions wrapping an iterable with a check, keyed by name. They're called
+# once per iterable rather than once per item, so they read the enforcement level themselves and are never rebound.
+_iterator_checks = {}
+
+# Identifiers of the code objects of the functions standing between the caller and a check (e.g. enforcement
+# dispatchers), whose frames are skipped when capturing the call site of a contract. Code objects are hashed by value,
+# which is too slow for the hot path, but these ones belong to the factories of this module and are never freed.
+_internal_code_ids = set()
+
+# Functions created by all_of, which are generated again whenever the enforcement configuration changes.
+_all_of_functions = weakref.WeakSet()
+
+# Wrappers generated by the decorators (e.g. requires), which are generated again whenever the enforcement configuration
+# changes.
+_decorated_functions = weakref.WeakSet()
+
+_enforcement_level = FULL
+_context_enforcement_level = contextvars.ContextVar("contracts_enforcement_level")
+_has_context_overrides = False
+
+# Factories of the wrappers installed around the implementations of the checks (e.g. to sample them), keyed by name.
+# Each factory takes the name and the function of a check, and returns the function to call instead, or the same
+# function if the check isn't affected. They're applied in the order of _LAYER_ORDER, innermost first.
+_layers = {}
+_LAYER_ORDER = ("memoization", "shadow", "sampling", "metrics")
+
+# Number of consecutive passing checks after which adaptive sampling halves the rate of a call site.
+_ADAPTIVE_SAMPLING_PASSES = 1000
+
+#: Statistics of the memoization of checks, returned by :func:`get_memoization_info`.
+MemoizationInfo = collections.namedtuple("MemoizationInfo", ("hits", "misses", "max_size", "size"))
+
+# Arguments of the memoized checks that passed, in least recently used order, keyed by (check function, arguments,
+# types of the arguments). Immutable containers appear in keys by identifier, and the arguments are kept as values so
+# that the identifiers can't be reused while they're cached.
+_memoized_passes = collections.OrderedDict()
+_memoization_max_size = 0
+# Numbers of hits and misses of the memoized checks.
+_memoization_counts = [0, 0]
+
+# Types of the arguments of memoized checks compared by value.
+_IMMUTABLE_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes))
+
+# Verdicts of whether containers (e.g. tuples) only contain immutable values, along with the containers themselves so
+# that their identifiers can't be reused, keyed by identifier. It's cleared when it reaches its maximum size.
+_immutable_containers = {}
+_MAX_IMMUTABLE_CONTAINERS = 1024
+
+# Violations recorded in shadow mode, keyed by call site (code object identifier, instruction offset). Each record is a
+# [code, offset, check name, first violation, count, time of the last log] list. The ring holds the keys of the records
+# in insertion order, and a new call site overwrites the oldest one once it's full.
+_shadow_records = {}
+_shadow_ring = []
+_shadow_positions = itertools.count()
+# Minimum number of seconds between two warnings logged for the same call site, or None if they're not logged.
+_shadow_log_interval = None
+
+_logger = logging.getLogger(__name__)
+
+# Identifiers of the call sites whose metrics are collected, keyed by (code object identifier, instruction offset). The
+# identifiers index the (code, offset, check name) tuples of the call sites, and the arrays of their counters.
+_metrics_site_ids = {}
+_metrics_sites = []
+_metrics_calls = array.array("Q")
+_metrics_failures = array.array("Q")
+_metrics_nanoseconds = array.array("Q")
+
+# Metrics exported in the Prometheus text format: name, help and key of the exported call site dictionaries.
+_PROMETHEUS_METRICS = (
+    ("contracts_calls_total", "Number of calls to contract functions.", "calls"),
+    ("contracts_failures_total", "Number of violated contracts.", "failures"),
+    ("contracts_seconds_total", "Cumulative time spent in contract functions.", "seconds"),
+)
+
+# Maximum number of offending items described in the error messages of the contracts on arrays and pandas objects.
+_max_reported_items = 5
+
+
+def _check(level):
+    # Registers a public check function, checked under the specified enforcement level or above.
+    def register(function):
+        _checks[function.__name__] = (function, level)
+        return function
+
+    return register
+
+
+def _iterator_check(level):
+    # Registers a public function wrapping an iterable with a check, checked under the specified enforcement level or
+    # above.
+    def register(function):
+        _iterator_checks[function.__name__] = level
+        return function
+
+    return register
+
+
+def get_enforcement_level():
+    """
+    Returns the enforcement level of the current context.
+
+    :return: :data:`OFF`, :data:`CHEAP` or :data:`FULL`.
+    """
+    return _context_enforcement_level.get(_enforcement_level)
+
+
+def set_enforcement_level(level):
+    """
+    Sets the global enforcement level. The initial level is read from the CONTRACTS_ENFORCEMENT_LEVEL environment
+    variable ('off', 'cheap' or 'full'), and defaults to :data:`FULL`.
+
+    The check functions of this module are rebound accordingly: under :data:`OFF`, they're replaced by no-ops, so a
+    contract only costs a bare function call. Note that this only applies to calls made through the module (e.g.
+    'contract.is_not_none(a)'), not to functions imported directly.
+
+    :param level: :data:`OFF`, :data:`CHEAP` (only the contracts running in constant time are checked) or :data:`FULL`.
+    :raises: :class:`ValueError` if the level is unknown.
+    """
+    global _enforcement_level
+    if level not in _ENFORCEMENT_LEVELS.values():
+        raise ValueError("Unknown enforcement level {0}.".format(level))
+    _enforcement_level = level
+    _rebind()
+
+
+@contextlib.contextmanager
+def enforcement_level(level):
+    """
+    Context manager overriding the enforcement level for the current context only (e.g. a request), leaving other
+    threads and asyncio tasks unaffected.
+
+    Once an override has been used, every check reads the level of its context before running, which adds a small,
+    lock-free cost to each call.
+
+    :param level: :data:`OFF`, :data:`CHEAP` or :data:`FULL`.
+    :raises: :class:`ValueError` if the level is unknown.
+    """
+    global _has_context_overrides
+    if level not in _ENFORCEMENT_LEVELS.values():
+        raise ValueError("Unknown enforcement level {0}.".format(level))
+    if not _has_context_overrides:
+        _has_context_overrides = True
+        _rebind()
+
+    token = _context_enforcement_level.set(level)
+    try:
+        yield
+    finally:
+        _context_enforcement_level.reset(token)
+
+
+def set_sampling(rate, adaptive=False, checks=None):
+    """
+    Only checks contracts once every N calls, per call site (i.e. per line of code calling a contract), which bounds
+    the cost of contracts in hot loops. Sampling relies on a counter per call site, and is deterministic.
+
+    :param rate: N. 1 disables sampling.
+    :param adaptive: (optional) if True, call sites start being checked on every call, and N is only a maximum: the rate
+                     of a call site is halved every time it passes 1000 consecutive checks, and full checking is
+                     restored as soon as it fails.
+    :param checks: (optional) the check functions to sample (e.g. `[contract.is_not_none]`). By default, only the
+                   :data:`FULL` checks, which iterate over their input, are sampled: the bookkeeping of a call site
+                   costs a few hundred nanoseconds, which is more than what a :data:`CHEAP` check costs.
+    :raises: :class:`ValueError` if the rate is lower than 1.
+    """
+    if rate < 1:
+        raise ValueError("The sampling rate must be greater than or equal to 1, not {0}.".format(rate))
+    if checks is None:
+        names = {name for name, (_, level) in _checks.items() if level == FULL}
+    else:
+        names = {check.__name__ for check in checks}
+
+    def wrap(name, function):
+        return _make_sampler(function, rate, adaptive) if name in names else function
+
+    _set_layer("sampling", wrap if rate > 1 else None)
+
+
+def _make_sampler(function, rate, adaptive):
+    # Sampling state of each call site, keyed by (code object identifier, instruction offset): the number of calls to
+    # skip before the next check, the current rate and the number of consecutive passing checks.
+    states = {}
+    initial_rate = 1 if adaptive else rate
+
+    get_frame = sys._getframe
+
+    @functools.wraps(function)
+    def sampler(*args, **kwargs):
+        frame = get_frame(1)
+        if id(frame.f_code) in _internal_code_ids:
+            frame = _skip_internal_frames(frame)
+        call_site = (id(frame.f_code), frame.f_lasti)
+        state = states.get(call_site)
+        if state is None:
+            state = states[call_site] = [0, initial_rate, 0]
+        elif state[0]:
+            state[0] -= 1
+            return None
+
+        state[0] = state[1] - 1
+        if not adaptive:
+            return function(*args, **kwargs)
+
+        try:
+            function(*args, **kwargs)
+        except ContractViolation:
+            state[:] = [0, 1, 0]
+            raise
+        state[2] += 1
+        if state[2] >= _ADAPTIVE_SAMPLING_PASSES and state[1] < rate:
+            state[1] = min(state[1] * 2, rate)
+            state[2] = 0
+
+    _internal_code_ids.add(id(sampler.__code__))
+    return sampler
+
+
+def set_memoization(max_size, checks=None):
+    """
+    Caches the checks that passed, so that checking the same arguments again (e.g. a value that is checked with
+    :func:`is_equal_to_any` on every request) costs a dictionary lookup. Only checks whose arguments are immutable are
+    cached: None, booleans, numbers, strings, bytes, and tuples, frozensets and frozen dataclasses containing only such
+    values. Other arguments are always checked, so cached verdicts can't become stale. Violations are never cached.
+
+    The cache is a least recently used (LRU) cache shared by all memoized checks, whose statistics are returned by
+    :func:`get_memoization_info`. Calling this function clears it.
+
+    :param max_size: the maximum number of cached checks. 0 disables memoization.
+    :param checks: (optional) the check functions to memoize (e.g. `[contract.is_equal_to_any]`). By default, only the
+                   :data:`FULL` checks, which iterate over their input, are memoized: looking up a cached check costs
+                   more than a :data:`CHEAP` check.
+    :raises: :class:`ValueError` if the maximum size is lower than 0.
+    """
+    global _memoization_max_size
+    if max_size < 0:
+        raise ValueError("The maximum size of the memoization cache must be greater than or equal to 0, not "
+                         "{0}.".format(max_size))
+    if checks is None:
+        names = {name for name, (_, level) in _checks.items() if level == FULL}
+    else:
+        names = {check.__name__ for check in checks}
+    _memoized_passes.clear()
+    _memoization_counts[:] = [0, 0]
+    _memoization_max_size = max_size
+
+    def wrap(name, function):
+        return _make_memoizer(function) if name in names else function
+
+    _set_layer("memoization", wrap if max_size else None)
+
+
+def get_memoization_info():
+    """
+    Returns the statistics of the memoization of checks (see :func:`set_memoization`).
+
+    :return: a :class:`MemoizationInfo` named tuple, containing the numbers of hits and misses since memoization was
+             last set, the maximum size of the cache and its current size.
+    """
+    return MemoizationInfo(_memoization_counts[0], _memoization_counts[1], _memoization_max_size,
+                           len(_memoized_passes))
+
+
+def _make_memoizer(function):
+    @functools.wraps(function)
+    def memoizer(*args, **kwargs):
+        key = None if kwargs else _get_memoization_key(function, args)
+        if key is None:
+            return function(*args, **kwargs)
+
+        try:
+            _memoized_passes.move_to_end(key)
+        except KeyError:
+            _memoization_counts[1] += 1
+            function(*args)
+            _memoized_passes[key] = args
+            if len(_memoized_passes) > _memoization_max_size:
+                try:
+                    _memoized_passes.popitem(last=False)
+                except KeyError:
+                    pass
+        else:
+            _memoization_counts[0] += 1
+
+    _internal_code_ids.add(id(memoizer.__code__))
+    return memoizer
+
+
+def _get_memoization_key(function, args):
+    # Returns the key of a memoized check, or None if some of its arguments may be mutable. The types of the arguments
+    # are part of the key, since equal values of different types (e.g. 1 and True) may not pass the same checks.
+    # Most checks take one or two arguments, whose types are cheaper to get one by one.
+    if len(args) == 2:
+        types = type(args[0]), type(args[1])
+    elif len(args) == 1:
+        types = type(args[0]),
+    else:
+        types = tuple(map(type, args))
+    if _IMMUTABLE_TYPES.issuperset(types):
+        return function, args, types
+    values = list(args)
+    for index, cls in enumerate(types):
+        if cls not in _IMMUTABLE_TYPES:
+            if not _is_immutable_container(args[index]):
+                return None
+            values[index] = id(args[index])
+    return function, tuple(values), types
+
+
+def _is_immutable_container(value):
+    entry = _immutable_containers.get(id(value))
+    if entry is not None and entry[0] is value:
+        return entry[1]
+    cls = type(value)
+    if not ((issubclass(cls, (tuple, frozenset)) and cls.__dictoffset__ == 0) or _is_frozen_dataclass(cls)):
+        return False
+
+    immutable = _is_deeply_immutable(value)
+    if len(_immutable_containers) >= _MAX_IMMUTABLE_CONTAINERS:
+        _immutable_containers.clear()
+    _immutable_containers[id(value)] = (value, immutable)
+    return immutable
+
+
+def _is_deeply_immutable(value):
+    cls = type(value)
+    if cls in _IMMUTABLE_TYPES:
+        return True
+    if issubclass(cls, (tuple, frozenset)) and cls.__dictoffset__ == 0:
+        return all(_is_deeply_immutable(item) for item in value)
+    if _is_frozen_dataclass(cls):
+        return all(_is_deeply_immutable(getattr(value, field.name)) for field in dataclasses.fields(value))
+    return False
+
+
+def _is_frozen_dataclass(cls):
+    parameters = getattr(cls, "__dataclass_params__", None)
+    return parameters is not None and parameters.frozen
+
+
+def set_shadow_mode(enabled, capacity=256, checks=None, log_interval=60.0):
+    """
+    In shadow mode, failing checks don't raise: their violations are recorded instead, so that new contracts can be
+    observed in production without failing requests. Violations are deduplicated and counted by call site (i.e. line of
+    code calling a contract), and only the first violation of each call site is kept. Their messages are only formatted
+    when they're drained with :func:`drain_shadow_violations`.
+
+    Only the public check functions are affected: the wrappers generated by :func:`requires`, :func:`ensures`,
+    :func:`typechecked` and :func:`all_of`, as well as the iterators returned by the iter_* functions, still raise.
+    Calling this function clears the recorded violations.
+
+    :param enabled: True to enable shadow mode, False to disable it.
+    :param capacity: (optional) the maximum number of call sites recorded. Once it's reached, the violations of a new
+                     call site replace those of the oldest one, so memory use stays bounded.
+    :param checks: (optional) the check functions to shadow (e.g. `[contract.is_not_none]`). By default, all of them
+                   are.
+    :param log_interval: (optional) the minimum number of seconds between two warnings logged (with the
+                         'contracts.contract' logger) for the same call site, or None not to log violations. Warnings
+                         only mention the check and the location of the call site.
+    :raises: :class:`ValueError` if the capacity is lower than 1.
+    """
+    global _shadow_records, _shadow_log_interval
+    if capacity < 1:
+        raise ValueError("The capacity of the shadow mode must be greater than or equal to 1, not {0}.".format(
+            capacity))
+    names = set(_checks) if checks is None else {check.__name__ for check in checks}
+    _shadow_records = {}
+    _shadow_ring[:] = [None] * capacity
+    _shadow_log_interval = log_interval
+
+    def wrap(name, function):
+        return _make_shadow(name, function) if name in names else function
+
+    _set_layer("shadow", wrap if enabled else None)
+
+
+def drain_shadow_violations():
+    """
+    Returns the violations recorded in shadow mode (see :func:`set_shadow_mode`), and forgets them.
+
+    :return: a list of dictionaries, one per call site in the order in which they first failed, with the following
+             keys: 'file', 'line' and 'function' (the location of the call site), 'check' (the name of the check
+             function), 'type' (the name of the exception class), 'message' (the message of the first violation) and
+             'count' (the number of violations).
+    """
+    global _shadow_records
+    records, _shadow_records = _shadow_records, {}
+    _shadow_ring[:] = [None] * len(_shadow_ring)
+    return [{"file": code.co_filename, "line": _callsite.line_number(code, offset), "function": code.co_name,
+             "check": name, "type": type(violation).__name__, "message": str(violation), "count": count}
+            for code, offset, name, violation, count, _ in records.values()]
+
+
+def drain_shadow_violations_as_json(indent=None):
+    """
+    Returns the violations recorded in shadow mode as a JSON array, like :func:`drain_shadow_violations`.
+
+    :param indent: (optional) the indentation of the JSON array, as in :func:`json.dumps`.
+    :return: the JSON string.
+    """
+    return json.dumps(drain_shadow_violations(), indent=indent)
+
+
+def _make_shadow(name, function):
+    @functools.wraps(function)
+    def shadow(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except ContractViolation as violation:
+            _record_shadow_violation(name, violation, sys._getframe(1))
+
+    _internal_code_ids.add(id(shadow.__code__))
+    return shadow
+
+
+def _record_shadow_violation(name, violation, frame):
+    # Recording a violation doesn't take any lock: under contention, a count may be missed, but the records stay
+    # consistent. The record keeps the code object alive, so that its identifier can't be reused.
+    frame = _skip_internal_frames(frame)
+    key = (id(frame.f_code), frame.f_lasti)
+    record = _shadow_records.get(key)
+    if record is None:
+        # The traceback references the frames of the check, along with their local variables.
+        violation.__traceback__ = None
+        record = _shadow_records[key] = [frame.f_code, frame.f_lasti, name, violation, 0, None]
+        position = next(_shadow_positions) % len(_shadow_ring)
+        evicted_key = _shadow_ring[position]
+        if evicted_key is not None:
+            _shadow_records.pop(evicted_key, None)
+        _shadow_ring[position] = key
+    record[4] += 1
+
+    if _shadow_log_interval is not None:
+        now = time.monotonic()
+        if record[5] is None or now - record[5] >= _shadow_log_interval:
+            record[5] = now
+            _logger.warning("Contract %s was violated at %s:%d (%d time(s) so far).", name, record[0].co_filename,
+                            _callsite.line_number(record[0], record[1]), record[4])
+
+
+def set_metrics(enabled, checks=None):
+    """
+    Collects the number of calls, the number of failures and the cumulative time of the checks, per call site (i.e.
+    line of code calling a contract). The metrics are exported with :func:`get_metrics`,
+    :func:`get_metrics_as_json` and :func:`get_metrics_as_prometheus`.
+
+    When metrics are disabled, the check functions aren't wrapped at all, so they cost nothing. When they're enabled,
+    counters are updated without any lock: under contention, a few calls may not be counted. Calling this function
+    resets them.
+
+    :param enabled: True to collect metrics, False to stop collecting them.
+    :param checks: (optional) the check functions to measure (e.g. `[contract.is_not_none]`). By default, all of them
+                   are.
+    """
+    names = set(_checks) if checks is None else {check.__name__ for check in checks}
+    _metrics_site_ids.clear()
+    del _metrics_sites[:], _metrics_calls[:], _metrics_failures[:], _metrics_nanoseconds[:]
+
+    def wrap(name, function):
+        return _make_meter(name, function) if name in names else function
+
+    _set_layer("metrics", wrap if enabled else None)
+
+
+def get_metrics():
+    """
+    Returns the metrics collected since they were enabled (see :func:`set_metrics`).
+
+    :return: a list of dictionaries, one per call site in the order in which they were first called, with the following
+             keys: 'file', 'line' and 'function' (the location of the call site), 'check' (the name of the check
+             function), 'calls', 'failures' and 'seconds' (the cumulative time spent in the check).
+    """
+    return [{"file": code.co_filename, "line": _callsite.line_number(code, offset), "function": code.co_name,
+             "check": name, "calls": calls, "failures": failures, "seconds": nanoseconds / 1e9}
+            for (code, offset, name), calls, failures, nanoseconds in zip(list(_metrics_sites), _metrics_calls,
+                                                                          _metrics_failures, _metrics_nanoseconds)]
+
+
+def get_metrics_as_json(indent=None):
+    """
+    Returns the metrics collected since they were enabled as a JSON array, like :func:`get_metrics`.
+
+    :param indent: (optional) the indentation of the JSON array, as in :func:`json.dumps`.
+    :return: the JSON string.
+    """
+    return json.dumps(get_metrics(), indent=indent)
+
+
+def get_metrics_as_prometheus():
+    """
+    Returns the metrics collected since they were enabled in the Prometheus text exposition format, e.g. to be served
+    by a metrics endpoint. Call sites are identified by the 'file', 'line', 'function' and 'check' labels.
+
+    :return: the metrics, as a string.
+    """
+    sites = get_metrics()
+    lines = []
+    for metric_name, description, key in _PROMETHEUS_METRICS:
+        lines.append("# HELP {0} {1}".format(metric_name, description))
+        lines.append("# TYPE {0} counter".format(metric_name))
+        for site in sites:
+            labels = ",".join('{0}="{1}"'.format(label, _escape_prometheus_label(site[label]))
+                              for label in ("file", "line", "function", "check"))
+            lines.append("{0}{{{1}}} {2}".format(metric_name, labels, site[key]))
+    return "\n".join(lines) + "\n"
+
+
+def _escape_prometheus_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _make_meter(name, function):
+    # The state is bound to local names, since the arrays are cleared in place and never replaced.
+    get_frame = sys._getframe
+    get_time = time.perf_counter_ns
+    internal_code_ids = _internal_code_ids
+    site_ids = _metrics_site_ids
+    calls = _metrics_calls
+    nanoseconds = _metrics_nanoseconds
+
+    @functools.wraps(function)
+    def meter(*args, **kwargs):
+        frame = get_frame(1)
+        code = frame.f_code
+        if id(code) in internal_code_ids:
+            frame = _skip_internal_frames(frame)
+            code = frame.f_code
+        site_id = site_ids.get((id(code), frame.f_lasti))
+        if site_id is None:
+            site_id = _add_metrics_site(code, frame.f_lasti, name)
+
+        start = get_time()
+        try:
+            return function(*args, **kwargs)
+        except ContractViolation:
+            _metrics_failures[site_id] += 1
+            raise
+        finally:
+            nanoseconds[site_id] += get_time() - start
+            calls[site_id] += 1
+
+    _internal_code_ids.add(id(meter.__code__))
+    return meter
+
+
+def _add_metrics_site(code, offset, name):
+    # The counters are appended before the identifier is published, so that they exist once it's visible. The code
+    # object is kept alive, so that its identifier can't be reused.
+    site_id = len(_metrics_sites)
+    _metrics_sites.append((code, offset, name))
+    _metrics_calls.append(0)
+    _metrics_failures.append(0)
+    _metrics_nanoseconds.append(0)
+    _metrics_site_ids[(id(code), offset)] = site_id
+    return site_id
+
+
+def _set_layer(name, factory):
+    if factory is None:
+        _layers.pop(name, None)
+    else:
+        _layers[name] = factory
+    _rebind()
+
+
+def _rebind():
+    module_globals = globals()
+    _item_checkers.clear()
+    for name, (function, level) in _checks.items():
+        for layer in _LAYER_ORDER:
+            if layer in _layers:
+                function = _layers[layer](name, function)
+
+        if _has_context_overrides:
+            module_globals[name] = _make_dispatcher(function, level)
+        elif _enforcement_level >= level:
+            module_globals[name] = function
+        else:
+            module_globals[name] = _make_no_op(function)
+
+    for function in list(_all_of_functions):
+        _generate_all_of(function._contracts_conditions, function)
+    for wrapper in list(_decorated_functions):
+        _generate_wrapper(*wrapper._contracts_conditions, wrapper)
+
+
+def _make_dispatcher(function, level):
+    @functools.wraps(function)
+    def dispatcher(*args, **kwargs):
+        if _context_enforcement_level.get(_enforcement_level) >= level:
+            return function(*args, **kwargs)
+
+    _internal_code_ids.add(id(dispatcher.__code__))
+    return dispatcher
+
+
+def _make_no_op(function):
+    @functools.wraps(function)
+    def no_op(*args, **kwargs):
+        pass
+
+    return no_op
+
+
+def set_max_reported_items(count):
+    """
+    Sets the maximum number of offending items (e.g. the items of a NumPy array or the rows of a pandas DataFrame)
+    described in error messages. All offending items are still counted.
+
+    :param count: the maximum number of items. The default is 5.
+    :raises: :class:`ValueError` if the count is lower than 1.
+    """
+    global _max_reported_items
+    if count < 1:
+        raise ValueError("The maximum number of reported items must be greater than or equal to 1, not {0}.".format(
+            count))
+    _max_reported_items = count
+
+
+def _enforcement_level_from_environment():
+    value = os.environ.get(_ENFORCEMENT_LEVEL_VARIABLE, "full")
+    try:
+        return _ENFORCEMENT_LEVELS[value.strip().lower()]
+    except KeyError:
+        raise ValueError("{0} must be one of {1}, not '{2}'.".format(_ENFORCEMENT_LEVEL_VARIABLE,
+                                                                   ", ".join(_ENFORCEMENT_LEVELS), value))
+
+
+def check_not_none(value):
+    """
+    Returns whether the specified value is not equal to None, like :func:`is_not_none` without raising.
+
+    :param value: the value to check.
+    :return: False if the value is equal to None, True otherwise.
+    """
+    return value is not None
+
+
+@_check(CHEAP)
 def is_not_none(value):
     """
-    Checks that the specified value is not equal to None.
+    Checks that the specified value is not equal to None.
+
+    :param value: the value to check.
+    :raises: :class:`ContractTypeError` if the value is equal to None.
+    """
+    if not check_not_none(value):
+        raise ContractTypeError(_NOT_NONE_MESSAGE, value, None, _get_call_site())
+
+
+def check_not_empty(value):
+    """
+    Returns whether the specified value is not empty, like :func:`is_not_empty` without raising.
+
+    :param value: the value to check.
+    :return: False if the value is considered empty, True otherwise.
+    """
+    if value is None:
+        return False
+    if type(value) in _SIZED_TYPES:
+        return len(value) != 0
+    if _is_frame(value):
+        return not value.empty
+    return not (isinstance(value, Sized) and len(value) == 0)
+
+
+@_check(CHEAP)
+def is_not_empty(value):
+    """
+    Checks that the specified value is not empty.
+
+    :param value: the value to check. To be considered empty, it must be equal to None, or equal to "" if it's a string.
+                  If it's a :class:`~collections.abc.Sized` object (e.g. a list), its length must be equal to 0. Any
+                  other object type, including iterators and generators, will never be considered empty: use
+                  :func:`iter_not_empty` to check those. A pandas Series or DataFrame is empty if it has no items,
+                  even if it has rows or columns.
+    :raises: :class:`ContractValueError` if the value is considered empty.
+    """
+    if not check_not_empty(value):
+        raise ContractValueError(_NOT_EMPTY_MESSAGE, value, None, _get_call_site())
+
+
+def check_equal_to_any(value, expected_values):
+    """
+    Returns whether the specified value is equal to at least one of the expected values, like :func:`is_equal_to_any`
+    without raising.
+
+    :param value: the value to check.
+    :param expected_values: an :class:`~collections.abc.Iterable` object containing the expected values.
+    :return: True if the value is equal to one of the expected values, False otherwise.
+    """
+    if type(expected_values) in _INDEXED_SEQUENCE_TYPES and len(expected_values) >= _MIN_INDEXED_SEQUENCE_LENGTH:
+        return _is_in_sequence(value, expected_values)
+    return value in expected_values
+
+
+@_check(FULL)
+def is_equal_to_any(value, expected_values, expression_str=None):
+    """
+    Checks that the specified value is equal to at least one of the expected values.
+
+    A list or a tuple of at least 16 expected values is indexed the second time it's checked, so that hashable values
+    are then found in constant time. Up to 256 of these sequences are kept in memory along with their index, even if
+    nothing else refers to them anymore. To check values against the same large collection, prefer :func:`one_of`.
+
+    :param value: the value to check.
+    :param expected_values: an :class:`~collections.abc.Iterable` object containing the expected values.
+    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'b > c').
+    :raises: :class:`ContractValueError` if the value is not equal to any of the expected values.
+    """
+    if not check_equal_to_any(value, expected_values):
+        raise ContractValueError(_EQUAL_TO_ANY_MESSAGE, value, expected_values, _get_call_site(), expression_str)
+
+
+def one_of(expected_values):
+    """
+    Creates a contract checking that a value is equal to at least one of the expected values, like
+    :func:`is_equal_to_any`. The expected values are indexed once, so the contract runs in constant time for hashable
+    values, and is checked under the :data:`CHEAP` enforcement level or above.
+
+    Example: `is_valid_code = contract.one_of(VALID_CODES)`, then `is_valid_code(code)`.
+
+    :param expected_values: an :class:`~collections.abc.Iterable` object containing the expected values. It's copied, so
+                            later changes aren't taken into account.
+    :return: a function taking the value to check and an optional expression string (like :func:`is_equal_to_any`),
+             and raising :class:`ContractValueError` if the value is not equal to any of the expected values.
+    """
+    expected_values = tuple(expected_values)
+    hashable_values = set()
+    unhashable_values = []
+    for expected_value in expected_values:
+        try:
+            hashable_values.add(expected_value)
+        except TypeError:
+            unhashable_values.append(expected_value)
+    hashable_values = frozenset(hashable_values)
+
+    def is_one_of(value, expression_str=None):
+        if _context_enforcement_level.get(_enforcement_level) < CHEAP:
+            return
+        try:
+            found = value in hashable_values or (unhashable_values and value in unhashable_values)
+        except TypeError:
+            # Unhashable values may still be equal to hashable ones.
+            found = value in expected_values
+        if not found:
+            raise ContractValueError(_EQUAL_TO_ANY_MESSAGE, value, expected_values, _get_call_site(), expression_str)
+
+    return is_one_of
+
+
+def check_true(value):
+    """
+    Returns whether the specified value is equal to True, like :func:`is_true` without raising.
+
+    :param value: the value to check.
+    :return: True if the value is True, False otherwise.
+    """
+    return value is True
+
+
+@_check(CHEAP)
+def is_true(value, expression_str=None):
+    """
+    Checks that the specified value is equal to True.
+
+    :param value: the value to check. It can be a standard variable's value, or the result of an evaluated boolean
+                  expression (e.g. a or b > c).
+    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'b > c').
+    :raises: :class:`ContractValueError` if the value is not True.
+    """
+    if not check_true(value):
+        raise ContractValueError(_TRUE_MESSAGE, value, True, _get_call_site(), expression_str)
+
+
+def check_false(value):
+    """
+    Returns whether the specified value is equal to False, like :func:`is_false` without raising.
+
+    :param value: the value to check.
+    :return: True if the value is False, False otherwise.
+    """
+    return value is False
+
+
+@_check(CHEAP)
+def is_false(value, expression_str=None):
+    """
+    Checks that the specified value is equal to False.
+
+    :param value: the value to check. It can be a standard variable's value, or the result of an evaluated boolean
+                  expression (e.g. a or b > c).
+    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'b > c').
+    :raises: :class:`ContractValueError` if the value is not False.
+    """
+    if not check_false(value):
+        raise ContractValueError(_FALSE_MESSAGE, value, False, _get_call_site(), expression_str)
+
+
+def check_equal(value, expected_value):
+    """
+    Returns whether the specified value is strictly equal to the expected value, like :func:`is_equal` without
+    raising.
+
+    :param value: the value to check. If it's a NumPy array, each of its items is compared to the expected value.
+    :param expected_value: the expected value, or an array broadcastable to the shape of the value.
+    :return: True if the values are strictly equal, False otherwise.
+    """
+    if type(value) not in _PLAIN_TYPES and _is_array(value):
+        return not _has_array_violations(value, expected_value, "not_equal")
+    return not value != expected_value
+
+
+@_check(CHEAP)
+def is_equal(value, expected_value, expression_str=None):
+    """
+    Checks that the specified value is strictly equal to the expected value.
+
+    :param value: the value to check. If it's a NumPy array, each of its items is compared to the expected value.
+    :param expected_value: the expected value, or an array broadcastable to the shape of the value.
+    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'len(a) == 1').
+    :raises: :class:`ContractValueError` if the values are not strictly equal.
+    """
+    if not check_equal(value, expected_value):
+        message_template = _EQUAL_MESSAGE
+        if type(value) not in _PLAIN_TYPES and _is_array(value):
+            message_template = _get_array_violation_template(value, expected_value, "not_equal", _ITEMS_EQUAL_MESSAGE)
+        raise ContractValueError(message_template, value, expected_value, _get_call_site(), expression_str)
+
+
+def check_greater_than(value, expected_value):
+    """
+    Returns whether the specified value is greater than the expected value, like :func:`is_greater_than` without
+    raising.
+
+    :param value: the value to check. If it's a NumPy array, each of its items is compared to the expected value.
+    :param expected_value: the expected value, or an array broadcastable to the shape of the value.
+    :return: True if the value is greater than the expected value, False otherwise.
+    """
+    if type(value) not in _PLAIN_TYPES and _is_array(value):
+        return not _has_array_violations(value, expected_value, "less_equal")
+    return not value <= expected_value
+
+
+@_check(CHEAP)
+def is_greater_than(value, expected_value):
+    """
+    Checks that the specified value is greater than the expected value.
+
+    :param value: the value to check. If it's a NumPy array, each of its items is compared to the expected value.
+    :param expected_value: the expected value, or an array broadcastable to the shape of the value.
+    :raises: :class:`ContractValueError` if the value is not greater than the expected value.
+    """
+    if not check_greater_than(value, expected_value):
+        message_template = _GREATER_THAN_MESSAGE
+        if type(value) not in _PLAIN_TYPES and _is_array(value):
+            message_template = _get_array_violation_template(value, expected_value, "less_equal",
+                                                             _ITEMS_GREATER_THAN_MESSAGE)
+        raise ContractValueError(message_template, value, expected_value, _get_call_site())
+
+
+def check_greater_than_or_equal(value, expected_value):
+    """
+    Returns whether the specified value is greater than or strictly equal to the expected value, like
+    :func:`is_greater_than_or_equal` without raising.
+
+    :param value: the value to check. If it's a NumPy array, each of its items is compared to the expected value.
+    :param expected_value: the expected value, or an array broadcastable to the shape of the value.
+    :return: True if the value is greater than or strictly equal to the expected value, False otherwise.
+    """
+    if type(value) not in _PLAIN_TYPES and _is_array(value):
+        return not _has_array_violations(value, expected_value, "less")
+    return not value < expected_value
+
+
+@_check(CHEAP)
+def is_greater_than_or_equal(value, expected_value):
+    """
+    Checks that the specified value is greater than or strictly equal to the expected value.
+
+    :param value: the value to check. If it's a NumPy array, each of its items is compared to the expected value.
+    :param expected_value: the expected value, or an array broadcastable to the shape of the value.
+    :raises: :class:`ContractValueError` if the value is not greater than or strictly equal to the expected value.
+    """
+    if not check_greater_than_or_equal(value, expected_value):
+        message_template = _GREATER_THAN_OR_EQUAL_MESSAGE
+        if type(value) not in _PLAIN_TYPES and _is_array(value):
+            message_template = _get_array_violation_template(value, expected_value, "less",
+                                                             _ITEMS_GREATER_THAN_OR_EQUAL_MESSAGE)
+        raise ContractValueError(message_template, value, expected_value, _get_call_site())
+
+
+def check_all_have_attribute(value, attribute_name):
+    """
+    Returns whether all objects contained in value - be it a single object or an :class:`~collections.abc.Iterable` of
+    objects - have the specified attribute, like :func:`all_have_attribute` without raising.
+
+    :param value: the value to check. It can be a single object, or an an :class:`~collections.abc.Iterable` of objects.
+    :param attribute_name: a string containing the name of the attribute to look for.
+    :return: True if all objects have the attribute, False otherwise.
+    """
+    if isinstance(value, Iterable):
+        return _find_item_without_attribute(value, attribute_name) is _UNDECIDED
+    return hasattr(value, attribute_name)
+
+
+@_check(FULL)
+def all_have_attribute(value, attribute_name):
+    """
+    Checks that all objects contained in value - be it a single object or an :class:`~collections.abc.Iterable` of
+    objects - have the specified attribute.
+
+    Whenever the type of an object is enough to tell whether it has the attribute (e.g. for an attribute defined by the
+    class itself), the result is reused for all other objects of the same type.
+
+    :param value: the value to check. It can be a single object, or an an :class:`~collections.abc.Iterable` of objects.
+                  Iterators and generators are consumed: use :func:`iter_all_have_attribute` to check them lazily
+                  instead.
+    :param attribute_name: a string containing the name of the attribute to look for.
+    :raises: :class:`ContractAttributeError` if one of the objects does not contain the specified attribute.
+    """
+    if isinstance(value, Iterable):
+        item = _find_item_without_attribute(value, attribute_name)
+        if item is not _UNDECIDED:
+            raise ContractAttributeError(_ITEM_ATTRIBUTE_MESSAGE, item, attribute_name, _get_call_site())
+    elif not hasattr(value, attribute_name):
+        raise ContractAttributeError(_ATTRIBUTE_MESSAGE, value, attribute_name, _get_call_site())
+
+
+def check_all_have_method(value, method_name):
+    """
+    Returns whether all objects contained in value - be it a single object or an :class:`~collections.abc.Iterable` of
+    objects - have the specified method, like :func:`all_have_method` without raising.
+
+    :param value: the value to check. It can be a single object, or an an :class:`~collections.abc.Iterable` of objects.
+    :param method_name: a string containing the name of the method to look for.
+    :return: True if all objects have the method, False otherwise.
+    """
+    if isinstance(value, Iterable):
+        return _find_item_without_method(value, method_name) is _UNDECIDED
+    return _has_method(value, method_name)
+
+
+@_check(FULL)
+def all_have_method(value, method_name):
+    """
+    Checks that all objects contained in value - be it a single object or an :class:`~collections.abc.Iterable` of
+    objects - have the specified method.
+
+    Whenever the type of an object is enough to tell whether it has the method (e.g. for a method defined by the
+    class of an object without instance dictionary), the result is reused for all other objects of the same type.
+
+    :param value: the value to check. It can be a single object, or an an :class:`~collections.abc.Iterable` of objects.
+                  Iterators and generators are consumed: use :func:`iter_all_have_method` to check them lazily instead.
+    :param method_name: a string containing the name of the method to look for.
+    :raises: :class:`ContractAttributeError` if one of the objects does not contain the specified method.
+    """
+    if isinstance(value, Iterable):
+        item = _find_item_without_method(value, method_name)
+        if item is not _UNDECIDED:
+            raise ContractAttributeError(_ITEM_METHOD_MESSAGE, item, method_name, _get_call_site())
+    elif not _has_method(value, method_name):
+        raise ContractAttributeError(_METHOD_MESSAGE, value, method_name, _get_call_site())
+
+
+def check_callable(value):
+    """
+    Returns whether the specified value is a callable object, like :func:`is_callable` without raising.
+
+    :param value: the value to check.
+    :return: True if the value is a callable object, False otherwise.
+    """
+    return hasattr(value, '__call__')
+
+
+@_check(CHEAP)
+def is_callable(value):
+    """
+    Checks that the specified value is a callable object (i.e. has a '__call__' attribute).
+
+    :param value: the value to check.
+    :raises: :class:`ContractTypeError` if the value is not a callable object.
+    """
+    if not check_callable(value):
+        raise ContractTypeError(_CALLABLE_MESSAGE, value, None, _get_call_site())
+
+
+def check_instance(value, cls):
+    """
+    Returns whether the specified value is an instance of the given class, like :func:`is_instance` without raising.
+
+    :param value: the value to check.
+    :param cls: the expected class of the value.
+    :return: True if the value is an instance of the class, False otherwise.
+    """
+    return isinstance(value, cls)
+
+
+@_check(CHEAP)
+def is_instance(value, cls):
+    """
+    Checks that the specified value is an instance of the given class.
+
+    :param value: the value to check.
+    :param cls: the expected class of the value.
+    :raises: :class:`ContractTypeError` if the value is not an instance of the class.
+    """
+    if not check_instance(value, cls):
+        raise ContractTypeError(_INSTANCE_MESSAGE, value, cls, _get_call_site())
+
+
+def check_all_in_range(value, minimum, maximum):
+    """
+    Returns whether all items of a buffer are between the specified bounds, like :func:`all_in_range` without raising.
+
+    :param value: the value to check.
+    :param minimum: the minimum value of the items (inclusive).
+    :param maximum: the maximum value of the items (inclusive).
+    :return: True if the value is a one-dimensional or contiguous buffer whose items are all in bounds, False otherwise.
+    """
+    view = _as_flat_memoryview(value, _NUMBER_BUFFER_FORMATS)
+    return view is not None and _find_item_out_of_range(view, minimum, maximum) is None
+
+
+@_check(FULL)
+def all_in_range(value, minimum, maximum):
+    """
+    Checks that all items of a buffer (e.g. :class:`bytes`, :class:`array.array` or :class:`memoryview`) are between
+    the specified bounds. The buffer is read in place, without being copied.
+
+    :param value: the value to check. It must support the buffer protocol.
+    :param minimum: the minimum value of the items (inclusive).
+    :param maximum: the maximum value of the items (inclusive).
+    :raises: :class:`ContractValueError` if one of the items is out of bounds (NaN is never in bounds).
+    :raises: :class:`ContractTypeError` if the value is not a one-dimensional or contiguous buffer, or if its items
+             aren't numbers in a native format (e.g. big-endian integers, or characters).
+    """
+    view = _as_flat_memoryview(value, _NUMBER_BUFFER_FORMATS)
+    if view is None:
+        raise ContractTypeError(_get_buffer_message(value, _NUMBER_BUFFER_FORMATS), value, None, _get_call_site())
+    found = _find_item_out_of_range(view, minimum, maximum)
+    if found is not None:
+        raise ContractValueError(_at_index(_ITEM_IN_RANGE_MESSAGE, found[0]), found[1], (minimum, maximum),
+                                 _get_call_site())
+
+
+def check_all_non_negative(value):
+    """
+    Returns whether all items of a buffer are greater than or equal to 0, like :func:`all_non_negative` without
+    raising.
 
     :param value: the value to check.
-    :raises: :class:`TypeError` if the value is equal to None.
+    :return: True if the value is a one-dimensional or contiguous buffer without negative items, False otherwise.
     """
-    if value is None:
-        raise TypeError("{0} was equal to None.".format(_get_parameter_name()))
+    view = _as_flat_memoryview(value, _NUMBER_BUFFER_FORMATS)
+    return view is not None and _find_negative_item(view) is None
 
 
-def is_not_empty(value):
+@_check(FULL)
+def all_non_negative(value):
     """
-    Checks that the specified value is not empty.
+    Checks that all items of a buffer (e.g. :class:`bytes`, :class:`array.array` or :class:`memoryview`) are greater
+    than or equal to 0. The buffer is read in place, without being copied.
 
-    :param value: the value to check. To be considered empty, it must be equal to None, or equal to "" if it's a string.
-                  If it's an :class:`~collections.abc.Iterable` object, its length must be equal to 0. Any other object
-                  type will never be considered empty.
-    :raises: :class:`ValueError` if the value is considered empty.
+    :param value: the value to check. It must support the buffer protocol.
+    :raises: :class:`ContractValueError` if one of the items is negative.
+    :raises: :class:`ContractTypeError` if the value is not a one-dimensional or contiguous buffer, or if its items
+             aren't numbers in a native format (e.g. big-endian integers, or characters).
     """
-    if value is None or (type(value) is str and not value) or (isinstance(value, Iterable) and len(value) == 0):
-        raise ValueError("{0} was empty.".format(_get_parameter_name()))
+    view = _as_flat_memoryview(value, _NUMBER_BUFFER_FORMATS)
+    if view is None:
+        raise ContractTypeError(_get_buffer_message(value, _NUMBER_BUFFER_FORMATS), value, None, _get_call_site())
+    found = _find_negative_item(view)
+    if found is not None:
+        raise ContractValueError(_at_index(_ITEM_NON_NEGATIVE_MESSAGE, found[0]), found[1], 0, _get_call_site())
 
 
-def is_equal_to_any(value, expected_values, expression_str=None):
+def check_sorted(value):
     """
-    Checks that the specified value is equal to at least one of the expected values.
+    Returns whether the items of a buffer are sorted in ascending order, like :func:`is_sorted` without raising.
 
     :param value: the value to check.
-    :param expected_values: an :class:`~collections.abc.Iterable` object containing the expected values.
-    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'b > c').
-    :raises: :class:`ValueError` if the value is not equal to any of the expected values.
+    :return: True if the value is a one-dimensional or contiguous buffer whose items are sorted, False otherwise.
     """
-    if value not in expected_values:
-        raise ValueError(
-            "{0} with value {1} and type {2} was not equal to any of the expected values.".format(
-                expression_str if expression_str else _get_parameter_name(),
-                str(value),
-                type(value).__name__))
+    view = _as_flat_memoryview(value)
+    return view is not None and _find_unsorted_item(view) is None
 
 
-def is_true(value, expression_str=None):
+@_check(FULL)
+def is_sorted(value):
     """
-    Checks that the specified value is equal to True.
+    Checks that the items of a buffer (e.g. :class:`bytes`, :class:`array.array` or :class:`memoryview`) are sorted in
+    ascending order. The buffer is read in place, without being copied.
 
-    :param value: the value to check. It can be a standard variable's value, or the result of an evaluated boolean
-                  expression (e.g. a or b > c).
-    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'b > c').
-    :raises: :class:`TypeError` if the value is not True.
+    :param value: the value to check. It must support the buffer protocol.
+    :raises: :class:`ContractValueError` if one of the items is lower than the previous one.
+    :raises: :class:`ContractTypeError` if the value is not a one-dimensional or contiguous buffer, or if its items
+             aren't in a native format (e.g. big-endian integers).
     """
-    if value is not True:
-        raise ValueError("{0} was not True.".format(expression_str if expression_str else _get_parameter_name()))
+    view = _as_flat_memoryview(value)
+    if view is None:
+        raise ContractTypeError(_get_buffer_message(value), value, None, _get_call_site())
+    found = _find_unsorted_item(view)
+    if found is not None:
+        raise ContractValueError(_at_index(_SORTED_MESSAGE, found[0]), found[1], found[2], _get_call_site())
 
 
-def is_false(value, expression_str=None):
+def check_all_equal(value, expected_value):
     """
-    Checks that the specified value is equal to False.
+    Returns whether a buffer has the same items as the expected buffer, like :func:`all_equal` without raising.
 
-    :param value: the value to check. It can be a standard variable's value, or the result of an evaluated boolean
-                  expression (e.g. a or b > c).
-    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'b > c').
-    :raises: :class:`TypeError` if the value is not False.
+    :param value: the value to check.
+    :param expected_value: the expected value.
+    :return: True if both values are one-dimensional or contiguous buffers with the same items, False otherwise.
     """
-    if value is not False:
-        raise ValueError("{0} was not False.".format(expression_str if expression_str else _get_parameter_name()))
+    view = _as_flat_memoryview(value)
+    expected_view = _as_flat_memoryview(expected_value)
+    return view is not None and expected_view is not None and len(view) == len(expected_view) and \
+        _find_different_item(view, expected_view) is None
 
 
-def is_equal(value, expected_value, expression_str=None):
+@_check(FULL)
+def all_equal(value, expected_value):
     """
-    Checks that the specified value is strictly equal to the expected value.
+    Checks that a buffer (e.g. :class:`bytes`, :class:`array.array` or :class:`memoryview`) has the same items as the
+    expected buffer, whatever their formats. The buffers are read in place, without being copied.
+
+    :param value: the value to check. It must support the buffer protocol.
+    :param expected_value: the expected value. It must support the buffer protocol.
+    :raises: :class:`ContractValueError` if the buffers don't have the same number of items, or if one of the items
+             differs.
+    :raises: :class:`ContractTypeError` if one of the values is not a one-dimensional or contiguous buffer, or if its
+             items aren't in a native format (e.g. big-endian integers).
+    """
+    view = _as_flat_memoryview(value)
+    if view is None:
+        raise ContractTypeError(_get_buffer_message(value), value, None, _get_call_site())
+    expected_view = _as_flat_memoryview(expected_value)
+    if expected_view is None:
+        raise ContractTypeError(_get_buffer_message(expected_value), expected_value, None, _get_call_site(),
+                                "expected_value")
+    if len(view) != len(expected_view):
+        raise ContractValueError(_ITEM_COUNT_MESSAGE, len(view), len(expected_view), _get_call_site())
+    found = _find_different_item(view, expected_view)
+    if found is not None:
+        raise ContractValueError(_at_index(_ITEM_EQUAL_MESSAGE, found[0]), found[1], found[2], _get_call_site())
+
+
+def check_all_not_null(value):
+    """
+    Returns whether a pandas Series or DataFrame has no null items, like :func:`all_not_null` without raising.
 
     :param value: the value to check.
-    :param expected_value: the expected value.
-    :param expression_str: (optional) a string representing the evaluated boolean expression (e.g. 'len(a) == 1').
-    :raises: :class:`ValueError` if the values are not strictly equal.
+    :return: True if the value is a Series or a DataFrame without null items, False otherwise.
     """
-    if value != expected_value:
-        raise ValueError(
-            "{0} with value {1} was not equal to {2}.".format(
-                expression_str if expression_str else _get_parameter_name(),
-                value, expected_value))
+    return _is_frame(value) and not _has_frame_violations(value, None, "null")
 
 
-def is_greater_than(value, expected_value):
+@_check(FULL)
+def all_not_null(value):
     """
-    Checks that the specified value is greater than the expected value.
+    Checks that a pandas Series or DataFrame has no null items (i.e. None, NaN or NaT). Columns are checked with
+    vectorized operations.
+
+    :param value: the value to check.
+    :raises: :class:`ContractValueError` if some items are null. The message lists the row labels of the first ones
+             (see :func:`set_max_reported_items`).
+    :raises: :class:`ContractTypeError` if the value is not a Series or a DataFrame.
+    """
+    if not _is_frame(value):
+        raise ContractTypeError(_FRAME_MESSAGE, value, None, _get_call_site())
+    message_template = _get_frame_violation_template(value, None, "null", _ITEMS_NOT_NULL_MESSAGE)
+    if message_template is not None:
+        raise ContractValueError(message_template, value, None, _get_call_site())
+
+
+def check_all_greater_than(value, expected_value):
+    """
+    Returns whether all items of a pandas Series or DataFrame are greater than the expected value, like
+    :func:`all_greater_than` without raising.
 
     :param value: the value to check.
     :param expected_value: the expected value.
-    :raises: :class:`ValueError` if the value is not greater than the expected value.
+    :return: True if the value is a Series or a DataFrame whose items are all greater than the expected value, False
+             otherwise.
     """
-    if value <= expected_value:
-        raise ValueError(
-            "{0} with value {1} was not greater than {2}.".format(_get_parameter_name(), value, expected_value))
+    return _is_frame(value) and not _has_frame_violations(value, expected_value, "not_greater_than")
 
 
-def is_greater_than_or_equal(value, expected_value):
+@_check(FULL)
+def all_greater_than(value, expected_value):
     """
-    Checks that the specified value is greater than or strictly equal to the expected value.
+    Checks that all items of a pandas Series or DataFrame are greater than the expected value. Columns are checked with
+    vectorized operations, and null items are never greater than the expected value.
 
     :param value: the value to check.
     :param expected_value: the expected value.
-    :raises: :class:`ValueError` if the value is not greater than or strictly equal to the expected value.
+    :raises: :class:`ContractValueError` if some items are not greater than the expected value. The message lists the
+             row labels of the first ones (see :func:`set_max_reported_items`).
+    :raises: :class:`ContractTypeError` if the value is not a Series or a DataFrame.
     """
-    if value < expected_value:
-        raise ValueError("{0} with value {1} was not greater than or equal to {2}.".format(_get_parameter_name(), value,
-                                                                                           expected_value))
+    if not _is_frame(value):
+        raise ContractTypeError(_FRAME_MESSAGE, value, None, _get_call_site())
+    message_template = _get_frame_violation_template(value, expected_value, "not_greater_than",
+                                                     _ITEMS_GREATER_THAN_MESSAGE)
+    if message_template is not None:
+        raise ContractValueError(message_template, value, expected_value, _get_call_site())
 
 
-def all_have_attribute(value, attribute_name):
+def check_all_equal_to_any(value, expected_values):
     """
-    Checks that all objects contained in value - be it a single object or an :class:`~collections.abc.Iterable` of
-    objects - have the specified attribute.
+    Returns whether all items of a pandas Series or DataFrame are equal to one of the expected values, like
+    :func:`all_equal_to_any` without raising.
 
-    :param value: the value to check. It can be a single object, or an an :class:`~collections.abc.Iterable` of objects.
-    :param attribute_name: a string containing the name of the attribute to look for.
-    :raises: :class:`AttributeError` if one of the objects does not contain the specified attribute.
+    :param value: the value to check.
+    :param expected_values: an iterable of expected values.
+    :return: True if the value is a Series or a DataFrame whose items are all equal to one of the expected values, False
+             otherwise.
     """
-    if isinstance(value, Iterable):
-        for item in value:
-            if not hasattr(item, attribute_name):
-                raise AttributeError("{0} contains an item of type {1} not having the expected attribute '{2}'.".format(
-                    _get_parameter_name(), type(item).__name__, attribute_name))
-    elif not hasattr(value, attribute_name):
-        raise AttributeError(
-            "{0} with type {1} does not have the expected attribute '{2}'.".format(_get_parameter_name(),
-                                                                                   type(value).__name__,
-                                                                                   attribute_name))
+    return _is_frame(value) and not _has_frame_violations(value, expected_values, "not_equal_to_any")
 
 
-def all_have_method(value, method_name):
+@_check(FULL)
+def all_equal_to_any(value, expected_values):
     """
-    Checks that all objects contained in value - be it a single object or an :class:`~collections.abc.Iterable` of
-    objects - have the specified method.
+    Checks that all items of a pandas Series or DataFrame are equal to one of the expected values, like
+    :func:`is_equal_to_any` does for a single value. Columns are checked with vectorized operations.
 
-    :param value: the value to check. It can be a single object, or an an :class:`~collections.abc.Iterable` of objects.
-    :param method_name: a string containing the name of the method to look for.
-    :raises: :class:`AttributeError` if one of the objects does not contain the specified method.
+    :param value: the value to check.
+    :param expected_values: an iterable of expected values.
+    :raises: :class:`ContractValueError` if some items are not equal to any of the expected values. The message lists
+             the row labels of the first ones (see :func:`set_max_reported_items`).
+    :raises: :class:`ContractTypeError` if the value is not a Series or a DataFrame.
     """
-    if isinstance(value, Iterable):
-        for item in value:
-            if not (hasattr(item, method_name) and callable(getattr(item, method_name))):
-                raise AttributeError("{0} contains an item of type {1} not having the expected method '{2}'.".format(
-                    _get_parameter_name(), type(item).__name__, method_name))
-    elif not (hasattr(value, method_name) and callable(getattr(value, method_name))):
-        raise AttributeError("{0} with type {1} does not have the expected method '{2}'.".format(_get_parameter_name(),
-                                                                                                 type(value).__name__,
-                                                                                                 method_name))
+    if not _is_frame(value):
+        raise ContractTypeError(_FRAME_MESSAGE, value, None, _get_call_site())
+    message_template = _get_frame_violation_template(value, expected_values, "not_equal_to_any",
+                                                     _ITEMS_EQUAL_TO_ANY_MESSAGE)
+    if message_template is not None:
+        raise ContractValueError(message_template, value, expected_values, _get_call_site())
 
 
-def is_callable(value):
+def check_all_unique(value):
     """
-    Checks that the specified value is a callable object (i.e. has a '__call__' attribute).
+    Returns whether a pandas Series has no duplicated items, or a DataFrame no duplicated rows, like :func:`all_unique`
+    without raising.
 
     :param value: the value to check.
-    :raises: :class:`TypeError` if the value is not a callable object.
+    :return: True if the value is a Series or a DataFrame without duplicates, False otherwise.
     """
-    if not hasattr(value, '__call__'):
-        raise TypeError("{0} with type {1} was not callable.".format(_get_parameter_name(), type(value).__name__))
+    return _is_frame(value) and not _has_frame_violations(value, None, "duplicated")
 
 
-def is_instance(value, cls):
+@_check(FULL)
+def all_unique(value):
     """
-    Checks that the specified value is an instance of the given class.
+    Checks that a pandas Series has no duplicated items, or that a DataFrame has no duplicated rows. The duplicates are
+    found with hashing, in linear time.
 
     :param value: the value to check.
-    :param cls: the expected class of the value.
-    :raises: :class:`TypeError` if the value is not an instance of the class.
+    :raises: :class:`ContractValueError` if some items or rows are duplicated. The message lists the row labels of the
+             first ones, including the first occurrence of each duplicate (see :func:`set_max_reported_items`).
+    :raises: :class:`ContractTypeError` if the value is not a Series or a DataFrame.
+    """
+    if not _is_frame(value):
+        raise ContractTypeError(_FRAME_MESSAGE, value, None, _get_call_site())
+    message_template = _get_frame_violation_template(value, None, "duplicated", _ROWS_UNIQUE_MESSAGE if value.ndim > 1
+                                                     else _ITEMS_UNIQUE_MESSAGE)
+    if message_template is not None:
+        raise ContractValueError(message_template, value, None, _get_call_site())
+
+
+def check_has_dtype(value, expected_dtype):
+    """
+    Returns whether a pandas Series or DataFrame has the expected dtypes, like :func:`has_dtype` without raising.
+
+    :param value: the value to check.
+    :param expected_dtype: the expected dtype, or a dictionary of the expected dtypes of some DataFrame columns.
+    :return: True if the value is a Series or a DataFrame with the expected dtypes, False otherwise.
+    """
+    return _is_frame(value) and not _get_dtype_mismatches(value, expected_dtype)
+
+
+@_check(CHEAP)
+def has_dtype(value, expected_dtype):
+    """
+    Checks that a pandas Series or DataFrame has the expected dtype. Only the dtypes are compared, not the items.
+
+    :param value: the value to check.
+    :param expected_dtype: the expected dtype (e.g. `'int64'` or `numpy.float64`), which all columns of a DataFrame
+                           must have, or a dictionary of the expected dtypes of some DataFrame columns (e.g.
+                           `{'id': 'int64', 'name': object}`).
+    :raises: :class:`ContractValueError` if a dtype differs, or if a column is missing.
+    :raises: :class:`ContractTypeError` if the value is not a Series or a DataFrame.
+    """
+    if not _is_frame(value):
+        raise ContractTypeError(_FRAME_MESSAGE, value, None, _get_call_site())
+    mismatches = _get_dtype_mismatches(value, expected_dtype)
+    if not mismatches:
+        return
+    if value.ndim == 1:
+        raise ContractValueError(_DTYPE_MESSAGE, mismatches[0][1], mismatches[0][2], _get_call_site())
+    items = ", ".join("{0!r} ({1} instead of {2})".format(column, "missing" if dtype is None else dtype, expected)
+                      for column, dtype, expected in mismatches)
+    raise ContractValueError(_DTYPES_MESSAGE.replace("{items}", items.replace("{", "{{").replace("}", "}}")), value,
+                             expected_dtype, _get_call_site())
+
+
+@_iterator_check(CHEAP)
+def iter_not_empty(value):
+    """
+    Checks that the specified iterable (e.g. a generator) is not empty, without consuming it: its first item is read
+    ahead of time, and yielded again by the returned iterator.
+
+    :param value: the :class:`~collections.abc.Iterable` object to check.
+    :return: an iterator over the items of the value. If the contract isn't enforced, the value itself.
+    :raises: :class:`ContractValueError` if the value is empty.
+    """
+    if get_enforcement_level() < CHEAP:
+        return value
+
+    iterator = iter(value)
+    for item in iterator:
+        return itertools.chain((item,), iterator)
+    raise ContractValueError(_NOT_EMPTY_MESSAGE, value, None, _get_call_site())
+
+
+@_iterator_check(FULL)
+def iter_all_have_attribute(value, attribute_name):
+    """
+    Checks that all items of the specified iterable (e.g. a generator) have the specified attribute, as they're
+    consumed: the items are checked one by one by the returned iterator, and never stored.
+
+    :param value: the :class:`~collections.abc.Iterable` object to check.
+    :param attribute_name: a string containing the name of the attribute to look for.
+    :return: an iterator over the items of the value. If the contract isn't enforced, the value itself.
+    :raises: :class:`ContractAttributeError` (when iterating) if one of the items does not contain the specified
+             attribute.
+    """
+    if get_enforcement_level() < FULL:
+        return value
+    return _iter_checked_items(value, attribute_name, _type_has_attribute, hasattr,
+                               _INDEXED_ITEM_ATTRIBUTE_MESSAGE, _get_call_site())
+
+
+@_iterator_check(FULL)
+def iter_all_have_method(value, method_name):
+    """
+    Checks that all items of the specified iterable (e.g. a generator) have the specified method, as they're consumed:
+    the items are checked one by one by the returned iterator, and never stored.
+
+    :param value: the :class:`~collections.abc.Iterable` object to check.
+    :param method_name: a string containing the name of the method to look for.
+    :return: an iterator over the items of the value. If the contract isn't enforced, the value itself.
+    :raises: :class:`ContractAttributeError` (when iterating) if one of the items does not contain the specified method.
+    """
+    if get_enforcement_level() < FULL:
+        return value
+    return _iter_checked_items(value, method_name, _type_has_method, _has_method, _INDEXED_ITEM_METHOD_MESSAGE,
+                               _get_call_site())
+
+
+def _iter_checked_items(value, name, type_predicate, predicate, message_template, call_site):
+    # The call site is the one of the function that wrapped the iterable, since items are checked by whichever code
+    # consumes the iterator. The predicate on types is evaluated once per type, and returns None when each item must be
+    # checked with the other predicate instead.
+    results = {}
+    cls = result = None
+    for index, item in enumerate(value):
+        if type(item) is not cls:
+            cls = type(item)
+            result = results.get(cls, _UNDECIDED)
+            if result is _UNDECIDED:
+                result = results[cls] = type_predicate(cls, name)
+        if not (result or result is None and predicate(item, name)):
+            raise ContractAttributeError(_at_index(message_template, index), item, name, call_site)
+        yield item
+
+
+@_iterator_check(CHEAP)
+def aiter_checked(value, *contracts):
+    """
+    Checks the items of the specified asynchronous iterable (e.g. an asynchronous generator) with contracts, as they're
+    consumed: each item is checked by the returned iterator when it's awaited, and never stored. Checking an item
+    doesn't involve the event loop, so no await or task is added when it passes.
+
+    Like with :func:`ensures`, a function checking the items is generated for the contracts enforced at that time, and
+    reused for the same contracts. Error messages refer to the checked item as 'item'.
+
+    Example: `async for order in contract.aiter_checked(orders, contract.is_not_none, (contract.is_instance, Order))`.
+
+    :param value: the :class:`~collections.abc.AsyncIterable` object to check.
+    :param contracts: the contracts to check. Each contract is either a check function (e.g. `contract.is_not_none`)
+                      or a tuple containing a check function followed by its extra arguments (e.g.
+                      `(contract.is_instance, str)`).
+    :return: an asynchronous iterator over the items of the value. If none of the contracts is enforced, the value
+             itself.
+    :raises: the exception of a violated contract (when iterating), if one of the items doesn't satisfy it.
+    """
+    try:
+        checker = _item_checkers.get(contracts, _UNDECIDED)
+    except TypeError:
+        # The extra arguments of a contract can't be hashed.
+        checker = _generate_item_checker(contracts)
+    if checker is _UNDECIDED:
+        if len(_item_checkers) >= _MAX_ITEM_CHECKERS:
+            _item_checkers.clear()
+        checker = _item_checkers[contracts] = _generate_item_checker(contracts)
+    return value if checker is None else _CheckedAsyncIterator(value.__aiter__(), checker)
+
+
+def _generate_item_checker(contracts):
+    # Returns the function checking an item with the contracts, or None if none of them is enforced.
+    generator = _WrapperGenerator(None, None)
+    for check, arguments in _normalize_conditions(list(contracts)):
+        generator.add_check(check, _ITEM_NAME, arguments, generator.postconditions)
+    return generator.generate_checker(_ITEM_NAME) if generator.postconditions else None
+
+
+class _CheckedAsyncIterator:
+    """
+    Asynchronous iterator checking the items of another one as they're awaited.
+    """
+    __slots__ = ("_iterator", "_check", "__weakref__")
+
+    def __init__(self, iterator, check):
+        self._iterator = iterator
+        self._check = check
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._iterator.__anext__()
+        self._check(item)
+        return item
+
+    def aclose(self):
+        # Closes the checked iterator, if it's an asynchronous generator (e.g. with contextlib.aclosing()).
+        return self._iterator.aclose()
+
+
+def _is_in_sequence(value, sequence):
+    # Sequences are indexed by value the second time they're checked. They're kept alive from the first time, so that
+    # their identifier can't be reused by another sequence: lists built anew on every call (e.g. list literals) are
+    # never seen twice, and never indexed. Since sequences may have been modified in the meantime, the item found at the
+    # indexed position is compared to the value again, and the sequence is still scanned before concluding that a value
+    # is missing.
+    entry = _sequence_indexes.get(id(sequence))
+    if entry is None:
+        if len(_sequence_indexes) >= _MAX_SEQUENCE_INDEXES:
+            _sequence_indexes.clear()
+        _sequence_indexes[id(sequence)] = (sequence, None)
+        return value in sequence
+    if entry[1] is None:
+        entry = _sequence_indexes[id(sequence)] = (sequence, _index_sequence(sequence))
+
+    try:
+        position = entry[1].get(value)
+    except TypeError:
+        return value in sequence
+    if position is not None and position < len(sequence) and (sequence[position] is value or
+                                                               sequence[position] == value):
+        return True
+    if value not in sequence:
+        return False
+    _sequence_indexes[id(sequence)] = (sequence, _index_sequence(sequence))
+    return True
+
+
+def _index_sequence(sequence):
+    index = {}
+    for position, item in enumerate(sequence):
+        try:
+            index.setdefault(item, position)
+        except TypeError:
+            pass
+    return index
+
+
+def _find_item_without_attribute(items, attribute_name):
+    # Returns the first item not having the attribute, or _UNDECIDED if they all have it. Results are only kept for the
+    # duration of the call, since classes can be modified at any time.
+    results = {}
+    cls = result = None
+    for item in items:
+        if type(item) is not cls:
+            cls = type(item)
+            result = results.get(cls, _UNDECIDED)
+            if result is _UNDECIDED:
+                result = results[cls] = _type_has_attribute(cls, attribute_name)
+        if not (result or result is None and hasattr(item, attribute_name)):
+            return item
+    return _UNDECIDED
+
+
+def _find_item_without_method(items, method_name):
+    # Returns the first item not having the method, or _UNDECIDED if they all have it.
+    results = {}
+    cls = result = None
+    for item in items:
+        if type(item) is not cls:
+            cls = type(item)
+            result = results.get(cls, _UNDECIDED)
+            if result is _UNDECIDED:
+                result = results[cls] = _type_has_method(cls, method_name)
+        if not (result or result is None and callable(getattr(item, method_name, None))):
+            return item
+    return _UNDECIDED
+
+
+def _has_method(value, method_name):
+    return callable(getattr(value, method_name, None))
+
+
+def _type_has_attribute(cls, attribute_name):
+    # Returns whether all instances of the class have the attribute, or None if it depends on the instance.
+    if _get_class_attribute(cls, "__getattribute__") not in _GENERIC_GETATTRIBUTES:
+        return None
+    attribute = _get_class_attribute(cls, attribute_name)
+    if attribute is _UNDECIDED:
+        # Instances could still get the attribute from their dictionary, or from __getattr__.
+        if cls.__dictoffset__ or _get_class_attribute(cls, "__getattr__") is not _UNDECIDED:
+            return None
+        return False
+    # Other descriptors (e.g. properties or slots) may raise AttributeError, except the ones of the built-in types above
+    # (e.g. int.real).
+    if type(attribute) is types.GetSetDescriptorType and attribute.__objclass__ in _GENERIC_TYPES:
+        return True
+    if hasattr(type(attribute), "__get__") and type(attribute) not in _SAFE_DESCRIPTOR_TYPES:
+        return None
+    return True
+
+
+def _type_has_method(cls, method_name):
+    # Returns whether all instances of the class have the method, or None if it depends on the instance.
+    # The dictionary of an instance could hide a method with another attribute, so only instances without one qualify.
+    if cls.__dictoffset__ or _get_class_attribute(cls, "__getattribute__") not in _GENERIC_GETATTRIBUTES:
+        return None
+    method = _get_class_attribute(cls, method_name)
+    if method is _UNDECIDED:
+        return False if _get_class_attribute(cls, "__getattr__") is _UNDECIDED else None
+    if type(method) is staticmethod:
+        return callable(method.__func__)
+    if not hasattr(type(method), "__get__"):
+        return callable(method)
+    if type(method) in _SAFE_DESCRIPTOR_TYPES:
+        return True
+    return None
+
+
+def _get_class_attribute(cls, name):
+    # Looks up an attribute in the dictionaries of a class and its bases, without triggering descriptors.
+    for base in cls.__mro__:
+        attribute = base.__dict__.get(name, _UNDECIDED)
+        if attribute is not _UNDECIDED:
+            return attribute
+    return _UNDECIDED
+
+
+def all_of(*contracts):
+    """
+    Creates a function checking many values with contracts at once, and reporting all of the violated contracts in a
+    single exception.
+
+    Example: `check_order = contract.all_of(contract.is_not_none, (contract.is_greater_than, 0))`, then
+    `check_order(order.name, order.quantity)`.
+
+    The function is generated once, and the simplest contracts (e.g. :func:`is_not_none` or :func:`is_greater_than`)
+    are inlined as a single condition, so that checking values that pass costs less than calling each contract. The
+    contracts are checked again one by one to report violations, so they should have no side effects. Contracts that
+    aren't enforced under the current enforcement level are skipped.
+
+    :param contracts: the contracts to check, one for each value. Each contract is either a check function (e.g.
+                      `contract.is_not_empty`), a tuple containing a check function followed by its extra arguments
+                      (e.g. `(contract.is_greater_than, 0)`), or a list of those. A check function may also be any
+                      callable raising :class:`ContractViolation` exceptions.
+    :return: a function taking the values to check, and raising :class:`ContractViolations` if some contracts are
+             violated.
+    """
+    function = _generate_all_of([_normalize_conditions(value) for value in contracts])
+    _all_of_functions.add(function)
+    return function
+
+
+def requires(**preconditions):
+    """
+    Decorator checking the arguments of a function with contracts before each call (preconditions).
+
+    A single wrapper is generated for the decorated function when it's defined. It takes the same parameters as the
+    function, so arguments are bound by the interpreter itself, and the simplest contracts (e.g. :func:`is_not_none`
+    or :func:`is_greater_than`) are inlined with their parameter name. Stacking :func:`requires` and :func:`ensures`
+    still produces a single wrapper.
+
+    Contracts are selected according to the enforcement level, and the wrapper is generated again whenever it changes:
+    under :data:`OFF`, it only calls the function.
+
+    Coroutine functions and asynchronous generator functions get a wrapper of the same kind, whose preconditions are
+    checked when it starts running (i.e. when the coroutine is awaited, or when the first item is requested), like the
+    code of the function itself.
+
+    :param preconditions: the contracts to check, keyed by parameter name. Each contract is either a check function
+                          (e.g. `contract.is_not_empty`), a tuple containing a check function followed by its extra
+                          arguments (e.g. `(contract.is_greater_than, 0)`), or a list of those.
+    :raises: :class:`ValueError` if the decorated function has no parameter with one of the specified names.
+    """
+    def decorate(function):
+        return _decorate_with_conditions(function, preconditions, ())
+
+    return decorate
+
+
+def ensures(*postconditions):
+    """
+    Decorator checking the value returned by a function with contracts after each call (postconditions).
+
+    The decorated function is wrapped the same way as with :func:`requires`, and error messages refer to the returned
+    value as 'result'. For coroutine functions, the awaited result is checked. For asynchronous generator functions,
+    each item is checked as it's yielded, and the values and exceptions sent to the generator are passed on to the
+    function.
+
+    :param postconditions: the contracts to check. Each contract is either a check function (e.g.
+                           `contract.is_not_none`) or a tuple containing a check function followed by its extra
+                           arguments (e.g. `(contract.is_instance, str)`).
+    """
+    def decorate(function):
+        return _decorate_with_conditions(function, {}, postconditions)
+
+    return decorate
+
+
+def typechecked(function=None, inspection=FIRST_ITEM, sample_size=100):
+    """
+    Decorator checking the arguments and the result of a function against its type annotations.
+
+    The annotations are read once, when the function is decorated, and compiled into a wrapper like the one generated
+    by :func:`requires` and :func:`ensures` (with which it can be stacked). Plain classes, `None`, `Optional`, `Union`,
+    `Literal` (checked like :func:`is_equal_to_any`), `type`, `Callable`, `Annotated`, `NewType`, bounded type
+    variables and generic containers (e.g. `list[int]`, `tuple[str, ...]` or `dict[str, float]`) are supported. `Any`
+    and other annotations are never checked, and iterators are never consumed. Like with type checkers, an `int` is
+    accepted where a `float` is expected. The result of a coroutine function is checked once awaited, and the items
+    yielded by an asynchronous generator function against the first argument of its annotation (e.g.
+    `AsyncIterator[int]`).
+
+    Checking the items of a container is bounded by the inspection mode: only the first item is checked by default.
+    Checks are skipped under the :data:`OFF` enforcement level, as well as under the :data:`CHEAP` level when all items
+    of a container are checked. Like with :func:`requires`, the wrapper is generated again whenever the enforcement
+    level changes.
+
+    Example: `@contract.typechecked` or `@contract.typechecked(inspection=contract.SAMPLED_ITEMS)`.
+
+    :param function: the decorated function, when the decorator is used without arguments.
+    :param inspection: (optional) :data:`FIRST_ITEM` to only check the first item of containers, :data:`SAMPLED_ITEMS`
+                       to check at most `sample_size` items (evenly spread over lists and tuples), or :data:`ALL_ITEMS`
+                       to check all of them.
+    :param sample_size: (optional) the maximum number of items checked in :data:`SAMPLED_ITEMS` mode.
+    :raises: :class:`ValueError` if the inspection mode is unknown, or if the sample size is lower than 1.
+    """
+    if inspection not in _annotations.INSPECTION_MODES:
+        raise ValueError("The inspection mode must be one of {0}, not {1!r}.".format(
+            ", ".join(_annotations.INSPECTION_MODES), inspection))
+    if sample_size < 1:
+        raise ValueError("The sample size must be greater than or equal to 1, not {0}.".format(sample_size))
+
+    def decorate(function):
+        annotations = _get_type_hints(function)
+        preconditions = {}
+        for name, parameter in inspect.signature(function).parameters.items():
+            if name not in annotations:
+                continue
+            annotation = annotations[name]
+            if parameter.kind is parameter.VAR_POSITIONAL:
+                annotation = tuple[annotation, ...]
+            elif parameter.kind is parameter.VAR_KEYWORD:
+                annotation = dict[str, annotation]
+            preconditions[name] = _AnnotationCheck(annotation, inspection, sample_size, parameter.default)
+
+        # The wrappers of coroutine functions check the awaited result, and those of asynchronous generator functions
+        # check each yielded item, against the first argument of their annotation (e.g. 'AsyncIterator[int]').
+        postconditions = []
+        annotation = annotations.get("return", inspect.Parameter.empty)
+        if inspect.isasyncgenfunction(function):
+            arguments = typing.get_args(annotation)
+            annotation = arguments[0] if typing.get_origin(annotation) in _ASYNC_ITERATOR_CLASSES and arguments else \
+                inspect.Parameter.empty
+        if annotation is not inspect.Parameter.empty:
+            postconditions.append(_AnnotationCheck(annotation, inspection, sample_size))
+        return _decorate_with_conditions(function, preconditions, postconditions)
+
+    return decorate if function is None else decorate(function)
+
+
+def _get_type_hints(function):
+    # Returns the resolved annotations of a function. If some of them can't be resolved (e.g. they refer to a class that
+    # is defined later), the unresolved ones are ignored.
+    try:
+        return typing.get_type_hints(function, include_extras=True)
+    except (NameError, TypeError):
+        return {name: annotation for name, annotation in getattr(function, "__annotations__", {}).items()
+                if not isinstance(annotation, str)}
+
+
+class _AnnotationCheck:
+    """
+    Check generated by :func:`typechecked` from an annotation, which wrappers compile into a condition.
+    """
+    __slots__ = ("annotation", "inspection", "sample_size", "default")
+
+    def __init__(self, annotation, inspection, sample_size, default=inspect.Parameter.empty):
+        self.annotation = annotation
+        self.inspection = inspection
+        self.sample_size = sample_size
+        self.default = default
+
+
+# Prefix of the names of the generated wrappers' globals, which can't collide with the names of their parameters.
+_GENERATED_PREFIX = "__contracts_"
+
+# Numbers of the generated globals. They're unique, so that the globals of a function generated again never replace the
+# ones of its previous code.
+_generated_names = itertools.count()
+
+# Name of the variable holding the value returned by the wrapped function, as it appears in error messages.
+_RESULT_NAME = "result"
+
+# Name of the variable holding the items checked by aiter_checked, as it appears in error messages.
+_ITEM_NAME = "item"
+
+# Generic classes whose first argument is the type of the items yielded by an asynchronous generator function.
+_ASYNC_ITERATOR_CLASSES = (collections.abc.AsyncIterator, collections.abc.AsyncIterable,
+                           collections.abc.AsyncGenerator)
+
+
+def _decorate_with_conditions(function, preconditions, postconditions):
+    preconditions = {name: _normalize_conditions(value) for name, value in preconditions.items()}
+    postconditions = _normalize_conditions(list(postconditions))
+
+    # If the function is a wrapper generated by a decorator, a single wrapper is generated for all of the conditions.
+    # The conditions of the outermost decorator are checked first, as if the wrappers were nested. Other decorators copy
+    # the attributes of the wrappers (e.g. with functools.wraps), so the wrappers are only recognized by identity.
+    if function in _decorated_functions:
+        _decorated_functions.discard(function)
+        function, previous_preconditions, previous_postconditions = function._contracts_conditions
+        for name, previous_conditions in previous_preconditions.items():
+            preconditions[name] = preconditions.get(name, []) + previous_conditions
+        postconditions = previous_postconditions + postconditions
+
+    signature = inspect.signature(function)
+    for name in preconditions:
+        if name not in signature.parameters:
+            raise ValueError("{0}() has no parameter named '{1}'.".format(function.__qualname__, name))
+
+    wrapper = _generate_wrapper(function, preconditions, postconditions)
+    if wrapper is not function:
+        wrapper._contracts_conditions = (function, preconditions, postconditions)
+        _decorated_functions.add(wrapper)
+    return wrapper
+
+
+def _generate_wrapper(function, preconditions, postconditions, wrapper=None):
+    # Generates the wrapper checking the conditions of a function, or returns the function if none of them can ever be
+    # checked. If the wrapper is specified, its code is replaced, so that the callers holding on to it use the current
+    # enforcement configuration.
+    generator = _WrapperGenerator(function, inspect.signature(function))
+    for name, conditions in preconditions.items():
+        for check, arguments in conditions:
+            generator.add_check(check, name, arguments, generator.preconditions)
+    for check, arguments in postconditions:
+        generator.add_check(check, _RESULT_NAME, arguments, generator.postconditions)
+
+    if wrapper is None:
+        if not generator.preconditions and not generator.postconditions and not generator.has_skipped_checks:
+            return function
+        wrapper = generator.generate()
+        wrapper._contracts_codes = [(weakref.ref(wrapper.__code__), frozenset(wrapper.__globals__))]
+    else:
+        _replace_code(wrapper, generator.generate())
+    return wrapper
+
+
+def _normalize_conditions(value):
+    # Returns a list of (check, extra arguments) tuples.
+    if isinstance(value, list):
+        return [condition for item in value for condition in _normalize_conditions(item)]
+    if isinstance(value, tuple):
+        return [(value[0], value[1:])] if value else []
+    return [(value, ())]
+
+
+class _WrapperGenerator:
+    """
+    Generates the source code of a wrapper checking the arguments and the result of a function.
     """
-    if not isinstance(value, cls):
-        raise TypeError("{0} was not an instance of {1}.".format(_get_parameter_name(), cls.__name__))
 
+    def __init__(self, function, signature):
+        self._function = function
+        self._signature = signature
+        self._globals = {_GENERATED_PREFIX + "function": function}
+        self.preconditions = []
+        self.postconditions = []
+        # Whether checks were left out because they aren't enforced under the current enforcement level.
+        self.has_skipped_checks = False
+
+    def add_check(self, check, name, arguments, lines):
+        """
+        Adds the lines of code checking the variable with the specified name to 'lines'.
+        """
+        if isinstance(check, _AnnotationCheck):
+            self._add_annotation_check(check, name, lines)
+            return
+
+        registered = _get_registered_check(check)
+        if registered:
+            implementation, level = registered
+            if _has_context_overrides:
+                # The level of the context has to be read on each call, by the current dispatcher.
+                implementation = globals()[check.__name__]
+            elif _enforcement_level < level:
+                self.has_skipped_checks = True
+                return
+            else:
+                inline_check = _INLINE_CHECKS.get(check.__name__)
+                if inline_check and len(arguments) == ("{expected}" in inline_check[0]):
+                    lines.extend(self._inline(inline_check, implementation, name, arguments))
+                    return
+            check = implementation
+
+        lines.append("{0}({1})".format(self._add_global(check), ", ".join([name] + [self._add_global(argument)
+                                                                                  for argument in arguments])))
+
+    def _inline(self, inline_check, implementation, name, arguments):
+        condition, exception_name, message_template = inline_check
+        expected = self._add_global(arguments[0]) if arguments else "None"
+        statement = "if {condition}: raise {exception}({message!r}, {name}, {expected}, None, {name!r})".format(
+            condition=condition.format(value=name, expected=expected),
+            exception=self._add_global(globals()[exception_name]), message=message_template, name=name,
+            expected=expected)
+        if implementation.__name__ not in _ARRAY_CHECKS:
+            return [statement]
+        return ["try:", "    " + statement, "except {0}:".format(self._add_global(ContractViolation)), "    raise",
+                "except (TypeError, ValueError):",
+                "    {0}({1}, {2})".format(self._add_global(implementation), name, expected)]
+
+    def _add_annotation_check(self, check, name, lines):
+        builder = _annotations.ConditionBuilder(self._add_global, check.inspection, check.sample_size)
+        condition = builder.build(check.annotation, name)
+        if condition is None:
+            return
+        level = FULL if builder.iterates else CHEAP
+        if check.default is not inspect.Parameter.empty:
+            # Default values are accepted as is, even if they don't match the annotation (e.g. 'name: str = None').
+            condition = "{0} or {1} is {2}".format(condition, name, self._add_global(check.default))
+        if _has_context_overrides:
+            # The level of the context is only read when the condition fails.
+            condition = "{0} or {1}() < {2}".format(condition, self._add_global(get_enforcement_level), level)
+        elif _enforcement_level < level:
+            self.has_skipped_checks = True
+            return
+
+        lines.append("if not ({condition}): raise {exception}({message!r}, {name}, {expected}, None, {name!r})".format(
+            condition=condition, exception=self._add_global(ContractTypeError), message=_ANNOTATION_MESSAGE, name=name,
+            expected=self._add_global(inspect.formatannotation(check.annotation))))
+
+    def _add_global(self, value):
+        name = "{0}{1}".format(_GENERATED_PREFIX, next(_generated_names))
+        self._globals[name] = value
+        return name
+
+    def generate(self):
+        # The wrapper has the same parameters as the function, and passes them through as is.
+        parameters = []
+        arguments = []
+        previous_kind = None
+        for parameter in self._signature.parameters.values():
+            kind = parameter.kind
+            if previous_kind is parameter.POSITIONAL_ONLY and kind is not parameter.POSITIONAL_ONLY:
+                parameters.append("/")
+            if kind is parameter.KEYWORD_ONLY and previous_kind not in (parameter.KEYWORD_ONLY,
+                                                                        parameter.VAR_POSITIONAL):
+                parameters.append("*")
+
+            if kind is parameter.VAR_POSITIONAL:
+                parameters.append("*" + parameter.name)
+                arguments.append("*" + parameter.name)
+            elif kind is parameter.VAR_KEYWORD:
+                parameters.append("**" + parameter.name)
+                arguments.append("**" + parameter.name)
+            else:
+                default = "" if parameter.default is parameter.empty else "=" + self._add_global(parameter.default)
+                parameters.append(parameter.name + default)
+                arguments.append(("{0}={0}" if kind is parameter.KEYWORD_ONLY else "{0}").format(parameter.name))
+            previous_kind = kind
+        if previous_kind is inspect.Parameter.POSITIONAL_ONLY:
+            parameters.append("/")
+
+        # The wrappers of coroutine functions and asynchronous generator functions are asynchronous as well, so their
+        # preconditions are checked when the function starts running, like its own code.
+        call = "{0}function({1})".format(_GENERATED_PREFIX, ", ".join(arguments))
+        is_coroutine_function = inspect.iscoroutinefunction(self._function)
+        is_async_generator_function = inspect.isasyncgenfunction(self._function)
+        lines = ["{0} {1}wrapper({2}):".format(
+            "async def" if is_coroutine_function or is_async_generator_function else "def", _GENERATED_PREFIX,
+            ", ".join(parameters))]
+        lines.extend("    " + line for line in self.preconditions)
+        if is_coroutine_function:
+            call = "await " + call
+        if is_async_generator_function:
+            lines.extend("    " + line for line in self._delegate_to_async_generator(call))
+        elif self.postconditions:
+            lines.append("    {0} = {1}".format(_RESULT_NAME, call))
+            lines.extend("    " + line for line in self.postconditions)
+            lines.append("    return " + _RESULT_NAME)
+        else:
+            lines.append("    return " + call)
+        filename = "<contracts wrapper of {0}.{1}>".format(self._function.__module__, self._function.__qualname__)
+        return functools.wraps(self._function)(self._compile(lines, filename, "wrapper"))
+
+    def generate_checker(self, name):
+        """
+        Generates a function checking a single value, named after the specified variable, with the postconditions.
+        """
+        lines = ["def {0}checker({1}):".format(_GENERATED_PREFIX, name)] + ["    " + line
+                                                                           for line in self.postconditions]
+        return self._compile(lines, "<contracts checker {0}>".format(id(self._globals)), "checker")
+
+    def _delegate_to_async_generator(self, call):
+        # Returns the lines of code yielding the items of the asynchronous generator, checked with the postconditions.
+        # Since 'yield from' isn't allowed in asynchronous generators, the values and the exceptions sent to the wrapper
+        # are passed on explicitly, the way 'yield from' would. Awaiting asend() never suspends the wrapper by itself.
+        generator = _GENERATED_PREFIX + "generator"
+        sent = _GENERATED_PREFIX + "sent"
+        exception = _GENERATED_PREFIX + "exception"
+        return ["{0} = {1}".format(generator, call),
+                "try:",
+                "    {0} = await {1}.asend(None)".format(_RESULT_NAME, generator),
+                "    while True:"] + ["        " + line for line in self.postconditions] + [
+                "        try:",
+                "            {0} = yield {1}".format(sent, _RESULT_NAME),
+                "        except GeneratorExit:",
+                "            raise",
+                "        except BaseException as {0}:".format(exception),
+                "            {0} = await {1}.athrow({2})".format(_RESULT_NAME, generator, exception),
+                "        else:",
+                "            {0} = await {1}.asend({2})".format(_RESULT_NAME, generator, sent),
+                "except StopAsyncIteration:",
+                "    return",
+                "finally:",
+                "    await {0}.aclose()".format(generator)]
+
+    def _compile(self, lines, filename, name):
+        # The source code is registered in the line cache, so that it appears in tracebacks.
+        source = "\n".join(lines) + "\n"
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+        exec(compile(source, filename, "exec"), self._globals)
+        return self._globals[_GENERATED_PREFIX + name]
+
+
+def _get_registered_check(check):
+    # Returns the implementation and the minimum enforcement level of a public check function, or None if it's another
+    # callable. The public function may have been bound under another enforcement configuration (e.g. to a no-op), in
+    # which case it wraps the implementation.
+    name = getattr(check, "__name__", None)
+    registered = _checks.get(name)
+    if registered and (check in (registered[0], globals()[name]) or inspect.unwrap(check) is registered[0]):
+        return registered
+    return None
+
+
+def _generate_all_of(conditions, function=None):
+    # Generates the function checking the values passed to a function created by all_of. If the function is specified,
+    # its code is replaced, so that the callers holding on to it use the current enforcement configuration.
+    namespace = {"ContractViolation": ContractViolation, _GENERATED_PREFIX + "conditions": conditions,
+                 _GENERATED_PREFIX + "check": _check_all_of}
+
+    def add_global(value):
+        name = "{0}{1}".format(_GENERATED_PREFIX, next(_generated_names))
+        namespace[name] = value
+        return name
+
+    names = ["{0}value_{1}".format(_GENERATED_PREFIX, index) for index in range(len(conditions))]
+    inline_conditions = []
+    calls = []
+    level = _enforcement_level
+    for name, value_conditions in zip(names, conditions):
+        for check, arguments in value_conditions:
+            registered = _get_registered_check(check)
+            if registered is not None:
+                if level < registered[1]:
+                    continue
+                inline_check = _INLINE_CHECKS.get(check.__name__)
+                if inline_check and len(arguments) == ("{expected}" in inline_check[0]):
+                    expected = add_global(arguments[0]) if arguments else "None"
+                    inline_conditions.append(inline_check[0].format(value=name, expected=expected))
+                    continue
+                # The public function is called rather than the implementation, so that it's sampled like other calls.
+                check = globals()[check.__name__]
+            calls.append("{0}({1})".format(add_global(check), ", ".join([name] + [add_global(argument)
+                                                                                 for argument in arguments])))
+
+    # Any failure, including an inlined condition that can't be evaluated (e.g. on a NumPy array), leads to the values
+    # being checked one by one, outside of the exception handler, which reports the violations and raises other errors
+    # again.
+    lines = calls + ["return"]
+    if inline_conditions:
+        lines = ["if not ({0}):".format(" or ".join(inline_conditions))] + ["    " + line for line in lines]
+    if inline_conditions or calls:
+        lines = ["try:"] + ["    " + line for line in lines] + ["except (ContractViolation, TypeError, ValueError):",
+                                                                "    pass"]
+    if _has_context_overrides:
+        get_level = add_global(functools.partial(_context_enforcement_level.get, level))
+        lines = ["if {0}() == {1}:".format(get_level, level)] + ["    " + line for line in lines]
+    if lines != ["return"]:
+        lines.append("return {0}check({0}conditions, ({1}))".format(
+            _GENERATED_PREFIX, ", ".join(names) + ("," if len(names) == 1 else "")))
+
+    source = "\n".join(["def all_of({0}):".format(", ".join(names))] + ["    " + line for line in lines]) + "\n"
+    filename = "<contracts all_of {0}>".format(id(conditions))
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    exec(compile(source, filename, "exec"), namespace)
+    if function is None:
+        function = namespace["all_of"]
+        function._contracts_conditions = conditions
+        function._contracts_codes = [(weakref.ref(function.__code__), frozenset(namespace))]
+    else:
+        _replace_code(function, namespace["all_of"])
+    return function
+
+
+def _replace_code(function, replacement):
+    # Replaces the code of a generated function with the code of another one. The globals of the replacement are added
+    # to the globals of the function before its code is swapped, so that calls running at the same time (e.g. in other
+    # threads) never miss a global. The globals of the previous versions of the code are only removed once the code has
+    # been freed, since the frames running it keep it alive.
+    namespace = function.__globals__
+    replacement_globals = replacement.__globals__
+    namespace.update((name, value) for name, value in replacement_globals.items() if value is not replacement)
+    function.__code__ = replacement.__code__
+    function._contracts_codes.append((weakref.ref(replacement.__code__), frozenset(replacement_globals)))
+    # The replacement and its globals reference each other, and would keep its code alive until collected.
+    replacement_globals.clear()
+
+    function._contracts_codes = [(code, names) for code, names in function._contracts_codes if code() is not None]
+    for name in namespace.keys() - frozenset().union(*(names for _, names in function._contracts_codes)):
+        del namespace[name]
+
+
+def _check_all_of(conditions, values):
+    # Checks the values passed to a function created by all_of one by one, and raises all of the violations at once.
+    # The implementations of the checks are called directly, so that sampling can't hide a violation.
+    level = _context_enforcement_level.get(_enforcement_level)
+    frame = _skip_internal_frames(sys._getframe(2))
+    call_site = (frame.f_code, frame.f_lasti, frame.f_globals)
+    violations = []
+    for index, (value, value_conditions) in enumerate(zip(values, conditions)):
+        for check, arguments in value_conditions:
+            registered = _get_registered_check(check)
+            if registered is not None:
+                if level < registered[1]:
+                    continue
+                check = registered[0]
+            try:
+                check(value, *arguments)
+            except ContractViolations as exception:
+                violations.extend(exception.violations)
+                break
+            except ContractViolation as exception:
+                # The other contracts of the value are skipped, as they would be if the contracts were called in turn.
+                exception._call_site = call_site + (index,)
+                violations.append(exception)
+                break
+    if violations:
+        raise ContractViolations(violations)
+
+
+def _as_flat_memoryview(value, formats=_NATIVE_BUFFER_FORMATS):
+    # Returns a one-dimensional view of the items of a buffer, or None if the value doesn't support the buffer protocol
+    # or if its items aren't in one of the given formats. Multi-dimensional buffers are flattened with casts, which
+    # never copy them but require them to be contiguous.
+    try:
+        view = memoryview(value)
+    except TypeError:
+        return None
+    if view.format not in formats:
+        return None
+    if view.ndim == 1:
+        return view
+    if not view.c_contiguous:
+        return None
+    return view.cast("B").cast(view.format)
+
+
+def _get_buffer_message(value, formats=_NATIVE_BUFFER_FORMATS):
+    # Returns the template of the message explaining why the items of a value can't be read as a flat buffer of items in
+    # one of the given formats.
+    try:
+        view = memoryview(value)
+    except TypeError:
+        return _BUFFER_MESSAGE
+    if view.format in formats:
+        return _BUFFER_MESSAGE
+    return _BUFFER_NUMBER_MESSAGE if view.format in _NATIVE_BUFFER_FORMATS else _BUFFER_FORMAT_MESSAGE
+
+
+def _find_item_out_of_range(view, minimum, maximum):
+    # Returns the index and the value of the first item out of bounds, or None. min() and max() skip NaN (or return it
+    # when it's the first item), so chunks of floats containing NaN are always scanned.
+    may_be_nan = view.format in _FLOAT_BUFFER_FORMATS
+    for start, chunk in _get_chunks(view):
+        if min(chunk) < minimum or max(chunk) > maximum or (may_be_nan and any(map(math.isnan, chunk))):
+            for index, item in enumerate(chunk, start):
+                if not minimum <= item <= maximum:
+                    return index, item
+    return None
+
+
+def _find_negative_item(view):
+    # Returns the index and the value of the first negative item, or None. Like in _find_item_out_of_range(), chunks of
+    # floats containing NaN are always scanned.
+    may_be_nan = view.format in _FLOAT_BUFFER_FORMATS
+    for start, chunk in _get_chunks(view):
+        if min(chunk) < 0 or (may_be_nan and any(map(math.isnan, chunk))):
+            for index, item in enumerate(chunk, start):
+                if item < 0:
+                    return index, item
+    return None
+
+
+def _find_unsorted_item(view):
+    # Returns the index and the value of the first item lower than the previous one, along with the previous one, or
+    # None. Each chunk overlaps the next one by an item, so that the items on both sides of their boundary are compared.
+    for start, chunk in _get_chunks(view[:-1]):
+        following = view[start + 1:start + 1 + len(chunk)]
+        if not all(map(operator.le, chunk, following)):
+            for index, (previous, item) in enumerate(zip(chunk, following), start + 1):
+                if item < previous:
+                    return index, item, previous
+    return None
+
+
+def _find_different_item(view, expected_view):
+    # Returns the index of the first item differing from the expected one, along with both items, or None.
+    for start, chunk in _get_chunks(view):
+        expected_chunk = expected_view[start:start + len(chunk)]
+        if chunk != expected_chunk:
+            for index, (item, expected_item) in enumerate(zip(chunk, expected_chunk), start):
+                if item != expected_item:
+                    return index, item, expected_item
+    return None
+
+
+def _get_chunks(view):
+    for start in range(0, len(view), _BUFFER_CHUNK_SIZE):
+        yield start, view[start:start + _BUFFER_CHUNK_SIZE]
+
+
+def _at_index(message_template, index):
+    return message_template.replace("{index}", str(index))
+
+
+def _format_classes(classes):
+    # Returns the names of the classes accepted by isinstance(): a class, a union (e.g. 'int | str') or a tuple of them,
+    # possibly nested.
+    if isinstance(classes, tuple):
+        return " or ".join(_format_classes(item) for item in classes)
+    return classes.__name__ if isinstance(classes, type) else str(classes)
+
+
+def _is_array(value):
+    # NumPy is never imported here: if it hasn't been imported yet, the value can't be an array.
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+def _has_array_violations(value, expected_value, violation_name):
+    from . import _arrays
+    return _arrays.has_violations(value, expected_value, violation_name)
+
+
+def _get_array_violation_template(value, expected_value, violation_name, message_template):
+    from . import _arrays
+    return _arrays.get_violation_template(value, expected_value, violation_name, message_template, _SHAPE_MESSAGE,
+                                          _max_reported_items)
+
+
+def _is_frame(value):
+    # pandas is never imported here: if it hasn't been imported yet, the value can't be a Series or a DataFrame.
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(value, (pandas.Series, pandas.DataFrame))
+
+
+def _has_frame_violations(value, expected_value, violation_name):
+    from . import _frames
+    return _frames.has_violations(value, expected_value, violation_name)
+
+
+def _get_frame_violation_template(value, expected_value, violation_name, message_template):
+    from . import _frames
+    return _frames.get_violation_template(value, expected_value, violation_name, message_template,
+                                          _max_reported_items)
+
+
+def _get_dtype_mismatches(value, expected_dtype):
+    from . import _frames
+    return _frames.get_dtype_mismatches(value, expected_dtype)
+
+
+def _get_call_site():
+    # Only capture the frame of the code that performed the call to the contract function: frame 0 is this function,
+    # and frame 1 is the contract function itself. Resolving the parameter name is deferred until it's needed.
+    frame = _skip_internal_frames(sys._getframe(2))
+    return frame.f_code, frame.f_lasti, frame.f_globals
+
+
+def _skip_internal_frames(frame):
+    while id(frame.f_code) in _internal_code_ids:
+        frame = frame.f_back
+    return frame
+
+
+def _get_parameter_name(call_site):
+    # The expressions passed to the contract function (e.g. 'a' for 'contract.is_not_none(a)') are resolved once per
+    # call site, from the bytecode of the caller, so that repeated failures don't require any source code lookup. Call
+    # sites may also hold the index of the checked argument (e.g. for the functions created by all_of).
+    index = call_site[3] if len(call_site) > 3 else 0
+    expressions = _callsite.argument_expressions(*call_site[:3])
+    return expressions[index] if expressions and index < len(expressions) else _UNKNOWN_PARAMETER_NAME
 
-def _get_parameter_name():
-    # Retrieve the line of code that performed the call to the contract function.
-    stack = traceback.extract_stack()
-    _, _, _, code = stack[-3]
 
-    # 'code' will contain something like this:
-    #   'contract.is_not_none(a, expression)'
-    #
-    # So we extract the name of the first variable ('a') to generate a more specific, meaningful error message.
-    match = _MATCH_FIRST_PARAMETER_REGEX.search(code)
-    if not match:
-        raise Exception("The call to the code contract had an unexpected format.")
-    return match.groups(0)[0]
+set_enforcement_level(_enforcement_level_from_environment())
@@ -0,0 +1,404 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Module attributing the runtime cost of contracts and assertions to the lines of code calling them, to decide which
+contracts to inline (see :mod:`contracts.compiler`), sample or strip.
+
+It profiles a script or a module, like :mod:`cProfile`, but only measures the functions of :mod:`contracts.contract`
+and :mod:`contracts.assertion`:
+
+.. code-block:: console
+
+   $ python -m contracts.profile -o contracts.collapsed service.py --port 8080
+   $ python -m contracts.profile -m my_service.batch
+
+For each call site, the number of calls, the number of failures, the inclusive time (including the nested contracts
+and the callables that assertions call) and its share of the total runtime are reported, in a table sorted by time.
+The iterators returned by contracts (e.g. :func:`~contracts.contract.iter_all_have_attribute`) are measured each time
+they're resumed, under the name of the contract.
+The collapsed stacks of the calls, weighted by their time in microseconds, can be written to a file, which tools like
+flamegraph.pl or speedscope render as flame graphs.
+
+On Python 3.12+, the functions are observed with :mod:`sys.monitoring`, which stops reporting the calls to other
+functions after their first one. On earlier versions, or if another profiler already uses :mod:`sys.monitoring`, a
+profile function is installed with :func:`sys.setprofile`.
+"""
+
+import argparse
+import dis
+import inspect
+import os
+import runpy
+import sys
+import threading
+import time
+import weakref
+from . import _callsite, assertion, contract
+
+# Files of the modules whose functions are profiled, by module name, and prefix of the file names of the functions
+# generated by all_of.
+_PROFILED_FILES = {contract.__file__: "contract", assertion.__file__: "assertion"}
+_ALL_OF_FILE_PREFIX = "<contracts all_of "
+
+# Opcodes of the instructions on which a profiled function returns without raising an exception.
+_RETURN_OPCODES = frozenset(dis.opmap[opname] for opname in ("RETURN_VALUE", "RETURN_CONST", "YIELD_VALUE")
+                            if opname in dis.opmap)
+
+# Identifiers of the code objects of the methods of the iterators returned by aiter_checked.
+_CHECKED_ITERATOR_CODE_IDS = frozenset(id(method.__code__) for method in vars(contract._CheckedAsyncIterator).values()
+                                       if inspect.isfunction(method))
+
+# Events of sys.monitoring on which a profiled function starts or resumes running, and on which it returns or suspends.
+_MONITORING_ENTER_EVENTS = ("PY_START", "PY_RESUME", "PY_THROW")
+_MONITORING_EXIT_EVENTS = ("PY_RETURN", "PY_YIELD", "PY_UNWIND")
+
+# Columns by which the call sites can be sorted, and the keys of the call site dictionaries that they sort.
+_SORT_KEYS = {"time": "seconds", "calls": "calls", "failures": "failures"}
+
+_TABLE_HEADER = "{0:>10} {1:>9} {2:>11} {3:>7}  {4:40} {5}".format("Calls", "Failures", "Time (s)", "Share",
+                                                                    "Call site", "Contract")
+_TABLE_ROW = "{calls:>10} {failures:>9} {seconds:>11.6f} {share:>7.1%}  {site:40} {contract}"
+
+
+class Profiler:
+    """
+    Measures the calls to contracts and assertions, per call site, while it's enabled. It can be used as a context
+    manager:
+
+    .. code-block:: python
+
+       >>> with profile.Profiler() as profiler:
+       ...     process_orders()
+       >>> print(profiler.format_table())
+
+    Calls are attributed to the first caller outside of the contracts, so the time spent in nested contracts (e.g. the
+    predicate called by a contract) is included in the time of the outermost one.
+    """
+
+    def __init__(self):
+        # Whether code objects are profiled, keyed by identifier, along with the code objects themselves.
+        self._verdicts = {}
+        # State of the outermost profiled call of each thread: [depth, start time, call site, stack, code naming the
+        # contract, whether that code is a public function rather than an internal wrapper].
+        self._states = {}
+        # [calls, failures, seconds], keyed by (call site, code naming the contract), where call sites are
+        # (code, offset) tuples.
+        self._sites = {}
+        # Seconds, keyed by (stack, code naming the contract), where stacks are tuples of call sites, from the
+        # outermost.
+        self._stacks = {}
+        # Iterators returned by the contracts, along with the code of the contract, keyed by the identifier of the frame
+        # of the generator, or of the iterator object. They're held by weak reference.
+        self._iterators = {}
+        self._runtime = 0.0
+        self._enabled_at = None
+        self._uses_monitoring = False
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.disable()
+
+    def enable(self):
+        """
+        Starts measuring the calls to contracts and assertions, in all threads.
+        """
+        if self._enabled_at is not None:
+            return
+        self._uses_monitoring = hasattr(sys, "monitoring") and self._enable_monitoring()
+        if not self._uses_monitoring:
+            threading.setprofile(self._profile)
+            sys.setprofile(self._profile)
+        self._enabled_at = time.perf_counter()
+
+    def disable(self):
+        """
+        Stops measuring the calls to contracts and assertions.
+        """
+        if self._enabled_at is None:
+            return
+        if self._uses_monitoring:
+            monitoring = sys.monitoring
+            monitoring.set_events(monitoring.PROFILER_ID, 0)
+            for event in _MONITORING_ENTER_EVENTS + _MONITORING_EXIT_EVENTS:
+                monitoring.register_callback(monitoring.PROFILER_ID, getattr(monitoring.events, event), None)
+            monitoring.free_tool_id(monitoring.PROFILER_ID)
+        else:
+            sys.setprofile(None)
+            threading.setprofile(None)
+        self._runtime += time.perf_counter() - self._enabled_at
+        self._enabled_at = None
+        self._states.clear()
+        self._iterators.clear()
+
+    def get_call_sites(self, sort="time"):
+        """
+        Returns the measures of the call sites.
+
+        :param sort: (optional) the column by which the call sites are sorted, in descending order: 'time', 'calls' or
+                     'failures'.
+        :return: a list of dictionaries, one per call site and contract, with the following keys: 'file', 'line' and
+                 'function' (the location of the call site), 'contract' (e.g. 'contract.is_not_none'), 'calls',
+                 'failures', 'seconds' (the inclusive time) and 'share' (the share of the total runtime).
+        :raises ValueError: if the sort column is unknown.
+        """
+        if sort not in _SORT_KEYS:
+            raise ValueError("The sort column must be one of {0}.".format(", ".join(_SORT_KEYS)))
+
+        # Instructions of the same line are merged into a single call site.
+        runtime = self._get_runtime()
+        merged = {}
+        for ((code, offset), name_code), (calls, failures, seconds) in list(self._sites.items()):
+            key = (code.co_filename, _callsite.line_number(code, offset), code.co_name, _get_contract_name(name_code))
+            site = merged.get(key)
+            if site is None:
+                site = merged[key] = {"file": key[0], "line": key[1], "function": key[2], "contract": key[3],
+                                      "calls": 0, "failures": 0, "seconds": 0.0}
+            site["calls"] += calls
+            site["failures"] += failures
+            site["seconds"] += seconds
+        for site in merged.values():
+            site["share"] = site["seconds"] / runtime if runtime else 0.0
+        return sorted(merged.values(), key=lambda site: site[_SORT_KEYS[sort]], reverse=True)
+
+    def format_table(self, sort="time", limit=None):
+        """
+        Formats the measures of the call sites as a table.
+
+        :param sort: (optional) the column by which the call sites are sorted, as in :meth:`get_call_sites`.
+        :param limit: (optional) the maximum number of call sites in the table. By default, all of them are.
+        :return: the table, as a string.
+        :raises ValueError: if the sort column is unknown.
+        """
+        sites = self.get_call_sites(sort)
+        lines = ["Contract calls by call site (total runtime: {0:.6f} s):".format(self._get_runtime()), "",
+                 _TABLE_HEADER]
+        lines.extend(_TABLE_ROW.format(site="{0}:{1}".format(site["file"], site["line"]), **site)
+                     for site in sites[:limit])
+        if limit is not None and len(sites) > limit:
+            lines.append("... ({0} more call sites)".format(len(sites) - limit))
+        return "\n".join(lines) + "\n"
+
+    def write_collapsed_stacks(self, file):
+        """
+        Writes the stacks of the calls to contracts and assertions in the collapsed format of flamegraph.pl, one line
+        per stack, weighted by their inclusive time in microseconds.
+
+        :param file: the text file to write to.
+        """
+        for (stack, name_code), seconds in list(self._stacks.items()):
+            frames = ["{0} ({1}:{2})".format(code.co_name, code.co_filename, _callsite.line_number(code, offset))
+                      for code, offset in stack]
+            frames.append(_get_contract_name(name_code))
+            file.write("{0} {1}\n".format(";".join(frame.replace(";", ":") for frame in frames),
+                                          max(1, round(seconds * 1e6))))
+
+    def _get_runtime(self):
+        if self._enabled_at is None:
+            return self._runtime
+        return self._runtime + time.perf_counter() - self._enabled_at
+
+    def _enable_monitoring(self):
+        # Returns False if another tool (e.g. cProfile) already uses the profiler slot.
+        monitoring = sys.monitoring
+        try:
+            monitoring.use_tool_id(monitoring.PROFILER_ID, "contracts.profile")
+        except ValueError:
+            return False
+
+        # Locations disabled by a previous profiler are reported again. Generators and coroutines exit whenever they're
+        # suspended, and enter again whenever they're resumed, like with sys.setprofile().
+        monitoring.restart_events()
+        callbacks = {"PY_START": self._on_start, "PY_RESUME": self._on_start, "PY_THROW": self._on_throw,
+                     "PY_RETURN": self._on_return, "PY_YIELD": self._on_return, "PY_UNWIND": self._on_unwind}
+        events = 0
+        for event in _MONITORING_ENTER_EVENTS + _MONITORING_EXIT_EVENTS:
+            monitoring.register_callback(monitoring.PROFILER_ID, getattr(monitoring.events, event), callbacks[event])
+            events |= getattr(monitoring.events, event)
+        monitoring.set_events(monitoring.PROFILER_ID, events)
+        return True
+
+    def _on_start(self, code, offset):
+        if not self._is_profiled(code):
+            return sys.monitoring.DISABLE
+        self._enter(code, sys._getframe(1))
+
+    def _on_throw(self, code, offset, exception):
+        if self._is_profiled(code):
+            self._enter(code, sys._getframe(1))
+
+    def _on_return(self, code, offset, value):
+        if not self._is_profiled(code):
+            return sys.monitoring.DISABLE
+        self._exit(False, value)
+
+    def _on_unwind(self, code, offset, exception):
+        if self._is_profiled(code):
+            self._exit(True)
+
+    def _profile(self, frame, event, argument):
+        if event == "call":
+            if self._is_profiled(frame.f_code):
+                self._enter(frame.f_code, frame)
+        elif event == "return" and self._is_profiled(frame.f_code):
+            # The profile function can't tell returned values from raised exceptions, but the instruction on which
+            # the frame stopped can.
+            failed = frame.f_code.co_code[frame.f_lasti] not in _RETURN_OPCODES
+            self._exit(failed, None if failed else argument)
+
+    def _is_profiled(self, code):
+        verdict = self._verdicts.get(id(code))
+        if verdict is None or verdict[0] is not code:
+            verdict = self._verdicts[id(code)] = (code, code.co_filename in _PROFILED_FILES or
+                                                  code.co_filename.startswith(_ALL_OF_FILE_PREFIX))
+        return verdict[1]
+
+    def _enter(self, code, frame):
+        state = self._states.get(threading.get_ident())
+        if state is None:
+            state = self._states[threading.get_ident()] = [0, 0.0, None, None, None, False]
+        if state[0] == 0:
+            caller = contract._skip_internal_frames(frame.f_back)
+            state[2] = (caller.f_code, caller.f_lasti)
+            state[3] = _get_stack(caller)
+            state[4] = code
+            state[5] = _is_public(code)
+            if not state[5]:
+                # The items of the iterators returned by contracts are checked by generators or internal methods, named
+                # after the contract instead.
+                iterator_code = self._get_iterator_code(frame)
+                if iterator_code is not None:
+                    state[4] = iterator_code
+                    state[5] = True
+            state[1] = time.perf_counter()
+        elif not state[5] and _is_public(code):
+            # The contract is named after the first public function called, rather than the wrappers installed by
+            # sampling, shadow mode or metrics, and their helpers.
+            state[4] = code
+            state[5] = True
+        state[0] += 1
+
+    def _exit(self, failed, value=None):
+        end = time.perf_counter()
+        state = self._states.get(threading.get_ident())
+        if state is None or state[0] == 0:
+            # The call started before the profiler was enabled.
+            return
+        state[0] -= 1
+        if state[0]:
+            return
+
+        seconds = end - state[1]
+        site = self._sites.get((state[2], state[4]))
+        if site is None:
+            site = self._sites[(state[2], state[4])] = [0, 0, 0.0]
+        site[0] += 1
+        site[1] += failed
+        site[2] += seconds
+        stack_key = (state[3], state[4])
+        self._stacks[stack_key] = self._stacks.get(stack_key, 0.0) + seconds
+        if state[5] and value is not None:
+            self._add_iterator(value, state[4])
+
+    def _add_iterator(self, value, code):
+        # Remembers the contract that returned an iterator checking items, if it's one.
+        if inspect.isgenerator(value) and value.gi_frame is not None and self._is_profiled(value.gi_code):
+            key = id(value.gi_frame)
+        elif type(value) is contract._CheckedAsyncIterator:
+            key = id(value)
+        else:
+            return
+
+        def remove(reference):
+            if self._iterators.get(key, (None,))[0] is reference:
+                del self._iterators[key]
+
+        self._iterators[key] = (weakref.ref(value, remove), code)
+
+    def _get_iterator_code(self, frame):
+        # Returns the code of the contract that returned the iterator running in a frame, or None.
+        entry = self._iterators.get(id(frame))
+        if entry is not None:
+            generator = entry[0]()
+            if generator is not None and generator.gi_frame is frame:
+                return entry[1]
+        if id(frame.f_code) in _CHECKED_ITERATOR_CODE_IDS:
+            iterator = frame.f_locals.get("self")
+            entry = self._iterators.get(id(iterator))
+            if entry is not None and entry[0]() is iterator:
+                return entry[1]
+        return None
+
+
+def _get_stack(frame):
+    # Returns the call sites of the stack, from the outermost, up to the frames that run the profiled program.
+    stack = []
+    while frame is not None and frame.f_code.co_filename not in _RUNNER_FILES:
+        stack.append((frame.f_code, frame.f_lasti))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _is_public(code):
+    return id(code) not in contract._internal_code_ids and not code.co_name.startswith("_")
+
+
+def _get_contract_name(code):
+    module_name = _PROFILED_FILES.get(code.co_filename, "contract")
+    return "{0}.{1}".format(module_name, "all_of" if code.co_filename.startswith(_ALL_OF_FILE_PREFIX) else
+                            code.co_name)
+
+
+# Files of the frames that run the profiled program, which are left out of the stacks.
+_RUNNER_FILES = frozenset((runpy.run_path.__code__.co_filename, __file__))
+
+
+def main(arguments=None):
+    """
+    Runs a script or a module under the profiler, and prints the table of the call sites of its contracts.
+
+    :param arguments: (optional) the command line arguments. By default, those of the process are used.
+    :return: the exit status of the profiled program.
+    """
+    parser = argparse.ArgumentParser(prog="python -m contracts.profile",
+                                     description="Attributes the runtime cost of contracts and assertions to the "
+                                                 "lines of code calling them.")
+    parser.add_argument("-o", "--outfile", help="writes the collapsed stacks of the calls to this file, for flame "
+                                                "graphs")
+    parser.add_argument("-s", "--sort", choices=sorted(_SORT_KEYS), default="time",
+                        help="sorts the call sites by this column (default: time)")
+    parser.add_argument("-n", "--limit", type=int, help="prints at most this number of call sites")
+    parser.add_argument("-m", dest="module", action="store_true", help="runs a module rather than a script")
+    parser.add_argument("target", help="the script or module to run")
+    parser.add_argument("arguments", nargs=argparse.REMAINDER, help="the arguments of the script or module")
+    options = parser.parse_args(arguments)
+
+    sys.argv = [options.target] + options.arguments
+    if options.module:
+        sys.path.insert(0, os.getcwd())
+    else:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(options.target)))
+
+    status = 0
+    profiler = Profiler()
+    try:
+        with profiler:
+            if options.module:
+                runpy.run_module(options.target, run_name="__main__", alter_sys=True)
+            else:
+                runpy.run_path(options.target, run_name="__main__")
+    except SystemExit as exit_exception:
+        status = exit_exception.code
+    finally:
+        sys.stdout.write(profiler.format_table(options.sort, options.limit))
+        if options.outfile:
+            with open(options.outfile, "w", encoding="utf-8") as file:
+                profiler.write_collapsed_stacks(file)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+"""
+Module validating records (e.g. dictionaries decoded from JSON) in bulk, against a spec declared with contracts.
+
+A spec maps the name of each field to its contracts, and is compiled once into a validator function, in which the
+simplest contracts are inlined as a single condition and the other ones are replaced by their predicate. Valid records
+are thus checked without calling any contract nor raising any exception:
+
+.. code-block:: python
+
+   >>> from contracts import contract, records
+   >>> validate_order = records.compile_validator({
+   ...     "id": contract.is_not_none,
+   ...     "name": [(contract.is_instance, str), contract.is_not_empty],
+   ...     "quantity": [(contract.is_instance, int), (contract.is_greater_than, 0)],
+   ...     "status": (contract.is_equal_to_any, ("new", "paid")),
+   ... })
+   >>> for row, violations in records.iter_jsonl_violations("orders.jsonl", validate_order):
+   ...     print(row, violations)
+
+Validators always check their contracts, regardless of the enforcement level set in :mod:`contracts.contract`.
+"""
+
+import collections
+import concurrent.futures
+import io
+import itertools
+import json
+import linecache
+import os
+from . import contract
+
+# Number of records validated at once by the streaming functions, which bounds their memory usage.
+_DEFAULT_CHUNK_SIZE = 1024
+
+# Number of chunks submitted to each worker process ahead of time by iter_violations_in_parallel, which bounds the
+# number of records in flight.
+_DEFAULT_PENDING_CHUNKS_PER_WORKER = 2
+
+# Name used in error messages about a record as a whole.
+_RECORD_NAME = "record"
+
+_RECORD_MESSAGE = "{name} with type {type} was not a mapping."
+_JSON_MESSAGE = "{name} was not valid JSON: {expected}."
+_UNCHECKABLE_MESSAGE = "{name} with value {value} and type {type} could not be checked by {expected}."
+
+# Prefix of the names of the generated validators' globals.
+_GENERATED_PREFIX = "__contracts_"
+
+
+def compile_validator(spec):
+    """
+    Compiles a record spec into a validator function.
+
+    :param spec: the contracts to check, keyed by field name. Each contract is either a check function (e.g.
+                 `contract.is_not_empty`), a tuple containing a check function followed by its extra arguments (e.g.
+                 `(contract.is_greater_than, 0)`), or a list of those, checked in turn. A check function may also be
+                 any callable raising :class:`~contracts.contract.ContractViolation` exceptions. Missing fields are
+                 checked as None.
+    :return: a :class:`Validator`.
+    """
+    return Validator({field: contract._normalize_conditions(value) for field, value in spec.items()})
+
+
+def iter_violations(records, validator, chunk_size=_DEFAULT_CHUNK_SIZE, start=1):
+    """
+    Validates records, chunk by chunk, and yields the violations of the invalid ones.
+
+    :param records: an :class:`~collections.abc.Iterable` object containing the records. It's consumed lazily, so it
+                    may be a generator over more records than fit in memory.
+    :param validator: a validator function returned by :func:`compile_validator`.
+    :param chunk_size: (optional) the number of records validated at once.
+    :param start: (optional) the row number of the first record.
+    :return: an iterator over (row number, violations) tuples.
+    """
+    iterator = iter(records)
+    row = start
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        for index in validator._find_invalid(chunk):
+            violations = validator._validate(chunk[index])
+            if violations:
+                yield row + index, violations
+        row += len(chunk)
+
+
+def iter_violations_in_parallel(records, validator, chunk_size=_DEFAULT_CHUNK_SIZE, max_workers=None):
+    """
+    Validates records like :func:`iter_violations`, but fans chunks of records out to a pool of worker processes. The
+    violations are still yielded in the order of the records.
+
+    Records are read lazily, and only a couple of chunks per worker are in flight at any time, so memory usage stays
+    bounded whatever the number of records. Since records are pickled to be sent to the workers, this pays off for
+    validators checking many fields, or expensive contracts.
+
+    :param records: an :class:`~collections.abc.Iterable` object containing the records. They must be picklable.
+    :param validator: a validator returned by :func:`compile_validator`. It's sent once to each worker process.
+    :param chunk_size: (optional) the number of records sent to a worker process at once.
+    :param max_workers: (optional) the number of worker processes. Defaults to the number of processors.
+    :return: an iterator over (row number, violations) tuples, where row numbers start at 1.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    iterator = iter(records)
+    row = 1
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers, initializer=_set_worker_validator,
+                                                initargs=(validator,)) as executor:
+        while True:
+            while len(pending) < max_workers * _DEFAULT_PENDING_CHUNKS_PER_WORKER:
+                chunk = list(itertools.islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_find_violations_in_worker, chunk, row))
+                row += len(chunk)
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def iter_jsonl_violations(file, validator, chunk_size=_DEFAULT_CHUNK_SIZE):
+    """
+    Validates the records of a JSON Lines file (one JSON object per line), chunk by chunk, and yields the violations of
+    the invalid ones. Blank lines are skipped.
+
+    :param file: the path of the file, or a file object opened in text or binary mode.
+    :param validator: a validator function returned by :func:`compile_validator`.
+    :param chunk_size: (optional) the number of records validated at once.
+    :return: an iterator over (line number, violations) tuples. Lines that aren't valid JSON are reported with a
+             :class:`~contracts.contract.ContractValueError`.
+    """
+    if isinstance(file, (str, bytes, os.PathLike)):
+        with io.open(file, "rb") as opened_file:
+            yield from iter_jsonl_violations(opened_file, validator, chunk_size)
+        return
+
+    row = 1
+    while True:
+        lines = list(itertools.islice(file, chunk_size))
+        if not lines:
+            return
+        chunk = []
+        rows = []
+        for index, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield row + index, [contract.ContractValueError(_JSON_MESSAGE, line, error, None, _RECORD_NAME)]
+                continue
+            chunk.append(record)
+            rows.append(row + index)
+        for index in validator._find_invalid(chunk):
+            violations = validator._validate(chunk[index])
+            if violations:
+                yield rows[index], violations
+        row += len(lines)
+
+
+class Validator:
+    """
+    Validator compiled from a record spec by :func:`compile_validator`. It's called with a record (a mapping), and
+    returns the list of the violated contracts, as :class:`~contracts.contract.ContractViolation` exceptions named after
+    their field. At most one contract is reported per field, and the list is empty if the record is valid.
+
+    Validators can be pickled (e.g. to be sent to other processes) if the custom check functions of their spec can,
+    i.e. if they're defined at the top level of a module.
+    """
+    __slots__ = ("_fields", "_validate", "_find_invalid")
+
+    def __init__(self, fields):
+        """
+        :param fields: the contracts to check, keyed by field name, as lists of (check function, extra arguments)
+                       tuples.
+        """
+        self._fields = fields
+        self._validate, self._find_invalid = _ValidatorGenerator(fields).generate()
+
+    def __call__(self, record):
+        return self._validate(record)
+
+    def __reduce__(self):
+        # The check functions of this library are pickled by name, since their public names may be rebound to other
+        # functions (e.g. under another enforcement level).
+        fields = {field: [(check.__name__ if contract._get_registered_check(check) else check, arguments)
+                          for check, arguments in conditions] for field, conditions in self._fields.items()}
+        return _load_validator, (fields,)
+
+
+def _load_validator(fields):
+    return Validator({field: [(contract._checks[check][0] if isinstance(check, str) else check, arguments)
+                              for check, arguments in conditions] for field, conditions in fields.items()})
+
+
+# Validator of the current worker process of iter_violations_in_parallel.
+_worker_validator = None
+
+
+def _set_worker_validator(validator):
+    global _worker_validator
+    _worker_validator = validator
+
+
+def _find_violations_in_worker(chunk, row):
+    return list(iter_violations(chunk, _worker_validator, len(chunk), row))
+
+
+def _get_violations(fields, record):
+    # Checks the fields of a record one by one, with the implementations of the contracts.
+    if not callable(getattr(record, "get", None)):
+        return [contract.ContractTypeError(_RECORD_MESSAGE, record, None, None, _RECORD_NAME)]
+
+    violations = []
+    for field, conditions in fields.items():
+        value = record.get(field)
+        for check, arguments in conditions:
+            registered = contract._get_registered_check(check)
+            try:
+                (registered[0] if registered else check)(value, *arguments)
+            except contract.ContractViolations as exception:
+                violations.extend(exception.violations)
+            except contract.ContractViolation as exception:
+                exception._parameter_name = str(field)
+                violations.append(exception)
+            except Exception:
+                # e.g. comparing a string to a number.
+                violations.append(contract.ContractTypeError(_UNCHECKABLE_MESSAGE, value,
+                                                             getattr(check, "__name__", check), None, str(field)))
+            else:
+                continue
+            break
+    return violations
+
+
+class _ValidatorGenerator:
+    """
+    Generates the source code of a validator checking the fields of records.
+    """
+
+    def __init__(self, fields):
+        self._fields = fields
+        self._globals = {_GENERATED_PREFIX + "fields": fields, _GENERATED_PREFIX + "get_violations": _get_violations}
+
+    def generate(self):
+        # Returns the function validating a record, and the function returning the indexes of the invalid records of a
+        # chunk, which avoids a call per record. Both read the fields and evaluate the conditions the same way. Any
+        # failure, including a condition that can't be evaluated, leads to the record being checked again by
+        # _get_violations.
+        names = []
+        conditions = []
+        calls = []
+        for index, (field, field_conditions) in enumerate(self._fields.items()):
+            name = "{0}value_{1}".format(_GENERATED_PREFIX, index)
+            names.append("{0} = get({1})".format(name, self._add_global(field)))
+            for check, arguments in field_conditions:
+                registered = contract._get_registered_check(check)
+                condition = None if registered is None else self._get_condition(registered[0], name, arguments)
+                if condition is None:
+                    # Contracts are checked whatever the enforcement level, so their implementation is called.
+                    implementation = check if registered is None else registered[0]
+                    calls.append("{0}({1})".format(self._add_global(implementation), ", ".join(
+                        [name] + [self._add_global(argument) for argument in arguments])))
+                else:
+                    conditions.append(condition)
+
+        def get_body(valid_statement):
+            body = calls + [valid_statement]
+            if conditions:
+                body = ["if not ({0}):".format(" or ".join(conditions))] + ["    " + line for line in body]
+            return ["try:", "    get = record.get"] + ["    " + line for line in names + body] + \
+                ["except Exception:", "    pass"]
+
+        lines = ["def validate(record):"]
+        lines.extend("    " + line for line in get_body("return []"))
+        lines.append("    return {0}get_violations({0}fields, record)".format(_GENERATED_PREFIX))
+        lines.extend(["", "", "def find_invalid(records):", "    invalid = []",
+                      "    for index, record in enumerate(records):"])
+        lines.extend("        " + line for line in get_body("continue"))
+        lines.extend(["        invalid.append(index)", "    return invalid"])
+        source = "\n".join(lines) + "\n"
+
+        # The source code is registered in the line cache, so that it appears in tracebacks.
+        filename = "<contracts validator of {0}>".format(", ".join(str(field) for field in self._fields))
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+        exec(compile(source, filename, "exec"), self._globals)
+        return self._globals["validate"], self._globals["find_invalid"]
+
+    def _get_condition(self, implementation, name, arguments):
+        # Returns the failure condition of a contract, or None if the contract has to be called.
+        check_name = implementation.__name__
+        inline_check = contract._INLINE_CHECKS.get(check_name)
+        if inline_check and len(arguments) == ("{expected}" in inline_check[0]):
+            expected = self._add_global(arguments[0]) if arguments else "None"
+            return inline_check[0].format(value=name, expected=expected)
+
+        # The other contracts are replaced by their predicate (e.g. check_not_empty for is_not_empty).
+        predicate = getattr(contract, "check_" + check_name[3:] if check_name.startswith("is_") else
+                            "check_" + check_name)
+        if check_name == "is_not_empty":
+            # The built-in sized types are empty if and only if they're false, which spares calling the predicate on
+            # the most common field values.
+            return "(not {0} if type({0}) in {1} else not {2}({0}))".format(
+                name, self._add_global(contract._SIZED_TYPES), self._add_global(predicate))
+        if check_name == "is_equal_to_any" and len(arguments) == 1:
+            # Hashable expected values are looked up in a set (unhashable values then fail the condition).
+            try:
+                return "{0} not in {1}".format(name, self._add_global(frozenset(arguments[0])))
+            except TypeError:
+                pass
+        if len(arguments) != predicate.__code__.co_argcount - 1:
+            # e.g. an expression string passed to is_true.
+            return None
+        return "not {0}({1})".format(self._add_global(predicate), ", ".join(
+            [name] + [self._add_global(argument) for argument in arguments]))
+
+    def _add_global(self, value):
+        name = "{0}{1}".format(_GENERATED_PREFIX, len(self._globals))
+        self._globals[name] = value
+        return name
@@ -87,3 +87,54 @@ def contract_is_instance(a):
     contract.is_instance(a, int)
 
 contract_is_instance(1)
+
+
+def contract_all_in_range(a):
+    contract.all_in_range(a, 0, 100)
+
+contract_all_in_range(bytes([0, 50, 100]))
+
+
+def contract_all_non_negative(a):
+    contract.all_non_negative(a)
+
+contract_all_non_negative(memoryview(bytes([0, 1, 2])).cast("b"))
+
+
+def contract_is_sorted(a):
+    contract.is_sorted(a)
+
+contract_is_sorted(b"abc")
+
+
+def contract_all_equal(a):
+    contract.all_equal(a, b"abc")
+
+contract_all_equal(bytearray(b"abc"))
+
+
+def contract_iter_not_empty(a):
+    return list(contract.iter_not_empty(a))
+
+contract_iter_not_empty(i for i in range(3))
+
+
+def contract_iter_all_have_attribute(a):
+    return list(contract.iter_all_have_attribute(a, "abc"))
+
+contract_iter_all_have_attribute(ClassA() for _ in range(3))
+
+
+def contract_iter_all_have_method(a):
+    return list(contract.iter_all_have_method(a, "my_method"))
+
+contract_iter_all_have_method(ClassC() for _ in range(3))
+
+
+is_valid_code = contract.one_of(["A1", "B2", "C3"])
+
+
+def contract_one_of(a):
+    is_valid_code(a)
+
+contract_one_of("B2")
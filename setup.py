@@ -16,7 +16,7 @@ setup(name=contracts.__title__,
       license=contracts.__license__,
       packages=['contracts'],
       zip_safe=False,
-      python_requires="~=3.3",
+      python_requires=">=3.11",
       install_requires=[],
       classifiers=(
           'Development Status :: 4 - Beta',
@@ -25,10 +25,9 @@ setup(name=contracts.__title__,
           'License :: OSI Approved :: Apache Software License',
           'Programming Language :: Python',
           'Programming Language :: Python :: 3',
-          'Programming Language :: Python :: 3.3',
-          'Programming Language :: Python :: 3.4',
-          'Programming Language :: Python :: 3.5',
-          'Programming Language :: Python :: 3.6',
+          'Programming Language :: Python :: 3.11',
+          'Programming Language :: Python :: 3.12',
+          'Programming Language :: Python :: 3.13',
           'Programming Language :: Python :: Implementation :: CPython',
           'Programming Language :: Python :: Implementation :: PyPy'
       ))
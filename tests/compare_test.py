@@ -0,0 +1,80 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from benchmarks import compare
+
+_BASELINE_RESULTS = [
+    {"function": "is_not_none", "path": "pass", "size": "small", "contract_ns": 100.0, "ratio": 2.0},
+    {"function": "is_not_empty", "path": "pass", "size": "small", "contract_ns": 200.0, "ratio": 4.0},
+    {"function": "is_equal_to_any", "path": "pass", "size": "large", "contract_ns": 300.0, "ratio": 3.0},
+]
+
+
+class CompareTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the comparison of benchmark results to a baseline.
+    """
+
+    def test_compare(self):
+        current_results = [dict(_BASELINE_RESULTS[0], contract_ns=105.0, ratio=3.0),
+                           dict(_BASELINE_RESULTS[1], contract_ns=300.0, ratio=4.0)]
+        comparisons = compare.compare(_BASELINE_RESULTS, current_results)
+        self.assertEqual([(comparison["function"], comparison["regressed"]) for comparison in comparisons],
+                         [("is_not_none", False), ("is_not_empty", True)])
+        self.assertAlmostEqual(comparisons[1]["change"], 0.5)
+
+        comparisons = compare.compare(_BASELINE_RESULTS, current_results, relative=True)
+        self.assertEqual([comparison["regressed"] for comparison in comparisons], [True, False])
+
+    def test_zero_baseline(self):
+        baseline_results = [dict(_BASELINE_RESULTS[0], contract_ns=0.0), dict(_BASELINE_RESULTS[1], contract_ns=0.0)]
+        current_results = [dict(_BASELINE_RESULTS[0], contract_ns=0.0), _BASELINE_RESULTS[1]]
+        comparisons = compare.compare(baseline_results, current_results)
+        self.assertEqual([(comparison["change"], comparison["regressed"]) for comparison in comparisons],
+                         [(0.0, False), (float("inf"), True)])
+        status, output = _run_main(baseline_results, current_results)
+        self.assertEqual(status, 1)
+        self.assertIn("1 of 2 benchmarks regressed by more than 10%.", output)
+
+    def test_new_benchmark(self):
+        current_results = _BASELINE_RESULTS + [dict(_BASELINE_RESULTS[0], size="large")]
+        self.assertEqual(len(compare.compare(_BASELINE_RESULTS, current_results)), 3)
+        self.assertEqual(compare.find_missing(_BASELINE_RESULTS, current_results), [])
+
+    def test_find_missing(self):
+        # A deleted or renamed benchmark is missing from the current run.
+        current_results = [_BASELINE_RESULTS[1], dict(_BASELINE_RESULTS[2], function="is_equal_to")]
+        self.assertEqual(compare.find_missing(_BASELINE_RESULTS, current_results),
+                         [{"function": "is_not_none", "path": "pass", "size": "small"},
+                          {"function": "is_equal_to_any", "path": "pass", "size": "large"}])
+
+    def test_main(self):
+        self.assertEqual(_run_main(_BASELINE_RESULTS, _BASELINE_RESULTS)[0], 0)
+        status, output = _run_main(_BASELINE_RESULTS, [dict(_BASELINE_RESULTS[0], contract_ns=200.0)])
+        self.assertEqual(status, 1)
+        self.assertIn("1 of 1 benchmarks regressed by more than 10%.", output)
+
+    def test_main_with_missing_benchmarks(self):
+        status, output = _run_main(_BASELINE_RESULTS, _BASELINE_RESULTS[:2])
+        self.assertEqual(status, 1)
+        self.assertRegex(output, r"is_equal_to_any +pass +large .* MISSING")
+        self.assertIn("0 of 2 benchmarks regressed by more than 10%.", output)
+        self.assertIn("1 benchmarks of the baseline are missing.", output)
+
+
+def _run_main(baseline_results, current_results):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for name, results in (("baseline.json", baseline_results), ("current.json", current_results)):
+            paths.append(os.path.join(directory, name))
+            with open(paths[-1], "w", encoding="utf-8") as file:
+                json.dump({"results": results}, file)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            status = compare.main(paths)
+    return status, output.getvalue()
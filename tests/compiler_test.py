@@ -0,0 +1,214 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest.mock import patch
+from contracts import assertion
+from contracts import compiler
+from contracts import contract
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_SOURCE = textwrap.dedent('''
+    """Docstring."""
+    from contracts import contract
+    from contracts.contract import is_not_none
+
+
+    def build_rocket(name, model, company):
+        is_not_none(name)
+        contract.is_greater_than(model, 0)
+        contract.is_true(model < 100, "model < 100")
+        contract.is_not_empty(company)
+        return name
+    ''')
+
+
+class CompilerTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the rewriting of contracts.
+    """
+
+    def test_inline(self):
+        build_rocket = _compile(_SOURCE)["build_rocket"]
+        self.assertEqual(build_rocket("Falcon", 9, "SpaceX"), "Falcon")
+        assertion.raises_with_msg(TypeError, build_rocket, "name was equal to None.", None, 9, "SpaceX")
+        assertion.raises_with_msg(contract.ContractValueError, build_rocket,
+                                  "model with value 0 was not greater than 0.", "Falcon", 0, "SpaceX")
+        assertion.raises_with_msg(ValueError, build_rocket, "company was empty.", "Falcon", 9, "")
+
+        # Only the contract that can't be inlined is still called. The comparisons are only called when their condition
+        # can't be evaluated (e.g. on a NumPy array).
+        called_names = set(build_rocket.__code__.co_names)
+        self.assertNotIn("is_not_none", called_names)
+        self.assertNotIn("is_true", called_names)
+        self.assertIn("is_not_empty", called_names)
+        with patch.object(contract, "is_greater_than") as is_greater_than_mock:
+            build_rocket("Falcon", 9, "SpaceX")
+            is_greater_than_mock.assert_not_called()
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_inline_arrays(self):
+        namespace = _compile("from contracts import contract\n"
+                             "def check(models):\n"
+                             "    contract.is_greater_than(models, 0)\n"
+                             "    contract.is_equal(models.ndim, 1)\n"
+                             "    return models\n")
+        self.assertEqual(namespace["check"](numpy.array([1, 9])).tolist(), [1, 9])
+        assertion.raises_with_msg(ValueError, namespace["check"],
+                                  "models has 1 of 2 items not greater than 0: 0 at index 1.", numpy.array([1, 0]))
+
+    def test_inline_with_expression_str(self):
+        build_rocket = _compile(_SOURCE)["build_rocket"]
+        assertion.raises_with_msg(ValueError, build_rocket, "model < 100 was not True.", "Falcon", 100, "SpaceX")
+
+    def test_calls_with_side_effects_are_not_inlined(self):
+        namespace = _compile("from contracts import contract\n"
+                             "def check(a):\n"
+                             "    contract.is_greater_than(len(a), 0)\n")
+        self.assertIn("is_greater_than", namespace["check"].__code__.co_names)
+        assertion.raises_with_msg(ValueError, namespace["check"], "len(a) with value 0 was not greater than 0.", [])
+
+    def test_strip(self):
+        namespace = _compile(_SOURCE + textwrap.dedent('''
+            import contracts.assertion
+
+
+            def check_only(a):
+                if a:
+                    contracts.assertion.raises(ValueError, int, a)
+                    contract.is_not_none(a)
+                return a
+            '''), compiler.STRIP)
+        self.assertEqual(namespace["build_rocket"](None, 0, ""), None)
+        self.assertEqual(namespace["check_only"]("dummy"), "dummy")
+        for function in (namespace["build_rocket"], namespace["check_only"]):
+            self.assertFalse({"contract", "contracts", "is_not_none"} & set(function.__code__.co_names))
+
+    def test_strip_iterator_checks(self):
+        namespace = _compile(_SOURCE + textwrap.dedent('''
+            def first(items):
+                return next(contract.iter_not_empty(contract.iter_all_have_attribute(items, "real")), None)
+            '''), compiler.STRIP)
+        self.assertEqual(namespace["first"](iter([])), None)
+        self.assertEqual(namespace["first"](iter(["dummy"])), "dummy")
+        self.assertFalse({"contract", "iter_not_empty"} & set(namespace["first"].__code__.co_names))
+
+    def test_strip_decorators(self):
+        namespace = _compile(_SOURCE + textwrap.dedent('''
+            import functools
+            from contracts.contract import typechecked
+
+
+            @contract.requires(name=contract.is_not_empty)
+            @functools.lru_cache
+            @contract.ensures(contract.is_not_none)
+            def name_rocket(name):
+                return name or None
+
+
+            @typechecked
+            def count_stages(stages: list[int]) -> int:
+                return len(stages)
+
+
+            @contract.typechecked(inspection=contract.ALL_ITEMS)
+            async def count_boosters(boosters: list[int]) -> int:
+                return len(boosters)
+            '''), compiler.STRIP)
+        self.assertEqual(namespace["name_rocket"].__wrapped__(""), None)
+        self.assertEqual(namespace["count_stages"](["1"]), 1)
+        self.assertFalse(hasattr(namespace["count_boosters"], "__wrapped__"))
+
+    def test_imported_lazily(self):
+        code = ("import sys, contracts; print('contracts.compiler' in sys.modules, 'importlib.abc' in sys.modules, "
+                "contracts.compiler.STRIP)")
+        self.assertEqual(subprocess.check_output([sys.executable, "-c", code], text=True).split(),
+                         ["False", "False", "strip"])
+
+    def test_unknown_mode(self):
+        assertion.raises(ValueError, compiler.compile_source, "", "<test>", "dummy")
+
+    @patch.object(sys, "dont_write_bytecode", False)
+    def test_import_hook(self):
+        with _TestPackage() as package:
+            compiler.install("compiler_test_package")
+            compiler.install("compiler_test_package.stripped", mode=compiler.STRIP)
+
+            from compiler_test_package import rockets, stripped
+            self.assertNotIn("is_true", rockets.build_rocket.__code__.co_names)
+            assertion.raises_with_msg(ValueError, rockets.build_rocket, "model with value 0 was not greater than 0.",
+                                      "Falcon", 0, "SpaceX")
+            assertion.does_not_raise(ValueError, stripped.build_rocket, "Falcon", 0, "SpaceX")
+
+            # The rewritten bytecode is cached, under a name distinct from the regular bytecode.
+            cached_files = " ".join(os.listdir(os.path.join(package.directory, "compiler_test_package", "__pycache__")))
+            self.assertRegex(cached_files, r"rockets\.\S+\.opt-contractsinline\.pyc")
+            self.assertRegex(cached_files, r"stripped\.\S+\.opt-contractsstrip\.pyc")
+
+            package.unload()
+            with patch("contracts.compiler.compile_source") as compile_source_mock:
+                from compiler_test_package import rockets
+                compile_source_mock.assert_not_called()
+            assertion.raises(ValueError, rockets.build_rocket, "Falcon", 0, "SpaceX")
+
+    @patch.object(sys, "dont_write_bytecode", False)
+    def test_stale_cache(self):
+        # The cache is discarded when the library is upgraded, or when the inlined checks or the names of the
+        # contracts and decorators change.
+        inline_checks = {"is_true": ("{value} is not True", "ContractValueError", "{name} was false.")}
+        with _TestPackage() as package:
+            compiler.install("compiler_test_package")
+            from compiler_test_package import rockets
+            patchers = (patch("contracts.__version__", "99.0.0"),
+                        patch.dict(contract._checks, {"is_launchable": (contract.is_true, contract.FULL)}),
+                        patch.object(compiler, "_DECORATORS", compiler._DECORATORS | {"launchable"}),
+                        patch.dict(contract._INLINE_CHECKS, inline_checks))
+            for patcher in patchers:
+                package.unload()
+                with patcher, patch("contracts.compiler.compile_source", wraps=compiler.compile_source) as \
+                        compile_source_mock:
+                    from compiler_test_package import rockets
+                    self.assertIn(rockets.__file__, [call.args[1] for call in compile_source_mock.call_args_list])
+            assertion.raises_with_msg(ValueError, rockets.build_rocket, "model < 100 was false.", "Falcon", 100, "")
+
+
+class _TestPackage:
+    """
+    Context manager creating a temporary package importable as 'compiler_test_package'.
+    """
+    _MODULES = ("compiler_test_package", "compiler_test_package.rockets", "compiler_test_package.stripped")
+
+    def __enter__(self):
+        self._temporary_directory = tempfile.TemporaryDirectory()
+        self.directory = self._temporary_directory.name
+        package_directory = os.path.join(self.directory, "compiler_test_package")
+        os.mkdir(package_directory)
+        for name, source in (("__init__.py", ""), ("rockets.py", _SOURCE), ("stripped.py", _SOURCE)):
+            with open(os.path.join(package_directory, name), "w") as f:
+                f.write(source)
+        sys.path.insert(0, self.directory)
+        return self
+
+    def __exit__(self, *args):
+        compiler.uninstall()
+        sys.path.remove(self.directory)
+        self.unload()
+        self._temporary_directory.cleanup()
+
+    def unload(self):
+        for name in self._MODULES:
+            sys.modules.pop(name, None)
+
+
+def _compile(source, mode=compiler.INLINE):
+    namespace = {}
+    exec(compiler.compile_source(source, "<test>", mode), namespace)
+    return namespace
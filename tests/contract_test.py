@@ -1,9 +1,33 @@
 # Copyright 2017 Benoit Bernard All Rights Reserved.
 
+import array
+import asyncio
+import collections
+import ctypes
+import dataclasses
+import functools
+import inspect
+import json
+import pickle
+import subprocess
+import sys
+import threading
+import typing
 import unittest
+from unittest.mock import patch
 from contracts import assertion
 from contracts import contract
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
 
 class ContractsTests(unittest.TestCase):
     """
@@ -38,6 +62,46 @@ class ContractsTests(unittest.TestCase):
                                   4, [1, 2, 3], "something.abc")
         assertion.does_not_raise(ValueError, _is_equal_to_any_test_method, 1, [1, 2, 3])
 
+    def test_is_equal_to_any_indexed(self):
+        expected_values = list(range(100)) + [[100]]
+        for _ in range(3):
+            assertion.does_not_raise(ValueError, _is_equal_to_any_test_method, 50, expected_values)
+            assertion.does_not_raise(ValueError, _is_equal_to_any_test_method, [100], expected_values)
+            assertion.raises(ValueError, _is_equal_to_any_test_method, 100, expected_values)
+
+        expected_values.remove(50)
+        assertion.raises(ValueError, _is_equal_to_any_test_method, 50, expected_values)
+        expected_values[0] = 100
+        assertion.does_not_raise(ValueError, _is_equal_to_any_test_method, 100, expected_values)
+        assertion.raises(ValueError, _is_equal_to_any_test_method, 0, expected_values)
+        expected_values.append(50)
+        assertion.does_not_raise(ValueError, _is_equal_to_any_test_method, 50, expected_values)
+
+    def test_is_equal_to_any_list_literals(self):
+        contract._sequence_indexes.clear()
+        for value in range(50):
+            assertion.does_not_raise(ValueError, _is_equal_to_any_test_method, value, [*range(50)])
+            assertion.raises(ValueError, _is_equal_to_any_test_method, -1, [*range(50)])
+        self.assertEqual([index for _, index in contract._sequence_indexes.values() if index is not None], [])
+
+    def test_one_of(self):
+        expected_values = [1, 2, [3]]
+        is_one_of = contract.one_of(expected_values)
+        expected_values.append(4)
+        assertion.raises_with_msg(ValueError, _one_of_test_method,
+                                  "a with value 4 and type int was not equal to any of the expected values.", is_one_of,
+                                  4)
+        assertion.raises_with_msg(ValueError, _one_of_test_method,
+                                  "something.abc with value [4] and type list was not equal to any of the expected "
+                                  "values.", is_one_of, [4], "something.abc")
+        assertion.does_not_raise(ValueError, _one_of_test_method, is_one_of, 2)
+        assertion.does_not_raise(ValueError, _one_of_test_method, is_one_of, [3])
+        assertion.does_not_raise(ValueError, _one_of_test_method, is_one_of, 1.0)
+
+        self.addCleanup(contract.set_enforcement_level, contract.FULL)
+        contract.set_enforcement_level(contract.OFF)
+        assertion.does_not_raise(ValueError, _one_of_test_method, is_one_of, 4)
+
     def test_is_true(self):
         assertion.raises_with_msg(ValueError, _is_true_test_method, "a > 0 was not True.", -1, "a > 0")
         assertion.does_not_raise(ValueError, _is_true_test_method, 1)
@@ -85,6 +149,38 @@ class ContractsTests(unittest.TestCase):
         assertion.does_not_raise(AttributeError, _all_have_attribute_test_method,
                                  [_TestClsWithMethodAndAttributes(), _TestClsWithMethodAndAttributes()], "my_method")
 
+    def test_all_have_attribute_per_instance(self):
+        assertion.raises_with_msg(AttributeError, _all_have_attribute_test_method,
+                                  "a contains an item of type _TestClsWithSlots not having the expected attribute 'a'.",
+                                  [_TestClsWithSlots(1), _TestClsWithSlots()], "a")
+        assertion.raises_with_msg(AttributeError, _all_have_attribute_test_method,
+                                  "a contains an item of type _TestClsWithProperty not having the expected attribute "
+                                  "'value'.", [_TestClsWithProperty(1), _TestClsWithProperty(None)], "value")
+        assertion.raises_with_msg(AttributeError, _all_have_attribute_test_method,
+                                  "a contains an item of type _TestClsWithGetattr not having the expected attribute "
+                                  "'dummy'.", [_TestClsWithGetattr("dummy"), _TestClsWithGetattr("other")], "dummy")
+        item = _TestClsWithMethodAndAttributes()
+        item.b = 2
+        assertion.raises(AttributeError, _all_have_attribute_test_method, [item, _TestClsWithMethodAndAttributes()],
+                         "b")
+        assertion.does_not_raise(AttributeError, _all_have_attribute_test_method, [1, 2.5, True, 3j], "real")
+
+    def test_all_have_method_per_instance(self):
+        item = _TestClsWithMethodAndAttributes()
+        item.my_method = None
+        assertion.raises(AttributeError, _all_have_method_test_method, [_TestClsWithMethodAndAttributes(), item],
+                         "my_method")
+        assertion.raises(AttributeError, _all_have_method_test_method, [_TestClsWithSlots(), _TestClsWithSlots(1)],
+                         "a")
+        assertion.does_not_raise(AttributeError, _all_have_method_test_method,
+                                 [_TestClsWithSlots(), _TestClsWithSlots(), "abc", b"abc"], "count")
+
+    def test_all_have_method_after_class_change(self):
+        cls = type("_TestClsWithoutDict", (), {"__slots__": ()})
+        assertion.raises(AttributeError, _all_have_method_test_method, [cls(), cls()], "my_method")
+        cls.my_method = lambda self: None
+        assertion.does_not_raise(AttributeError, _all_have_method_test_method, [cls(), cls()], "my_method")
+
     def test_is_callable(self):
         assertion.raises_with_msg(TypeError, _is_callable_test_method, "a with type str was not callable", "dummy")
         assertion.does_not_raise(TypeError, _is_callable_test_method, _TestClsWithMethodAndAttributes().my_method)
@@ -104,6 +200,1227 @@ class ContractsTests(unittest.TestCase):
             return
         self.fail("True should not be an instance of str.")
 
+    def test_is_instance_of_several_classes(self):
+        assertion.does_not_raise(TypeError, _is_instance_test_method, 1.5, (int, float))
+        assertion.raises_with_msg(TypeError, _is_instance_test_method, "a was not an instance of int or float.", "1",
+                                  (int, float))
+        assertion.raises_with_msg(TypeError, _is_instance_test_method,
+                                  "a was not an instance of int or bytes or float.", "1", (int, (bytes, float)))
+        assertion.raises_with_msg(TypeError, _is_instance_test_method, "a was not an instance of int | float.", "1",
+                                  int | float)
+
+    def test_parameter_name_is_resolved_once_per_call_site(self):
+        assertion.raises_with_msg(TypeError, _is_not_none_test_method, "a was equal to None.", None)
+
+        # The call site is now known, so the source code shouldn't be read anymore.
+        with patch("linecache.getlines") as getlines_mock:
+            assertion.raises_with_msg(TypeError, _is_not_none_test_method, "a was equal to None.", None)
+            getlines_mock.assert_not_called()
+
+    def test_parameter_name_of_expressions(self):
+        assertion.raises_with_msg(ValueError, _is_true_expression_test_method, "a > b was not True.", 1, 2)
+        assertion.raises_with_msg(TypeError, _is_not_none_subscript_test_method, "a[0] was equal to None.", [None])
+        assertion.raises_with_msg(ValueError, _is_equal_multiline_test_method, "len(a) with value 1 was not equal to 2.",
+                                  [1])
+        assertion.raises_with_msg(ValueError, _is_true_short_circuit_test_method, "a or b was not True.", 0, 0)
+
+    def test_parameter_name_without_source_code(self):
+        namespace = {"contract": contract}
+        exec(compile("def is_not_none_without_source(a):\n    contract.is_not_none(a[0].b)\n", "<no source>", "exec"),
+             namespace)
+        assertion.raises_with_msg(TypeError, namespace["is_not_none_without_source"], "a[0].b was equal to None.",
+                                  [_TestClsWithAttributeSetToNone()])
+
+    def test_violation_is_formatted_lazily(self):
+        with patch("contracts._callsite.argument_expressions", return_value=("a",)) as argument_expressions_mock:
+            try:
+                _is_greater_than_test_method(1, 2)
+            except contract.ContractViolation as e:
+                violation = e
+            argument_expressions_mock.assert_not_called()
+
+            self.assertIsInstance(violation, ValueError)
+            self.assertEqual(violation.value, 1)
+            self.assertEqual(violation.expected_value, 2)
+            self.assertEqual(str(violation), "a with value 1 was not greater than 2.")
+            self.assertEqual(violation.args, ("a with value 1 was not greater than 2.",))
+            self.assertEqual(argument_expressions_mock.call_count, 1)
+
+    def test_violations_derive_from_builtin_exceptions(self):
+        assertion.raises(contract.ContractViolation, _is_not_none_test_method, None)
+        self.assertTrue(issubclass(contract.ContractTypeError, TypeError))
+        self.assertTrue(issubclass(contract.ContractValueError, ValueError))
+        self.assertTrue(issubclass(contract.ContractAttributeError, AttributeError))
+
+    def test_violation_is_picklable(self):
+        for callable_obj, args in [(_is_greater_than_test_method, (1, 2)), (_is_true_test_method, (False, "a > b")),
+                                   (_all_have_attribute_test_method, ([object()], "dummy"))]:
+            try:
+                callable_obj(*args)
+            except contract.ContractViolation as e:
+                violation = pickle.loads(pickle.dumps(e))
+                self.assertIs(type(violation), type(e))
+                self.assertEqual(str(violation), str(e))
+                self.assertEqual(violation.parameter_name, e.parameter_name)
+                self.assertEqual(violation.expected_value, e.expected_value)
+
+
+class PredicateTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the check_* predicates, against the contracts they're the verdict of.
+    """
+
+    def test_predicates(self):
+        cases = [
+            ("not_none", [(None,), (0,)]),
+            ("not_empty", [(None,), ("",), ([],), ("a",), (0,)]),
+            ("equal_to_any", [(4, [1, 2, 3]), (1, [1, 2, 3]), (50, list(range(100)))]),
+            ("true", [(True,), (1,)]),
+            ("false", [(False,), (0,)]),
+            ("equal", [(1, 1), (1, 2)]),
+            ("greater_than", [(2, 1), (1, 1)]),
+            ("greater_than_or_equal", [(1, 1), (0, 1)]),
+            ("all_have_attribute", [([1, 2], "real"), ([1, "a"], "real"), (object(), "dummy")]),
+            ("all_have_method", [(["a", "b"], "upper"), (["a", 1], "upper"), (1, "upper")]),
+            ("callable", [(len,), (1,)]),
+            ("instance", [(1, int), ("a", int)]),
+            ("all_in_range", [(b"abc", 0, 100), (b"abc", 0, 255), ([1], 0, 1)]),
+            ("all_non_negative", [(array.array("i", [0, 1]),), (array.array("i", [0, -1]),)]),
+            ("sorted", [(b"abc",), (b"acb",)]),
+            ("all_equal", [(b"abc", b"abc"), (b"abc", b"abd"), (b"ab", b"abc"), (b"abc", [1])]),
+        ]
+        for name, arguments in cases:
+            predicate = getattr(contract, "check_" + name)
+            check = getattr(contract, name if name.startswith("all_") else "is_" + name)
+            for args in arguments:
+                with self.subTest(check=check.__name__, args=args):
+                    try:
+                        check(*args)
+                    except contract.ContractViolation:
+                        self.assertIs(predicate(*args), False)
+                    else:
+                        self.assertIs(predicate(*args), True)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_predicates_on_arrays(self):
+        self.assertTrue(contract.check_greater_than(numpy.arange(1, 4), 0))
+        self.assertFalse(contract.check_greater_than(numpy.arange(4), 0))
+        self.assertTrue(contract.check_greater_than_or_equal(numpy.arange(4), 0))
+        self.assertFalse(contract.check_equal(numpy.arange(3), numpy.arange(2)))
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_predicates_on_frames(self):
+        series = pandas.Series([1, 2, None])
+        self.assertFalse(contract.check_all_not_null(series))
+        self.assertTrue(contract.check_all_not_null(series.dropna()))
+        self.assertFalse(contract.check_all_not_null([1]))
+        self.assertTrue(contract.check_all_greater_than(series.dropna(), 0))
+        self.assertFalse(contract.check_all_greater_than(series, 0))
+        self.assertTrue(contract.check_all_equal_to_any(pandas.Series(["a", "b"]), ("a", "b")))
+        self.assertFalse(contract.check_all_equal_to_any(pandas.Series(["a", "c"]), ("a", "b")))
+        self.assertTrue(contract.check_all_unique(series))
+        self.assertFalse(contract.check_all_unique(pandas.DataFrame({"a": [1, 1]})))
+        self.assertTrue(contract.check_has_dtype(series, "float64"))
+        self.assertFalse(contract.check_has_dtype(pandas.DataFrame({"a": [1]}), {"a": "int64", "b": "int64"}))
+        self.assertFalse(contract.check_not_empty(pandas.DataFrame(index=[1, 2])))
+        self.assertTrue(contract.check_not_empty(series))
+
+    def test_inline_checks(self):
+        # The conditions inlined by code generators must fail exactly when the predicates do.
+        values = [None, 0, 1, 2, True, False, "", "a"]
+        for name, (condition, _, _) in contract._INLINE_CHECKS.items():
+            predicate = getattr(contract, name.replace("is_", "check_", 1))
+            expected_values = [int, str] if name == "is_instance" else values
+            for value in values:
+                for expected_value in expected_values:
+                    args = (value, expected_value) if "{expected}" in condition else (value,)
+                    with self.subTest(check=name, args=args):
+                        try:
+                            failed = eval(condition.format(value="value", expected="expected_value"))
+                        except TypeError:
+                            continue
+                        self.assertEqual(bool(failed), not predicate(*args))
+
+
+class EnforcementLevelTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the enforcement levels of contracts.
+    """
+
+    def tearDown(self):
+        contract._has_context_overrides = False
+        contract.set_enforcement_level(contract.FULL)
+
+    def test_off(self):
+        contract.set_enforcement_level(contract.OFF)
+        self.assertEqual(contract.get_enforcement_level(), contract.OFF)
+        assertion.does_not_raise(TypeError, _is_not_none_test_method, None)
+        assertion.does_not_raise(AttributeError, _all_have_attribute_test_method, [object()], "dummy")
+
+    def test_cheap(self):
+        contract.set_enforcement_level(contract.CHEAP)
+        assertion.raises_with_msg(TypeError, _is_not_none_test_method, "a was equal to None.", None)
+        assertion.does_not_raise(AttributeError, _all_have_attribute_test_method, [object()], "dummy")
+
+    def test_full(self):
+        contract.set_enforcement_level(contract.OFF)
+        contract.set_enforcement_level(contract.FULL)
+        self.assertIs(contract.is_not_none, contract._checks["is_not_none"][0])
+        assertion.raises_with_msg(AttributeError, _all_have_attribute_test_method,
+                                  "a contains an item of type object not having the expected attribute 'dummy'.",
+                                  [object()], "dummy")
+
+    def test_unknown_level(self):
+        assertion.raises(ValueError, contract.set_enforcement_level, 3)
+
+    def test_level_from_environment(self):
+        with patch.dict("os.environ", {"CONTRACTS_ENFORCEMENT_LEVEL": "Cheap"}):
+            self.assertEqual(contract._enforcement_level_from_environment(), contract.CHEAP)
+        with patch.dict("os.environ", {"CONTRACTS_ENFORCEMENT_LEVEL": "dummy"}):
+            assertion.raises(ValueError, contract._enforcement_level_from_environment)
+
+    def test_context_override(self):
+        with contract.enforcement_level(contract.OFF):
+            assertion.does_not_raise(TypeError, _is_not_none_test_method, None)
+
+            # Other threads aren't affected by the override.
+            errors = []
+            thread = threading.Thread(target=lambda: errors.append(_raises_type_error(_is_not_none_test_method)))
+            thread.start()
+            thread.join()
+            self.assertEqual(errors, [True])
+
+        assertion.raises_with_msg(TypeError, _is_not_none_test_method, "a was equal to None.", None)
+
+    def test_context_override_in_asyncio_tasks(self):
+        async def check_with_level(level):
+            with contract.enforcement_level(level):
+                await asyncio.sleep(0)
+                return _raises_type_error(_is_not_none_test_method)
+
+        async def check_concurrently():
+            return await asyncio.gather(check_with_level(contract.OFF), check_with_level(contract.FULL))
+
+        self.assertEqual(asyncio.run(check_concurrently()), [False, True])
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class ArrayTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the comparison contracts on NumPy arrays.
+    """
+
+    def test_is_greater_than(self):
+        assertion.raises_with_msg(ValueError, _is_greater_than_test_method,
+                                  "a has 2 of 4 items not greater than 1: 0 at index 0, 1 at index 1.", numpy.arange(4),
+                                  1)
+        assertion.does_not_raise(ValueError, _is_greater_than_test_method, numpy.arange(1, 4), 0)
+        assertion.does_not_raise(ValueError, _is_greater_than_test_method, numpy.array([]), 0)
+
+    def test_is_greater_than_or_equal(self):
+        assertion.raises_with_msg(ValueError, _is_greater_than_or_equal_test_method,
+                                  "a has 1 of 4 items not greater than or equal to 0: -1 at index (1, 0).",
+                                  numpy.array([[1, 2], [-1, 3]]), 0)
+        assertion.does_not_raise(ValueError, _is_greater_than_or_equal_test_method, numpy.arange(4), 0)
+
+    def test_is_equal(self):
+        assertion.raises_with_msg(ValueError, _is_equal_test_method,
+                                  "a has 1 of 3 items not equal to [0 1 3]: 2 at index 2.", numpy.arange(3),
+                                  numpy.array([0, 1, 3]))
+        assertion.raises_with_msg(ValueError, _is_equal_test_method,
+                                  "a with shape (3,) can't be compared to [0 1] with shape (2,).", numpy.arange(3),
+                                  numpy.arange(2))
+        assertion.does_not_raise(ValueError, _is_equal_test_method, numpy.zeros((2, 3)), numpy.zeros(3))
+
+    def test_all_of(self):
+        check = contract.all_of((contract.is_greater_than, 0), (contract.is_equal, 1))
+        assertion.raises_with_msg(contract.ContractViolations, _all_of_test_method,
+                                  "1 contract was violated:\n- a has 1 of 3 items not greater than 0: 0 at index 1.",
+                                  check, numpy.array([1, 0, 2]), 1)
+        assertion.does_not_raise(ValueError, _all_of_test_method, check, numpy.arange(1, 4), numpy.ones(2))
+
+    @patch("contracts._arrays._CHUNK_SIZE", 10)
+    def test_chunks(self):
+        value = numpy.arange(100).reshape(25, 4)
+        assertion.raises_with_msg(ValueError, _is_greater_than_test_method,
+                                  "a has 9 of 100 items not greater than 8: 0 at index (0, 0), 1 at index (0, 1), "
+                                  "2 at index (0, 2), 3 at index (0, 3), 4 at index (1, 0), ....", value, 8)
+        assertion.raises_with_msg(ValueError, _is_greater_than_test_method,
+                                  "a has 1 of 100 items not greater than -1: -1 at index (24, 0).", value[::-1] - 1, -1)
+
+    def test_numpy_not_imported(self):
+        code = ("import sys; from contracts import contract; contract.is_greater_than(1, 0); "
+                "print('numpy' in sys.modules)")
+        self.assertEqual(subprocess.check_output([sys.executable, "-c", code], text=True).strip(), "False")
+
+
+@unittest.skipIf(pandas is None, "pandas is not installed")
+class FrameTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the contracts on pandas Series and DataFrames.
+    """
+
+    def setUp(self):
+        self.orders = pandas.DataFrame({"quantity": [1.0, -2.0, None, 4.0], "status": ["new", "paid", "lost", None]},
+                                       index=["a", "b", "c", "d"])
+
+    def tearDown(self):
+        contract.set_max_reported_items(5)
+
+    def test_all_not_null(self):
+        assertion.raises_with_msg(ValueError, _all_not_null_test_method,
+                                  "a has 2 of 8 null items: nan at row 'c' in column 'quantity', nan at row 'd' in "
+                                  "column 'status'.", self.orders)
+        assertion.raises_with_msg(ValueError, _all_not_null_test_method, "a has 1 of 4 null items: nan at row 'c'.",
+                                  self.orders["quantity"])
+        assertion.does_not_raise(ValueError, _all_not_null_test_method, self.orders.dropna())
+        assertion.raises_with_msg(TypeError, _all_not_null_test_method,
+                                  "a with type list was not a pandas Series or DataFrame.", [1])
+
+    def test_all_greater_than(self):
+        assertion.raises_with_msg(ValueError, _all_greater_than_test_method,
+                                  "a has 2 of 4 items not greater than 0: -2.0 at row 'b', nan at row 'c'.",
+                                  self.orders["quantity"], 0)
+        assertion.raises_with_msg(ValueError, _all_greater_than_test_method,
+                                  "a has 1 of 4 items not greater than -3: nan at row 'c' in column 'quantity'.",
+                                  self.orders[["quantity"]], -3)
+        assertion.does_not_raise(ValueError, _all_greater_than_test_method, pandas.Series([], dtype="int64"), 0)
+
+    def test_all_equal_to_any(self):
+        assertion.raises_with_msg(ValueError, _all_equal_to_any_test_method,
+                                  "a has 2 of 4 items not equal to any of the expected values: 'lost' at row 'c', "
+                                  "None at row 'd'.", pandas.Series(["new", "paid", "lost", None], dtype=object,
+                                                                    index=self.orders.index), ("new", "paid"))
+        assertion.does_not_raise(ValueError, _all_equal_to_any_test_method, self.orders["status"].iloc[:2],
+                                 {"new", "paid"})
+
+    def test_all_unique(self):
+        assertion.raises_with_msg(ValueError, _all_unique_test_method,
+                                  "a has 4 of 5 duplicated items: 1 at row 0, 1 at row 2, 3 at row 3, 3 at row 4.",
+                                  pandas.Series([1, 2, 1, 3, 3]))
+        assertion.raises_with_msg(ValueError, _all_unique_test_method,
+                                  "a has 2 of 3 duplicated rows: row 'x', row 'z'.",
+                                  pandas.DataFrame({"a": [1, 2, 1], "b": [3, 3, 3]}, index=["x", "y", "z"]))
+        assertion.does_not_raise(ValueError, _all_unique_test_method, self.orders)
+
+    def test_has_dtype(self):
+        assertion.raises_with_msg(ValueError, _has_dtype_test_method, "a with dtype float64 was not of dtype int64.",
+                                  self.orders["quantity"], "int64")
+        assertion.raises_with_msg(ValueError, _has_dtype_test_method,
+                                  "a has columns with unexpected dtypes: 'quantity' (float64 instead of int64), "
+                                  "'total' (missing instead of float64).", self.orders,
+                                  dict(quantity="int64", total=float))
+        assertion.does_not_raise(ValueError, _has_dtype_test_method, self.orders.astype(object), object)
+        assertion.raises_with_msg(TypeError, _has_dtype_test_method,
+                                  "a with type ndarray was not a pandas Series or DataFrame.", numpy.zeros(1), float)
+
+    def test_is_not_empty(self):
+        assertion.raises_with_msg(ValueError, _is_not_empty_test_method, "a was empty.", pandas.DataFrame(index=[1]))
+        assertion.does_not_raise(ValueError, _is_not_empty_test_method, self.orders)
+
+    def test_max_reported_items(self):
+        contract.set_max_reported_items(1)
+        assertion.raises_with_msg(ValueError, _all_greater_than_test_method,
+                                  "a has 2 of 4 items not greater than 0: -2.0 at row 'b', ....",
+                                  self.orders["quantity"], 0)
+        assertion.raises_with_msg(ValueError, _is_greater_than_test_method,
+                                  "a has 2 of 3 items not greater than 0: 0 at index 0, ....",
+                                  numpy.array([0, 0, 1]), 0)
+        self.assertRaises(ValueError, contract.set_max_reported_items, 0)
+
+    def test_pandas_not_imported(self):
+        code = ("import sys; from contracts import contract; contract.is_not_empty([1]); "
+                "contract.check_all_not_null([1]); print('pandas' in sys.modules)")
+        self.assertEqual(subprocess.check_output([sys.executable, "-c", code], text=True).strip(), "False")
+
+
+class BufferTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the contracts on objects supporting the buffer protocol.
+    """
+
+    def test_all_in_range(self):
+        assertion.raises_with_msg(ValueError, _all_in_range_test_method,
+                                  "a has an item with value 101 at index 2, which is not between 0 and 100.",
+                                  array.array("i", [0, 100, 101]), 0, 100)
+        assertion.does_not_raise(ValueError, _all_in_range_test_method, array.array("d", [0.5, 100.0]), 0, 100)
+        assertion.does_not_raise(ValueError, _all_in_range_test_method, b"", 0, 100)
+
+    def test_all_non_negative(self):
+        assertion.raises_with_msg(ValueError, _all_non_negative_test_method,
+                                  "a has an item with value -1 at index 1, which is negative.",
+                                  memoryview(bytes([0, 255])).cast("b"))
+        assertion.does_not_raise(ValueError, _all_non_negative_test_method, bytes([0, 255]))
+
+    def test_is_sorted(self):
+        assertion.raises_with_msg(ValueError, _is_sorted_test_method,
+                                  "a was not sorted: its item with value 1 at index 2 is lower than 3.",
+                                  array.array("q", [2, 3, 1]))
+        assertion.does_not_raise(ValueError, _is_sorted_test_method, array.array("q", [1, 1, 2]))
+        assertion.does_not_raise(ValueError, _is_sorted_test_method, b"a")
+
+    def test_all_equal(self):
+        assertion.raises_with_msg(ValueError, _all_equal_test_method,
+                                  "a has an item with value 2 at index 1, which is not equal to 3.0.",
+                                  array.array("i", [1, 2]), array.array("d", [1, 3]))
+        assertion.raises_with_msg(ValueError, _all_equal_test_method, "a has 2 items instead of 3.", b"ab", b"abc")
+        assertion.does_not_raise(ValueError, _all_equal_test_method, array.array("i", [1, 2]),
+                                 array.array("d", [1, 2]))
+
+    def test_multi_dimensional_buffer(self):
+        matrix = memoryview(array.array("i", [1, 2, 3, -4])).cast("B").cast("i", [2, 2])
+        assertion.raises_with_msg(ValueError, _all_non_negative_test_method,
+                                  "a has an item with value -4 at index 3, which is negative.", matrix)
+        assertion.raises_with_msg(TypeError, _is_sorted_test_method,
+                                  "a with type memoryview was not a one-dimensional or contiguous buffer.",
+                                  matrix[::-1])
+        assertion.does_not_raise(ValueError, _is_sorted_test_method, memoryview(b"cba")[::-1])
+
+    def test_not_a_buffer(self):
+        assertion.raises_with_msg(TypeError, _all_in_range_test_method,
+                                  "a with type list was not a one-dimensional or contiguous buffer.", [1], 0, 1)
+
+    def test_non_native_format(self):
+        values = [(ctypes.c_int * 3)(1, 2, 3)]
+        if numpy is not None:
+            values.append(numpy.arange(3, dtype=">i4"))
+        for value in values:
+            type_name = type(value).__name__
+            message = "a with type {0} was not a buffer of items in a native format.".format(type_name)
+            assertion.raises_with_msg(TypeError, _all_in_range_test_method, message, value, 0, 5)
+            assertion.raises_with_msg(TypeError, _all_non_negative_test_method, message, value)
+            assertion.raises_with_msg(TypeError, _is_sorted_test_method, message, value)
+            assertion.raises_with_msg(TypeError, _all_equal_test_method, message, value, b"abc")
+            assertion.raises_with_msg(TypeError, contract.all_equal, "expected_value with type {0}".format(type_name),
+                                      b"abc", value)
+            self.assertFalse(contract.check_all_in_range(value, 0, 5))
+            self.assertFalse(contract.check_all_non_negative(value))
+            self.assertFalse(contract.check_sorted(value))
+            self.assertFalse(contract.check_all_equal(value, value))
+
+    def test_nan(self):
+        nan = float("nan")
+        assertion.raises_with_msg(ValueError, _all_in_range_test_method,
+                                  "a has an item with value -5.0 at index 1, which is not between 0 and 10.",
+                                  array.array("d", [1.0, -5.0, nan]), 0, 10)
+        assertion.raises_with_msg(ValueError, _all_in_range_test_method,
+                                  "a has an item with value nan at index 0, which is not between 0 and 10.",
+                                  array.array("d", [nan, -5.0]), 0, 10)
+        assertion.raises_with_msg(ValueError, _all_in_range_test_method,
+                                  "a has an item with value nan at index 1, which is not between 0 and 10.",
+                                  array.array("f", [1.0, nan]), 0, 10)
+        assertion.raises_with_msg(ValueError, _all_non_negative_test_method,
+                                  "a has an item with value -5.0 at index 1, which is negative.",
+                                  array.array("d", [nan, -5.0]))
+        assertion.does_not_raise(ValueError, _all_non_negative_test_method, array.array("d", [nan, 5.0]))
+        self.assertFalse(contract.check_all_in_range(array.array("d", [nan, -5.0]), 0, 10))
+        self.assertFalse(contract.check_all_non_negative(array.array("d", [nan, -5.0])))
+
+    def test_characters(self):
+        characters = memoryview(b"ab").cast("c")
+        message = "a with type memoryview was not a buffer of numbers."
+        assertion.raises_with_msg(TypeError, _all_in_range_test_method, message, characters, 0, 5)
+        assertion.raises_with_msg(TypeError, _all_non_negative_test_method, message, characters)
+        self.assertFalse(contract.check_all_in_range(characters, 0, 5))
+        self.assertFalse(contract.check_all_non_negative(characters))
+        assertion.does_not_raise(ValueError, _is_sorted_test_method, characters)
+
+    @patch.object(contract, "_BUFFER_CHUNK_SIZE", 2)
+    def test_chunks(self):
+        assertion.raises_with_msg(ValueError, _all_in_range_test_method,
+                                  "a has an item with value 9 at index 4, which is not between 0 and 5.",
+                                  array.array("i", [0, 1, 2, 3, 9]), 0, 5)
+        assertion.raises_with_msg(ValueError, _is_sorted_test_method,
+                                  "a was not sorted: its item with value 0 at index 2 is lower than 1.",
+                                  array.array("i", [0, 1, 0, 3]))
+        assertion.does_not_raise(ValueError, _is_sorted_test_method, array.array("i", [0, 1, 2, 3, 4]))
+        assertion.raises_with_msg(ValueError, _all_equal_test_method,
+                                  "a has an item with value 4 at index 4, which is not equal to 5.",
+                                  array.array("i", [0, 1, 2, 3, 4]), array.array("i", [0, 1, 2, 3, 5]))
+
+
+class IteratorTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the contracts wrapping iterables.
+    """
+
+    def tearDown(self):
+        contract.set_enforcement_level(contract.FULL)
+
+    def test_iter_not_empty(self):
+        assertion.raises_with_msg(ValueError, _iter_not_empty_test_method, "a was empty.", (i for i in []))
+        self.assertEqual(list(_iter_not_empty_test_method(i for i in [1, 2, 3])), [1, 2, 3])
+
+    def test_is_not_empty_on_generator(self):
+        assertion.does_not_raise(ValueError, _is_not_empty_test_method, (i for i in []))
+
+    def test_iter_all_have_attribute(self):
+        items = _iter_all_have_attribute_test_method(iter([1, 2, "3", 4]), "real")
+        self.assertEqual(next(items), 1)
+        self.assertEqual(next(items), 2)
+        assertion.raises_with_msg(AttributeError, next,
+                                  "a contains an item of type str at index 2 not having the expected attribute 'real'.",
+                                  items)
+
+    def test_iter_all_have_method(self):
+        items = _iter_all_have_method_test_method((_TestClsWithMethodAndAttributes() for _ in range(2)), "my_method")
+        self.assertEqual(len(list(items)), 2)
+        items = _iter_all_have_method_test_method(iter([_TestClsWithMethodAndAttributes(), object()]), "my_method")
+        assertion.raises_with_msg(AttributeError, list,
+                                  "a contains an item of type object at index 1 not having the expected method "
+                                  "'my_method'.", items)
+
+    def test_iter_not_enforced(self):
+        contract.set_enforcement_level(contract.CHEAP)
+        value = iter([])
+        self.assertIs(_iter_all_have_attribute_test_method(value, "dummy"), value)
+        assertion.raises(ValueError, _iter_not_empty_test_method, value)
+        contract.set_enforcement_level(contract.OFF)
+        self.assertIs(_iter_not_empty_test_method(value), value)
+
+
+class SamplingTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the sampling of contracts.
+    """
+
+    def tearDown(self):
+        contract.set_sampling(1)
+
+    def test_rate(self):
+        contract.set_sampling(3)
+        results = [_raises_attribute_error(_all_have_attribute_test_method, [object()], "dummy") for _ in range(6)]
+        self.assertEqual(results, [True, False, False, True, False, False])
+
+    def test_rate_is_per_call_site(self):
+        contract.set_sampling(3)
+        assertion.raises(AttributeError, _all_have_attribute_test_method, [object()], "dummy")
+        assertion.raises(AttributeError, _all_have_method_test_method, [object()], "dummy")
+
+    def test_cheap_checks_are_not_sampled_by_default(self):
+        contract.set_sampling(3)
+        self.assertIs(contract.is_not_none, contract._checks["is_not_none"][0])
+        for _ in range(3):
+            assertion.raises(TypeError, _is_not_none_test_method, None)
+
+    def test_explicit_checks(self):
+        contract.set_sampling(2, checks=[contract.is_not_none])
+        results = [_raises_type_error(_is_not_none_test_method) for _ in range(4)]
+        self.assertEqual(results, [True, False, True, False])
+        self.assertIs(contract.all_have_attribute, contract._checks["all_have_attribute"][0])
+
+    @patch.object(contract, "_ADAPTIVE_SAMPLING_PASSES", 2)
+    def test_adaptive(self):
+        contract.set_sampling(4, adaptive=True)
+        valid, invalid = [_TestClsWithMethodAndAttributes()], [object()]
+        # The rate doubles every 2 passes: calls 0, 1, 2, 4, 6 and 10 are checked, then every call after a failure.
+        items = [valid] * 8 + [invalid, valid] + [invalid] * 3
+        results = [_raises_attribute_error(_all_have_attribute_test_method, a, "a") for a in items]
+        self.assertEqual(results, [False] * 10 + [True] * 3)
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, contract.set_sampling, 0)
+
+    def test_disable(self):
+        contract.set_sampling(3)
+        contract.set_sampling(1)
+        self.assertIs(contract.all_have_attribute, contract._checks["all_have_attribute"][0])
+
+
+class MemoizationTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the memoization of contracts.
+    """
+
+    def tearDown(self):
+        contract.set_memoization(0)
+
+    def test_passes_are_cached(self):
+        contract.set_memoization(8)
+        items = ("a", "b")
+        for _ in range(3):
+            contract.all_have_method(items, "upper")
+        self.assertEqual(contract.get_memoization_info(), (2, 1, 8, 1))
+
+    def test_violations_are_not_cached(self):
+        contract.set_memoization(8)
+        for _ in range(2):
+            assertion.raises_with_msg(AttributeError, _all_have_method_test_method, "a contains an item of type int",
+                                      ("a", 1), "upper")
+        self.assertEqual(contract.get_memoization_info(), (0, 2, 8, 0))
+
+    def test_mutable_arguments_are_not_cached(self):
+        contract.set_memoization(8)
+        items = ["a", "b"]
+        contract.all_have_method(items, "upper")
+        items.append(1)
+        assertion.raises(AttributeError, _all_have_method_test_method, items, "upper")
+        assertion.raises(AttributeError, _all_have_method_test_method, ("a", ["b"], 1), "upper")
+        self.assertEqual(contract.get_memoization_info(), (0, 0, 8, 0))
+
+    def test_immutable_containers(self):
+        contract.set_memoization(8)
+        for items in [(_ImmutableRocket("Falcon", (9,)),), (_RocketTuple("Falcon", 9),), frozenset({"a"})]:
+            contract.all_have_attribute(items, "__len__" if isinstance(items, frozenset) else "name")
+            contract.all_have_attribute(items, "__len__" if isinstance(items, frozenset) else "name")
+        self.assertEqual(contract.get_memoization_info(), (3, 3, 8, 3))
+        contract.all_have_attribute((_ImmutableRocket("Falcon", [9]),), "name")
+        self.assertEqual(contract.get_memoization_info().size, 3)
+
+    def test_types_are_part_of_the_key(self):
+        contract.set_memoization(8)
+        contract.all_have_method(1, "bit_length")
+        assertion.raises(AttributeError, _all_have_method_test_method, 1.0, "bit_length")
+
+    def test_least_recently_used_are_evicted(self):
+        contract.set_memoization(2, checks=[contract.is_equal_to_any])
+        for value in [1, 2, 1, 3, 1, 2]:
+            contract.is_equal_to_any(value, (1, 2, 3))
+        self.assertEqual(contract.get_memoization_info(), (2, 4, 2, 2))
+
+    def test_cheap_checks_are_not_memoized_by_default(self):
+        contract.set_memoization(8)
+        self.assertIs(contract.is_not_none, contract._checks["is_not_none"][0])
+
+    def test_call_site(self):
+        contract.set_memoization(8)
+        assertion.raises_with_msg(AttributeError, _all_have_method_test_method, "a contains an item", (1,), "upper")
+
+    def test_invalid_size(self):
+        self.assertRaises(ValueError, contract.set_memoization, -1)
+
+    def test_disable(self):
+        contract.set_memoization(8)
+        contract.set_memoization(0)
+        self.assertIs(contract.all_have_attribute, contract._checks["all_have_attribute"][0])
+
+
+class ShadowModeTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the recording of violations in shadow mode.
+    """
+
+    def tearDown(self):
+        contract.set_shadow_mode(False)
+
+    def test_violations_are_recorded(self):
+        contract.set_shadow_mode(True, log_interval=None)
+        for value in [None, 1, None]:
+            _is_not_none_test_method(value)
+        _is_greater_than_test_method(0, 1)
+        violations = contract.drain_shadow_violations()
+        self.assertEqual([(violation["check"], violation["type"], violation["message"], violation["count"],
+                           violation["function"]) for violation in violations],
+                         [("is_not_none", "ContractTypeError", "a was equal to None.", 2, "_is_not_none_test_method"),
+                          ("is_greater_than", "ContractValueError", "a with value 0 was not greater than 1.", 1,
+                           "_is_greater_than_test_method")])
+        self.assertEqual(violations[0]["file"], __file__)
+        self.assertEqual(violations[0]["line"], _is_not_none_test_method.__code__.co_firstlineno + 1)
+        self.assertEqual(contract.drain_shadow_violations(), [])
+
+    def test_messages_are_formatted_when_drained(self):
+        contract.set_shadow_mode(True, log_interval=None)
+        with patch.object(contract, "_get_parameter_name", return_value="a") as get_parameter_name:
+            _is_not_none_test_method(None)
+            get_parameter_name.assert_not_called()
+            contract.drain_shadow_violations()
+            get_parameter_name.assert_called_once()
+
+    def test_capacity(self):
+        contract.set_shadow_mode(True, capacity=2, log_interval=None)
+        _is_not_none_test_method(None)
+        _is_greater_than_test_method(0, 1)
+        _is_equal_test_method(0, 1)
+        _is_greater_than_test_method(0, 1)
+        self.assertEqual([(violation["check"], violation["count"]) for violation in contract.drain_shadow_violations()],
+                         [("is_greater_than", 2), ("is_equal", 1)])
+
+    def test_json(self):
+        contract.set_shadow_mode(True, log_interval=None)
+        _is_not_none_test_method(None)
+        self.assertEqual([violation["message"] for violation in json.loads(
+            contract.drain_shadow_violations_as_json())], ["a was equal to None."])
+
+    def test_rate_limited_logging(self):
+        contract.set_shadow_mode(True, log_interval=3600)
+        with self.assertLogs("contracts.contract", "WARNING") as logs:
+            for _ in range(3):
+                _is_not_none_test_method(None)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("is_not_none was violated at {0}:".format(__file__), logs.output[0])
+
+    def test_explicit_checks(self):
+        contract.set_shadow_mode(True, checks=[contract.is_greater_than], log_interval=None)
+        _is_greater_than_test_method(0, 1)
+        assertion.raises(TypeError, _is_not_none_test_method, None)
+
+    def test_invalid_capacity(self):
+        self.assertRaises(ValueError, contract.set_shadow_mode, True, 0)
+
+    def test_disable(self):
+        contract.set_shadow_mode(True)
+        contract.set_shadow_mode(False)
+        self.assertIs(contract.is_not_none, contract._checks["is_not_none"][0])
+
+
+class MetricsTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the metrics collected per call site.
+    """
+
+    def tearDown(self):
+        contract.set_metrics(False)
+
+    def test_metrics_are_collected(self):
+        contract.set_metrics(True)
+        _is_not_none_test_method(1)
+        for _ in range(2):
+            assertion.raises(TypeError, _is_not_none_test_method, None)
+        _is_greater_than_test_method(2, 1)
+        metrics = contract.get_metrics()
+        self.assertEqual([(site["check"], site["calls"], site["failures"], site["function"]) for site in metrics],
+                         [("is_not_none", 3, 2, "_is_not_none_test_method"),
+                          ("is_greater_than", 1, 0, "_is_greater_than_test_method")])
+        self.assertEqual(metrics[0]["file"], __file__)
+        self.assertEqual(metrics[0]["line"], _is_not_none_test_method.__code__.co_firstlineno + 1)
+        self.assertGreater(metrics[0]["seconds"], 0)
+
+    def test_call_sites(self):
+        contract.set_metrics(True)
+        line = inspect.currentframe().f_lineno
+        contract.is_not_none(1)
+        contract.is_not_none(1)
+        self.assertEqual([site["line"] for site in contract.get_metrics()], [line + 1, line + 2])
+
+    def test_json(self):
+        contract.set_metrics(True)
+        _is_not_none_test_method(1)
+        self.assertEqual([site["calls"] for site in json.loads(contract.get_metrics_as_json())], [1])
+
+    def test_prometheus(self):
+        contract.set_metrics(True)
+        _is_not_none_test_method(1)
+        lines = contract.get_metrics_as_prometheus().splitlines()
+        labels = 'file="{0}",line="{1}",function="_is_not_none_test_method",check="is_not_none"'.format(
+            __file__.replace("\\", "\\\\"), _is_not_none_test_method.__code__.co_firstlineno + 1)
+        self.assertEqual(lines[:6], ["# HELP contracts_calls_total Number of calls to contract functions.",
+                                     "# TYPE contracts_calls_total counter",
+                                     "contracts_calls_total{{{0}}} 1".format(labels),
+                                     "# HELP contracts_failures_total Number of violated contracts.",
+                                     "# TYPE contracts_failures_total counter",
+                                     "contracts_failures_total{{{0}}} 0".format(labels)])
+        self.assertTrue(lines[8].startswith("contracts_seconds_total{"))
+
+    def test_prometheus_label_escaping(self):
+        self.assertEqual(contract._escape_prometheus_label('C:\\a "b"\n'), 'C:\\\\a \\"b\\"\\n')
+
+    def test_explicit_checks(self):
+        contract.set_metrics(True, checks=[contract.is_greater_than])
+        _is_not_none_test_method(1)
+        _is_greater_than_test_method(2, 1)
+        self.assertEqual([site["check"] for site in contract.get_metrics()], ["is_greater_than"])
+
+    def test_reset(self):
+        contract.set_metrics(True)
+        _is_not_none_test_method(1)
+        contract.set_metrics(True)
+        self.assertEqual(contract.get_metrics(), [])
+
+    def test_disable(self):
+        contract.set_metrics(True)
+        contract.set_metrics(False)
+        self.assertIs(contract.is_not_none, contract._checks["is_not_none"][0])
+
+
+class DecoratorTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the behavior of the precondition and postcondition decorators.
+    """
+
+    def tearDown(self):
+        contract._has_context_overrides = False
+        contract.set_enforcement_level(contract.FULL)
+
+    def test_requires(self):
+        self.assertEqual(_build_rocket("Falcon", 9), "Falcon 9 from SpaceX")
+        assertion.raises_with_msg(ValueError, _build_rocket, "name was empty.", "", 9)
+        assertion.raises_with_msg(ValueError, _build_rocket, "model with value 0 was not greater than 0.", "Falcon", 0)
+        assertion.raises_with_msg(TypeError, _build_rocket, "company was equal to None.", "Falcon", 9, company=None)
+
+    def test_ensures(self):
+        assertion.raises_with_msg(TypeError, _build_rocket, "result was equal to None.", "Falcon", 9, "")
+
+    def test_single_wrapper(self):
+        # The simplest contracts are inlined, and the stacked decorators produce a single wrapper.
+        self.assertIs(_build_rocket.__wrapped__, _build_rocket._contracts_conditions[0])
+        self.assertNotIn("__wrapped__", vars(_build_rocket.__wrapped__))
+        self.assertEqual(str(inspect.signature(_build_rocket)), "(name, model, /, company='SpaceX', *, reusable=True)")
+
+    def test_unknown_parameter(self):
+        assertion.raises_with_msg(ValueError, contract.requires(dummy=contract.is_not_none), "has no parameter named",
+                                  _build_rocket)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_arrays(self):
+        # The comparisons of arrays can't be inlined as conditions, so the contracts are called instead.
+        @contract.requires(models=(contract.is_greater_than, 0))
+        @contract.ensures((contract.is_equal, 1))
+        def count_dimensions(models):
+            return models.ndim
+
+        self.assertEqual(count_dimensions(numpy.array([1, 9])), 1)
+        assertion.raises_with_msg(ValueError, count_dimensions,
+                                  "models has 1 of 2 items not greater than 0: 0 at index 1.", numpy.array([1, 0]))
+        assertion.raises_with_msg(ValueError, count_dimensions, "result with value 2 was not equal to 1.",
+                                  numpy.ones((2, 2)))
+        assertion.raises_with_msg(ValueError, count_dimensions, "models with value 0 was not greater than 0.",
+                                  numpy.int64(0))
+
+    def test_other_decorator_in_between(self):
+        # Other decorators copy the attributes of the wrapper they decorate, but they're wrapped rather than merged.
+        calls = []
+
+        def count_calls(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                calls.append(args)
+                return function(*args, **kwargs)
+            return wrapper
+
+        @contract.requires(name=contract.is_not_empty)
+        @count_calls
+        @contract.requires(name=contract.is_not_none)
+        def build_rocket(name):
+            return name
+
+        self.assertEqual(build_rocket("Falcon"), "Falcon")
+        self.assertEqual(calls, [("Falcon",)])
+        assertion.raises_with_msg(ValueError, build_rocket, "name was empty.", "")
+        self.assertEqual(len(calls), 1)
+        contract.set_enforcement_level(contract.CHEAP)
+        self.assertEqual(build_rocket("Falcon"), "Falcon")
+        self.assertEqual(len(calls), 2)
+
+    def test_off(self):
+        contract.set_enforcement_level(contract.OFF)
+        self.assertEqual(_build_rocket("", 9, ""), None)
+
+        @contract.requires(name=contract.is_not_none)
+        def build_rocket(name):
+            return name
+
+        # The wrappers are generated again when the enforcement level changes, even if they were created under OFF.
+        self.assertEqual(build_rocket(None), None)
+        contract.set_enforcement_level(contract.FULL)
+        assertion.raises_with_msg(TypeError, build_rocket, "name was equal to None.", None)
+        assertion.raises_with_msg(ValueError, _build_rocket, "name was empty.", "", 9)
+
+    def test_cheap(self):
+        @contract.ensures((contract.all_have_attribute, "launch"))
+        def build_rockets(count):
+            return [object()] * count
+
+        contract.set_enforcement_level(contract.CHEAP)
+        self.assertEqual(len(build_rockets(1)), 1)
+        contract.set_enforcement_level(contract.FULL)
+        assertion.raises(AttributeError, build_rockets, 1)
+
+    def test_context_override(self):
+        with contract.enforcement_level(contract.OFF):
+            self.assertEqual(_build_rocket("", 9), " 9 from SpaceX")
+        assertion.raises_with_msg(ValueError, _build_rocket, "name was empty.", "", 9)
+
+    def test_no_contracts(self):
+        def build_rocket(name):
+            return name
+
+        self.assertIs(contract.requires()(build_rocket), build_rocket)
+
+
+class TypecheckedTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the contracts compiled from type annotations.
+    """
+
+    def tearDown(self):
+        contract._has_context_overrides = False
+        contract.set_enforcement_level(contract.FULL)
+
+    def test_plain_classes(self):
+        self.assertEqual(_launch_rocket("Falcon", 9, 1.5), "Falcon 9")
+        self.assertEqual(_launch_rocket("Falcon", 9, 1), "Falcon 9")
+        assertion.raises_with_msg(TypeError, _launch_rocket, "name with type int did not match the annotation str.", 1,
+                                  9, 1.5)
+        assertion.raises_with_msg(TypeError, _launch_rocket, "thrust with type str did not match the annotation float.",
+                                  "Falcon", 9, "1.5")
+
+    def test_optional_and_union(self):
+        self.assertEqual(_launch_rocket("Falcon", None, 1.5), "Falcon None")
+        assertion.raises_with_msg(TypeError, _launch_rocket,
+                                  "model with type float did not match the annotation Optional[int].", "Falcon", 9.0,
+                                  1.5)
+        assertion.raises_with_msg(TypeError, _launch_rocket,
+                                  "payload with type list did not match the annotation int | str | None.",
+                                  "Falcon", 9, 1.5, payload=[])
+
+    def test_literal(self):
+        self.assertEqual(_launch_rocket("Falcon", 9, 1.5, orbit="GTO"), "Falcon 9")
+        assertion.raises_with_msg(TypeError, _launch_rocket,
+                                  "orbit with type str did not match the annotation Literal['LEO', 'GTO'].", "Falcon",
+                                  9, 1.5, orbit="MEO")
+        assertion.raises_with_msg(TypeError, _launch_rocket, "orbit with type list did not match", "Falcon", 9, 1.5,
+                                  orbit=["LEO"])
+
+    def test_result(self):
+        assertion.raises_with_msg(TypeError, _launch_rocket, "result with type NoneType did not match the annotation "
+                                                             "str.", "", 9, 1.5)
+
+    def test_containers(self):
+        @contract.typechecked
+        def count(stages: list[int], crew: dict[str, tuple[int, str]], *boosters: str):
+            pass
+
+        count([1, "2"], {"a": (1, "b"), "b": (1, 2)}, "a", 1)
+        assertion.raises_with_msg(TypeError, count, "stages with type list did not match the annotation list[int].",
+                                  ["1"], {})
+        assertion.raises_with_msg(TypeError, count,
+                                  "crew with type dict did not match the annotation dict[str, tuple[int, str]].", [],
+                                  {"a": (1, 2)})
+        assertion.raises_with_msg(TypeError, count,
+                                  "boosters with type tuple did not match the annotation tuple[str, ...].", [], {}, 1)
+
+    def test_inspection(self):
+        def count(stages: list[int]):
+            pass
+
+        stages = list(range(1000))
+        stages[500] = "1"
+        contract.typechecked(count)(stages)
+        assertion.raises_with_msg(TypeError, contract.typechecked(count, inspection=contract.SAMPLED_ITEMS,
+                                                                  sample_size=10), "stages with type list", stages)
+        stages[500] = 1
+        stages[-1] = "1"
+        contract.typechecked(count, inspection=contract.SAMPLED_ITEMS, sample_size=10)(stages)
+        assertion.raises_with_msg(TypeError, contract.typechecked(count, inspection=contract.ALL_ITEMS),
+                                  "stages with type list", stages)
+        self.assertRaises(ValueError, contract.typechecked, inspection="dummy")
+        self.assertRaises(ValueError, contract.typechecked, sample_size=0)
+
+    def test_stacked(self):
+        @contract.requires(model=(contract.is_greater_than, 0))
+        @contract.typechecked
+        def build_rocket(name: str, model: int):
+            pass
+
+        self.assertNotIn("__wrapped__", vars(build_rocket.__wrapped__))
+        assertion.raises_with_msg(ValueError, build_rocket, "model with value 0 was not greater than 0.", "Falcon", 0)
+        assertion.raises_with_msg(TypeError, build_rocket, "name with type int did not match", 1, 1)
+
+    def test_not_checked(self):
+        @contract.typechecked
+        def build_rocket(name: typing.Any, model: typing.Iterator[int], company: "Unknown") -> typing.Any:
+            return name
+
+        # Iterators are never consumed, and annotations that can't be resolved are ignored.
+        model = iter("abc")
+        self.assertEqual(build_rocket(None, model, None), None)
+        self.assertEqual(next(model), "a")
+        assertion.raises_with_msg(TypeError, build_rocket, "model with type list did not match", None, [], None)
+
+    def test_enforcement_level(self):
+        def count(stages: list[int]):
+            pass
+
+        contract.set_enforcement_level(contract.CHEAP)
+        count_all = contract.typechecked(count, inspection=contract.ALL_ITEMS)
+        count_all([1, "2"])
+        contract.set_enforcement_level(contract.OFF)
+        count_first = contract.typechecked(count)
+        count_first(["1"])
+        contract.set_enforcement_level(contract.FULL)
+        assertion.raises_with_msg(TypeError, count_all, "stages with type list", [1, "2"])
+        assertion.raises_with_msg(TypeError, count_first, "stages with type list", ["1"])
+
+    def test_context_override(self):
+        def count(stages: list[int]):
+            pass
+
+        count = contract.typechecked(count)
+        with contract.enforcement_level(contract.OFF):
+            count(["1"])
+        assertion.raises_with_msg(TypeError, count, "stages with type list", ["1"])
+
+    def test_only_unchecked_annotations(self):
+        def launch(name: typing.Any):
+            pass
+
+        self.assertIs(contract.typechecked(launch), launch)
+
+
+class AllOfTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the contracts checked at once with all_of.
+    """
+
+    def tearDown(self):
+        contract._has_context_overrides = False
+        contract.set_enforcement_level(contract.FULL)
+
+    def test_pass(self):
+        check = contract.all_of([contract.is_not_none, (contract.is_instance, str)], (contract.is_greater_than, 0),
+                                contract.is_not_empty)
+        assertion.does_not_raise(ValueError, _all_of_test_method, check, "Falcon", 9, [1])
+
+    def test_violations(self):
+        check = contract.all_of(contract.is_not_none, (contract.is_greater_than, 0), contract.is_not_empty)
+        assertion.raises_with_msg(contract.ContractViolations, _all_of_test_method,
+                                  "2 contracts were violated:\n- a was equal to None.\n- c was empty.", check, None, 9,
+                                  [])
+        assertion.raises_with_msg(contract.ContractViolations, _all_of_test_method,
+                                  "1 contract was violated:\n- b with value 0 was not greater than 0.", check, 1, 0,
+                                  [1])
+
+        try:
+            _all_of_test_method(check, None, 0, [1])
+        except contract.ContractViolation as e:
+            self.assertEqual([type(violation) for violation in e.violations],
+                             [contract.ContractTypeError, contract.ContractValueError])
+            self.assertEqual(e.parameter_name, "a, b")
+
+    def test_first_violation_of_each_value(self):
+        # The contracts of a value are skipped after the first violated one, as if they were called in turn.
+        check = contract.all_of([contract.is_not_none, (contract.is_greater_than, 0)], contract.all_non_negative)
+        assertion.raises_with_msg(contract.ContractViolations, _all_of_test_method,
+                                  "1 contract was violated:\n- a was equal to None.", check, None, b"")
+
+    def test_other_errors(self):
+        check = contract.all_of((contract.is_greater_than, 0), contract.is_not_none)
+        assertion.raises(TypeError, _all_of_test_method, check, "a", 1)
+        assertion.raises(TypeError, check, 1)
+
+    def test_custom_check(self):
+        def is_even(value):
+            if value % 2:
+                raise contract.ContractValueError("{name} with value {value} was not even.", value, None, None)
+
+        check = contract.all_of(is_even, (contract.is_greater_than, 0))
+        assertion.does_not_raise(ValueError, _all_of_test_method, check, 2, 1)
+        assertion.raises_with_msg(contract.ContractViolations, _all_of_test_method,
+                                  "2 contracts were violated:\n- a with value 3 was not even.\n"
+                                  "- b with value 0 was not greater than 0.", check, 3, 0)
+
+    def test_enforcement_level(self):
+        check = contract.all_of(contract.is_not_none, (contract.all_have_attribute, "dummy"))
+        contract.set_enforcement_level(contract.CHEAP)
+        assertion.raises_with_msg(contract.ContractViolations, _all_of_test_method,
+                                  "1 contract was violated:\n- a was equal to None.", check, None, [object()])
+        contract.set_enforcement_level(contract.OFF)
+        assertion.does_not_raise(ValueError, _all_of_test_method, check, None, [object()])
+
+    def test_pickle(self):
+        check = contract.all_of(contract.is_not_none, (contract.is_greater_than, 0))
+        try:
+            _all_of_test_method(check, None, 0)
+        except contract.ContractViolations as e:
+            violations = pickle.loads(pickle.dumps(e))
+            self.assertEqual(str(violations), str(e))
+            self.assertEqual([violation.parameter_name for violation in violations.violations], ["a", "b"])
+
+    def test_regenerated_while_called(self):
+        check = contract.all_of(contract.is_not_none, (contract.is_greater_than, 0))
+        errors = []
+        done = threading.Event()
+
+        def call():
+            while not done.is_set():
+                try:
+                    check("Falcon", 9)
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        # The threads are switched often, so that calls are interrupted while the function is generated again.
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread = threading.Thread(target=call)
+        thread.start()
+        try:
+            for _ in range(50):
+                contract.set_enforcement_level(contract.OFF)
+                contract.set_enforcement_level(contract.FULL)
+        finally:
+            done.set()
+            thread.join()
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual(errors, [])
+        # The globals of the previous versions of the code are removed once no call runs it anymore.
+        self.assertLess(len(check.__globals__), 12)
+
+    def test_context_override(self):
+        check = contract.all_of(contract.is_not_none)
+        with contract.enforcement_level(contract.OFF):
+            assertion.does_not_raise(TypeError, _all_of_test_method, check, None)
+        assertion.raises_with_msg(contract.ContractViolations, check, "value was equal to None.", None)
+
+
+class AsyncTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the contracts of coroutine functions and asynchronous iterables.
+    """
+
+    def tearDown(self):
+        contract.set_enforcement_level(contract.FULL)
+
+    def test_coroutine_function(self):
+        self.assertTrue(inspect.iscoroutinefunction(_build_rocket_async))
+        self.assertEqual(asyncio.run(_build_rocket_async("Falcon", 9)), "Falcon 9")
+        assertion.raises_with_msg(TypeError, asyncio.run, "result was equal to None.", _build_rocket_async("", 9))
+
+    def test_preconditions_are_checked_when_awaited(self):
+        coroutine = _build_rocket_async("Falcon", 0)
+        assertion.raises_with_msg(ValueError, asyncio.run, "model with value 0 was not greater than 0.", coroutine)
+
+    def test_no_suspension(self):
+        # Without the event loop, a coroutine that never suspends completes on its first step.
+        with self.assertRaises(StopIteration) as context:
+            _build_rocket_async("Falcon", 9).send(None)
+        self.assertEqual(context.exception.value, "Falcon 9")
+
+    def test_async_generator_function(self):
+        self.assertTrue(inspect.isasyncgenfunction(_count_down))
+        self.assertEqual(asyncio.run(_collect(_count_down(3))), [3, 2, 1])
+        assertion.raises_with_msg(ValueError, asyncio.run, "result with value 0 was not greater than 0.",
+                                  _collect(_count_down(3, last=0)))
+        assertion.raises_with_msg(ValueError, asyncio.run, "start with value 0 was not greater than 0.",
+                                  _collect(_count_down(0)))
+
+    def test_async_generator_delegation(self):
+        async def drive():
+            generator = _count_down(5)
+            values = [await generator.asend(None), await generator.asend(2), await generator.athrow(KeyError())]
+            await generator.aclose()
+            return values
+
+        events = []
+        with patch.object(sys.modules[__name__], "_count_down_events", events):
+            self.assertEqual(asyncio.run(drive()), [5, 3, 2])
+        self.assertEqual(events, ["skipped 1", "caught KeyError", "closed"])
+
+    def test_typechecked(self):
+        self.assertEqual(asyncio.run(_launch_rocket_async("Falcon")), "Falcon")
+        assertion.raises_with_msg(TypeError, asyncio.run, "result with type NoneType did not match the annotation str.",
+                                  _launch_rocket_async(""))
+        self.assertEqual(asyncio.run(_collect(_launch_rockets_async(["Falcon", "Atlas"]))), ["Falcon", "Atlas"])
+        assertion.raises_with_msg(TypeError, asyncio.run, "result with type int did not match the annotation str.",
+                                  _collect(_launch_rockets_async(["Falcon", 9])))
+
+    def test_aiter_checked(self):
+        items = contract.aiter_checked(_aiter([1, "2", None]), contract.is_not_none, (contract.is_instance, int))
+        assertion.raises_with_msg(TypeError, asyncio.run, "item was not an instance of int.", _collect(items))
+        items = contract.aiter_checked(_aiter([1, None]), contract.is_not_none)
+        assertion.raises_with_msg(TypeError, asyncio.run, "item was equal to None.", _collect(items))
+        self.assertEqual(asyncio.run(_collect(contract.aiter_checked(_aiter([1, 2]), (contract.is_greater_than, 0)))),
+                         [1, 2])
+
+    def test_aiter_checked_not_enforced(self):
+        contract.set_enforcement_level(contract.CHEAP)
+        value = _aiter([])
+        self.assertIs(contract.aiter_checked(value, contract.all_have_attribute), value)
+        self.assertIsNot(contract.aiter_checked(value, contract.is_not_none), value)
+        contract.set_enforcement_level(contract.FULL)
+        self.assertIsNot(contract.aiter_checked(value, contract.all_have_attribute), value)
+
+    def test_parameter_names_in_coroutines(self):
+        async def check(rocket):
+            await asyncio.sleep(0)
+            contract.is_not_none(rocket)
+
+        async def check_awaited():
+            contract.is_not_none(await _build_rocket_async.__wrapped__("", 9))
+
+        assertion.raises_with_msg(TypeError, asyncio.run, "rocket was equal to None.", check(None))
+        assertion.raises_with_msg(TypeError, asyncio.run,
+                                  'await _build_rocket_async.__wrapped__("", 9) was equal to None.', check_awaited())
+
+
+@contract.requires(name=contract.is_not_empty, model=[contract.is_not_none, (contract.is_greater_than, 0)],
+                   company=contract.is_not_none)
+@contract.ensures((contract.is_instance, str))
+@contract.ensures(contract.is_not_none)
+def _build_rocket(name, model, /, company="SpaceX", *, reusable=True):
+    return "{0} {1} from {2}".format(name, model, company) if company else None
+
+
+@contract.typechecked
+def _launch_rocket(name: str, model: typing.Optional[int], thrust: float, payload: int | str | None = None,
+                   orbit: typing.Literal["LEO", "GTO"] = "LEO") -> str:
+    return "{0} {1}".format(name, model) if name else None
+
+
+@contract.requires(model=(contract.is_greater_than, 0))
+@contract.ensures(contract.is_not_none)
+async def _build_rocket_async(name, model):
+    return "{0} {1}".format(name, model) if name else None
+
+
+# Events of the last asynchronous generator created by _count_down, if set.
+_count_down_events = None
+
+
+@contract.requires(start=(contract.is_greater_than, 0))
+@contract.ensures((contract.is_greater_than, 0))
+async def _count_down(start, last=1):
+    try:
+        value = start
+        while value >= last:
+            try:
+                skipped = yield value
+            except KeyError:
+                _count_down_events.append("caught KeyError")
+                skipped = 0
+            if skipped:
+                _count_down_events.append("skipped {0}".format(skipped - 1))
+            value -= skipped or 1
+    finally:
+        if _count_down_events is not None:
+            _count_down_events.append("closed")
+
+
+@contract.typechecked
+async def _launch_rocket_async(name: str) -> str:
+    return name or None
+
+
+@contract.typechecked
+async def _launch_rockets_async(names: list) -> typing.AsyncIterator[str]:
+    for name in names:
+        yield name
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(async_iterable):
+    return [item async for item in async_iterable]
+
+
+def _raises_attribute_error(callable_obj, *args):
+    try:
+        callable_obj(*args)
+    except AttributeError:
+        return True
+    return False
+
+
+def _raises_type_error(callable_obj):
+    try:
+        callable_obj(None)
+    except TypeError:
+        return True
+    return False
+
 
 def _is_not_none_test_method(a):
     contract.is_not_none(a)
@@ -115,6 +1432,23 @@ def _is_not_none_on_xth_parameter_test_method(a, b, c):
     contract.is_not_none(c)
 
 
+def _is_true_expression_test_method(a, b):
+    contract.is_true(a > b)
+
+
+def _is_not_none_subscript_test_method(a):
+    contract.is_not_none(a[0])
+
+
+def _is_equal_multiline_test_method(a):
+    contract.is_equal(len(a),
+                      2)
+
+
+def _is_true_short_circuit_test_method(a, b):
+    contract.is_true(a or b)
+
+
 def _is_not_empty_test_method(a):
     contract.is_not_empty(a)
 
@@ -123,6 +1457,19 @@ def _is_equal_to_any_test_method(a, expected_values, expression=None):
     contract.is_equal_to_any(a, expected_values, expression)
 
 
+def _one_of_test_method(is_one_of, a, expression=None):
+    is_one_of(a, expression)
+
+
+def _all_of_test_method(check, a, b=None, c=None):
+    if c is not None:
+        check(a, b, c)
+    elif b is not None:
+        check(a, b)
+    else:
+        check(a)
+
+
 def _is_true_test_method(a, expression=None):
     contract.is_true(a > 0, expression)
 
@@ -143,6 +1490,54 @@ def _is_greater_than_or_equal_test_method(a, expected_value):
     contract.is_greater_than_or_equal(a, expected_value)
 
 
+def _all_in_range_test_method(a, minimum, maximum):
+    contract.all_in_range(a, minimum, maximum)
+
+
+def _all_non_negative_test_method(a):
+    contract.all_non_negative(a)
+
+
+def _is_sorted_test_method(a):
+    contract.is_sorted(a)
+
+
+def _all_equal_test_method(a, expected_value):
+    contract.all_equal(a, expected_value)
+
+
+def _all_not_null_test_method(a):
+    contract.all_not_null(a)
+
+
+def _all_greater_than_test_method(a, expected_value):
+    contract.all_greater_than(a, expected_value)
+
+
+def _all_equal_to_any_test_method(a, expected_values):
+    contract.all_equal_to_any(a, expected_values)
+
+
+def _all_unique_test_method(a):
+    contract.all_unique(a)
+
+
+def _has_dtype_test_method(a, expected_dtype):
+    contract.has_dtype(a, expected_dtype)
+
+
+def _iter_not_empty_test_method(a):
+    return contract.iter_not_empty(a)
+
+
+def _iter_all_have_attribute_test_method(a, expected_attribute_name):
+    return contract.iter_all_have_attribute(a, expected_attribute_name)
+
+
+def _iter_all_have_method_test_method(a, expected_method_name):
+    return contract.iter_all_have_method(a, expected_method_name)
+
+
 def _all_have_attribute_test_method(a, expected_attribute_name):
     contract.all_have_attribute(a, expected_attribute_name)
 
@@ -159,8 +1554,53 @@ def _is_instance_test_method(a, cls):
     contract.is_instance(a, cls)
 
 
+@dataclasses.dataclass(frozen=True)
+class _ImmutableRocket:
+    name: str
+    models: tuple
+
+
+_RocketTuple = collections.namedtuple("_RocketTuple", ("name", "model"))
+
+
 class _TestClsWithMethodAndAttributes:
     a = 1
 
     def my_method(self):
         pass
+
+
+class _TestClsWithSlots:
+    __slots__ = ("a",)
+
+    def __init__(self, *a):
+        if a:
+            self.a = a[0]
+
+    def count(self):
+        pass
+
+
+class _TestClsWithProperty:
+    def __init__(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        if self._value is None:
+            raise AttributeError("value")
+        return self._value
+
+
+class _TestClsWithGetattr:
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, name):
+        if name != self._name:
+            raise AttributeError(name)
+        return name
+
+
+class _TestClsWithAttributeSetToNone:
+    b = None
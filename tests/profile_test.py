@@ -0,0 +1,155 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+import asyncio
+import contextlib
+import inspect
+import io
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest.mock import patch
+from contracts import assertion
+from contracts import contract
+from contracts import profile
+
+_SCRIPT = textwrap.dedent('''
+    import sys
+    from contracts import contract
+
+
+    def launch(rocket):
+        contract.is_not_none(rocket)
+
+
+    for rocket in ["Falcon", None, "Atlas"]:
+        try:
+            launch(rocket)
+        except TypeError:
+            pass
+    sys.exit(int(sys.argv[1]))
+    ''')
+
+
+class ProfilerTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the attribution of the cost of contracts to their call sites.
+    """
+
+    def tearDown(self):
+        contract.set_metrics(False)
+
+    def test_call_sites(self):
+        with profile.Profiler() as profiler:
+            _launch("Falcon")
+            assertion.raises(TypeError, _launch, None)
+            _launch("Atlas")
+        sites = profiler.get_call_sites("calls")
+        self.assertEqual([(site["contract"], site["calls"], site["failures"], site["function"]) for site in sites],
+                         [("contract.is_not_none", 2, 0, "_launch"), ("assertion.raises", 1, 0, "test_call_sites")])
+        self.assertEqual(sites[0]["file"], __file__)
+        self.assertEqual(sites[0]["line"], _launch.__code__.co_firstlineno + 1)
+        self.assertGreater(sites[0]["share"], 0)
+
+    def test_failures(self):
+        with profile.Profiler() as profiler:
+            for rocket in [None, None, "Atlas"]:
+                try:
+                    _launch(rocket)
+                except TypeError:
+                    pass
+        self.assertEqual([(site["calls"], site["failures"]) for site in profiler.get_call_sites("failures")], [(3, 2)])
+
+    def test_wrappers_are_named_after_the_contract(self):
+        contract.set_metrics(True)
+        with profile.Profiler() as profiler:
+            _launch("Falcon")
+        self.assertEqual([site["contract"] for site in profiler.get_call_sites()], ["contract.is_not_none"])
+
+    def test_interleaved_iterators(self):
+        # The calls made while a checked iterator is suspended aren't nested in it, and the calls checking its items
+        # are named after the contract that returned it.
+        with profile.Profiler() as profiler:
+            rockets = contract.iter_all_have_attribute(iter(["Falcon", "Atlas"]), "upper")
+            next(rockets)
+            for rocket in ["Falcon", "Atlas", "Delta"]:
+                _launch(rocket)
+            list(rockets)
+        sites = profiler.get_call_sites("calls")
+        self.assertEqual(sites[0]["contract"], "contract.is_not_none")
+        self.assertEqual(sites[0]["calls"], 3)
+        self.assertEqual({site["contract"] for site in sites[1:]}, {"contract.iter_all_have_attribute"})
+
+    def test_interleaved_async_iterators(self):
+        async def count_rockets():
+            async def rockets():
+                for rocket in ["Falcon", "Atlas"]:
+                    await asyncio.sleep(0)
+                    yield rocket
+
+            count = 0
+            async for rocket in contract.aiter_checked(rockets(), contract.is_not_empty):
+                _launch(rocket)
+                count += 1
+            return count
+
+        with profile.Profiler() as profiler:
+            self.assertEqual(asyncio.run(count_rockets()), 2)
+        calls = {site["contract"]: site["calls"] for site in profiler.get_call_sites()}
+        self.assertEqual(calls["contract.is_not_none"], 2)
+        self.assertEqual(set(calls), {"contract.is_not_none", "contract.aiter_checked"})
+
+    def test_not_enabled(self):
+        profiler = profile.Profiler()
+        _launch("Falcon")
+        self.assertEqual(profiler.get_call_sites(), [])
+
+    def test_format_table(self):
+        with profile.Profiler() as profiler:
+            _launch("Falcon")
+            contract.is_true(True, "True")
+        lines = profiler.format_table(sort="calls", limit=1).splitlines()
+        self.assertTrue(lines[0].startswith("Contract calls by call site (total runtime: "))
+        self.assertEqual(lines[2].split(), ["Calls", "Failures", "Time", "(s)", "Share", "Call", "site", "Contract"])
+        self.assertEqual(lines[4], "... (1 more call sites)")
+
+    def test_invalid_sort(self):
+        self.assertRaises(ValueError, profile.Profiler().get_call_sites, "name")
+
+    def test_collapsed_stacks(self):
+        with profile.Profiler() as profiler:
+            line = inspect.currentframe().f_lineno + 1
+            _launch("Falcon")
+        file = io.StringIO()
+        profiler.write_collapsed_stacks(file)
+        stack, microseconds = file.getvalue().rstrip("\n").rsplit(" ", 1)
+        frames = stack.split(";")
+        self.assertEqual(frames[-3:], ["test_collapsed_stacks ({0}:{1})".format(__file__, line),
+                                       "_launch ({0}:{1})".format(__file__, _launch.__code__.co_firstlineno + 1),
+                                       "contract.is_not_none"])
+        self.assertGreaterEqual(int(microseconds), 1)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script_path = os.path.join(directory, "launch.py")
+            with open(script_path, "w") as file:
+                file.write(_SCRIPT)
+            collapsed_path = os.path.join(directory, "launch.collapsed")
+            output = io.StringIO()
+            with patch.object(sys, "argv", sys.argv[:]), patch.object(sys, "path", sys.path[:]), \
+                    contextlib.redirect_stdout(output):
+                status = profile.main(["-o", collapsed_path, script_path, "3"])
+            with open(collapsed_path) as file:
+                stacks = file.read().splitlines()
+
+        self.assertEqual(status, 3)
+        self.assertIn("{0}:7".format(script_path), output.getvalue())
+        self.assertEqual(len(stacks), 1)
+        self.assertTrue(stacks[0].startswith("<module> ({0}:12);launch ({0}:7);contract.is_not_none ".format(
+            script_path)))
+
+
+def _launch(rocket):
+    contract.is_not_none(rocket)
+
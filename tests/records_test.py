@@ -0,0 +1,126 @@
+# Copyright 2017 Benoit Bernard All Rights Reserved.
+
+import io
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+from contracts import contract
+from contracts import records
+
+_ORDER_SPEC = {
+    "id": contract.is_not_none,
+    "name": [(contract.is_instance, str), contract.is_not_empty],
+    "quantity": [(contract.is_instance, int), (contract.is_greater_than, 0)],
+    "status": (contract.is_equal_to_any, ("new", "paid")),
+}
+
+_VALID_ORDER = {"id": 1, "name": "Falcon", "quantity": 9, "status": "new"}
+
+
+class RecordsTests(unittest.TestCase):
+    """
+    Class containing unit tests that validate the compiled record validators.
+    """
+
+    def setUp(self):
+        self.validate_order = records.compile_validator(_ORDER_SPEC)
+
+    def tearDown(self):
+        contract.set_enforcement_level(contract.FULL)
+
+    def test_valid_record(self):
+        self.assertEqual(self.validate_order(_VALID_ORDER), [])
+        self.assertEqual(self.validate_order(dict(_VALID_ORDER, extra=None)), [])
+
+    def test_invalid_record(self):
+        violations = self.validate_order({"name": "", "quantity": 0, "status": "lost"})
+        self.assertEqual([str(violation) for violation in violations],
+                         ["id was equal to None.", "name was empty.", "quantity with value 0 was not greater than 0.",
+                          "status with value lost and type str was not equal to any of the expected values."])
+        self.assertIsInstance(violations[0], contract.ContractTypeError)
+
+    def test_first_violation_of_each_field(self):
+        violations = self.validate_order(dict(_VALID_ORDER, name=None, quantity="9"))
+        self.assertEqual([str(violation) for violation in violations],
+                         ["name was not an instance of str.", "quantity was not an instance of int."])
+
+    def test_several_classes(self):
+        validate = records.compile_validator({"quantity": (contract.is_instance, (int, float))})
+        self.assertEqual([str(violation) for violation in validate({"quantity": "9"})],
+                         ["quantity was not an instance of int or float."])
+
+    def test_unhashable_value(self):
+        violations = self.validate_order(dict(_VALID_ORDER, status=["new"]))
+        self.assertEqual([violation.parameter_name for violation in violations], ["status"])
+
+    def test_uncheckable_value(self):
+        validate = records.compile_validator({"quantity": (contract.is_greater_than, 0)})
+        self.assertEqual([str(violation) for violation in validate({"quantity": "9"})],
+                         ["quantity with value 9 and type str could not be checked by is_greater_than."])
+
+    def test_not_a_mapping(self):
+        self.assertEqual([str(violation) for violation in self.validate_order([1, 2])],
+                         ["record with type list was not a mapping."])
+
+    def test_custom_check(self):
+        def is_even(value):
+            if value % 2:
+                raise contract.ContractValueError("{name} with value {value} was not even.", value, None, None)
+
+        validate = records.compile_validator({"quantity": is_even})
+        self.assertEqual(validate({"quantity": 2}), [])
+        self.assertEqual([str(violation) for violation in validate({"quantity": 3})],
+                         ["quantity with value 3 was not even."])
+
+    def test_enforcement_level(self):
+        # Validators check records whatever the enforcement level.
+        contract.set_enforcement_level(contract.OFF)
+        validate = records.compile_validator({"id": contract.is_not_none, "name": (contract.is_true, "name")})
+        self.assertEqual([violation.parameter_name for violation in validate({"name": False})], ["id", "name"])
+
+    def test_pickle(self):
+        contract.set_enforcement_level(contract.OFF)
+        validate_order = pickle.loads(pickle.dumps(self.validate_order))
+        self.assertEqual([violation.parameter_name for violation in validate_order({"quantity": 1})], ["id", "name",
+                                                                                                     "status"])
+
+    def test_imported_lazily(self):
+        code = ("import sys, contracts; print('contracts.records' in sys.modules, 'concurrent.futures' in sys.modules, "
+                "contracts.records.compile_validator.__name__)")
+        self.assertEqual(subprocess.check_output([sys.executable, "-c", code], text=True).split(),
+                         ["False", "False", "compile_validator"])
+
+    def test_iter_violations(self):
+        orders = (dict(_VALID_ORDER, quantity=index % 3) for index in range(10))
+        violations = list(records.iter_violations(orders, self.validate_order, chunk_size=4))
+        self.assertEqual([row for row, _ in violations], [1, 4, 7, 10])
+        self.assertEqual(str(violations[0][1][0]), "quantity with value 0 was not greater than 0.")
+
+    def test_iter_jsonl_violations(self):
+        lines = [b'{"id": 1, "name": "Falcon", "quantity": 9, "status": "new"}', b"", b'{"id": 2,',
+                 b'{"id": 3, "name": "", "quantity": 9, "status": "paid"}', b"[]"]
+        violations = list(records.iter_jsonl_violations(io.BytesIO(b"\n".join(lines)), self.validate_order,
+                                                        chunk_size=2))
+        self.assertEqual([(row, [violation.parameter_name for violation in row_violations])
+                          for row, row_violations in violations], [(3, ["record"]), (4, ["name"]), (5, ["record"])])
+        self.assertIn("was not valid JSON", str(violations[0][1][0]))
+
+    def test_iter_jsonl_violations_from_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "orders.jsonl")
+            with open(path, "w") as file:
+                file.write('{"id": 1, "name": "Falcon", "quantity": 9, "status": "new"}\n{"id": null}\n')
+            violations = list(records.iter_jsonl_violations(path, self.validate_order))
+        self.assertEqual([row for row, _ in violations], [2])
+        self.assertEqual(len(violations[0][1]), 4)
+
+    def test_iter_violations_in_parallel(self):
+        orders = (dict(_VALID_ORDER, quantity=index % 3) for index in range(100))
+        violations = list(records.iter_violations_in_parallel(orders, self.validate_order, chunk_size=7,
+                                                              max_workers=2))
+        self.assertEqual([row for row, _ in violations], list(range(1, 101, 3)))
+        self.assertIsInstance(violations[-1][1][0], contract.ContractValueError)
+        self.assertEqual(str(violations[-1][1][0]), "quantity with value 0 was not greater than 0.")